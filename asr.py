@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+ASR command line: one entry point for the repo's scripts.
+
+python asr.py serve --model training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo --port 8001
+python asr.py benchmark run --model path/to/model.nemo --benchmark-set v1 --output-dir models/results
+python asr.py normalize predictions models/results/kn_clean_read/predictions.json
+python asr.py prep master-manifest v2
+python asr.py tokenizer build --manifest data/training/v2/master_manifest.json --data_root tokenizers/ \
+    --vocab_size 3000 --tokenizer spe
+python asr.py analyze wer-engine --utterances 10000
+python asr.py benchmark --help      # commands of a group
+
+Every command runs an existing script, as `python <script> <args>` would
+(see COMMANDS); everything after the command name is passed through, so
+`python asr.py benchmark run --help` is run_benchmark.py's own help.
+
+Only the standard library is imported until a command is picked: `--help`,
+a typo or a text-only command never pays for torch / NeMo / librosa /
+datasets. Those are imported by the script that needs them, when it runs.
+Scripts without an argparse command line get their --help answered here
+(the description below) instead of being run with it; those with
+hard-coded paths take no arguments at all. test/test_cli_startup.py holds the lightweight commands to a startup
+budget.
+"""
+
+import os
+import sys
+import runpy
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+SERVER_SCRIPT = "inference/asr_server.py"
+
+# group -> command -> (script relative to the project root, description)
+COMMANDS = {
+    "benchmark": {
+        "run": ("evaluation/benchmarking/run/run_benchmark.py",
+                "Benchmark a model on manifests or a benchmark set"),
+        "matrix": ("evaluation/benchmarking/run/run_matrix.py",
+                   "Several models x several benchmarks, one combined report"),
+        "autotune": ("evaluation/benchmarking/run/run_autotune.py",
+                     "Find the best batch seconds / threads / workers for a model on this box"),
+        "coldstart": ("evaluation/benchmarking/run/run_coldstart.py",
+                      "Per-phase startup cost (imports .. first inference) per checkpoint"),
+        "export": ("evaluation/benchmarking/run/run_export.py",
+                   "Slim single-head inference .nemo, compared with the original"),
+        "history": ("evaluation/benchmarking/run/benchmark_history.py",
+                    "List and diff past runs from the benchmark history"),
+        "kenlm": ("evaluation/benchmarking/run/run_benchmark_kenlm.py",
+                  "CTC + KenLM beam search benchmark"),
+        "bypass": ("evaluation/benchmarking/run/run_benchmark_bypass.py",
+                   "Single manifest, manual RNNT path"),
+        "ai4b": ("evaluation/benchmarking/run/run_benchmark_ai4b.py",
+                 "AI4Bharat-compatible runner (model.transcribe)"),
+        "api": ("evaluation/benchmarking/run/test_sarvam_benchmark.py",
+                "Benchmark the Sarvam speech-to-text API"),
+        "api-standin": ("evaluation/benchmarking/run/sarvam_standin_server.py",
+                        "Local stand-in for the Sarvam API (latency, 429s, 5xx)"),
+    },
+    "normalize": {
+        "predictions": ("optimization/prediction_normalization/normalize_predictions.py",
+                        "Corpus-based Kannada normalization of a predictions file"),
+        "fix-bytecode": ("scripts/fix_bytecode_predictions.py",
+                         "Fix bytecode artifacts in predictions and rescore"),
+        "kannada": ("scripts/apply_kannada_normalization.py",
+                    "Rule-based Kannada normalization, WER before / after"),
+        "corpus": ("optimization/prediction_normalization/apply_normalization.py",
+                   "Corpus-based normalization, WER before / after"),
+    },
+    "prep": {
+        "master-manifest": ("data/training/generate_master_manifest.py",
+                            "Master manifest from every dataset of a data version"),
+        "verify": ("training/data_prep/verify_dataset.py",
+                   "Check manifests against audio files for a data version"),
+        "regenerate-manifests": ("scripts/data_processing/regenerate_manifests.py",
+                                 "Rewrite train manifests with absolute paths"),
+        "fix-manifest": ("scripts/data_processing/fix_manifest.py", "Repair a manifest"),
+        "combine-manifests": ("training/data_prep/generating_splits/combine_manifests.py",
+                              "Combine per-dataset manifests"),
+        "librispeech": ("scripts/get_librispeech_data.py", "Download and convert LibriSpeech"),
+        "gok-convert": ("scripts/data_processing/convert_gok_to_v2.py",
+                        "GoK call recordings: MP3 to WAV + v2 files"),
+        "gok-reorganize": ("scripts/data_processing/reorganize_gok_to_v2.py",
+                           "GoK call recordings: v2 dataset layout"),
+        "ka-kathbath": ("training/data_prep/ka/kathbath.py", "Kannada Kathbath"),
+        "ka-indic-voices": ("training/data_prep/ka/indic_voices.py", "Kannada IndicVoices"),
+        "ka-shrutilipi": ("training/data_prep/ka/shrutilipi.py", "Kannada Shrutilipi"),
+        "ka-vaani": ("training/data_prep/ka/vaani.py", "Kannada Vaani"),
+        "ka-iisc-mile": ("training/data_prep/ka/IISC_Mile.py", "Kannada IISc MILE"),
+        "hi-kathbath": ("training/data_prep/hi/kathbath.py", "Hindi Kathbath"),
+        "hi-indic-voices": ("training/data_prep/hi/indic_voices.py", "Hindi IndicVoices"),
+        "hi-shrutilipi": ("training/data_prep/hi/shrutilipi.py", "Hindi Shrutilipi"),
+        "hi-vaani": ("training/data_prep/hi/vaani.py", "Hindi Vaani"),
+        "hi-openslr-118": ("training/data_prep/hi/open_slr_118.py", "Hindi OpenSLR 118"),
+        "en-nptel": ("training/data_prep/en/pipeline_hf_nptel.py", "English NPTEL"),
+        "en-svarah": ("training/data_prep/en/pipeline_hf_svarah.py", "English Svarah"),
+    },
+    "tokenizer": {
+        "build": ("scripts/process_asr_text_tokenizer.py",
+                  "Train a SentencePiece / WordPiece tokenizer from manifests or text"),
+        "build-ka-3k": ("training/tokenizers/build_tokenizer_3k_ka.py", "Kannada 3k SentencePiece tokenizer"),
+        "build-hi": ("training/tokenizers/build_tokenizer_hi.py", "Hindi tokenizer"),
+        "extract-en": ("training/tokenizers/extract_english_tokenizer.py",
+                       "Extract the tokenizer of an English .nemo"),
+        "vocab-txt": ("training/tokenizers/create_vocab_txt.py", "vocab.txt from tokenizer.vocab"),
+        "fetch-ka-corpus": ("training/tokenizers/fetch_ka_corpus.py", "Kannada text corpus"),
+        "fetch-hi-corpus": ("training/tokenizers/fetch_hi_corpus.py", "Hindi text corpus"),
+    },
+    "analyze": {
+        "wer-engine": ("scripts/evaluation/benchmark_wer_engine.py",
+                       "Engine WER/CER vs jiwer: speed and agreement"),
+        "lm-grid-search": ("scripts/evaluation/run_grid_search.py",
+                           "KenLM alpha/beta grid search on the CTC head"),
+        "convert-predictions": ("scripts/convert_predictions.py",
+                                "Convert predictions files (JSON <-> JSONL[.gz|.zst])"),
+        "corpus": ("optimization/prediction_normalization/corpus_analyzer.py",
+                   "Kannada corpus statistics for normalization rules"),
+        "compare-normalization": ("optimization/prediction_normalization/compare_normalization_strategies_v2.py",
+                                  "Compare normalization strategies on predictions"),
+        "proper-nouns": ("optimization/proper_noun_handling/extract_proper_noun_variants.py",
+                         "Proper noun variants from the Wikipedia corpus"),
+        "prediction-variants": ("optimization/proper_noun_handling/extract_from_predictions.py",
+                                "Proper noun variants from predictions"),
+    },
+}
+
+GROUP_HELP = {
+    "benchmark": "benchmark runs, tuning, startup and export",
+    "normalize": "text normalization of predictions",
+    "prep": "datasets and manifests",
+    "tokenizer": "tokenizer training and extraction",
+    "analyze": "metrics, corpora and prediction analysis",
+}
+
+
+def command_line(script):
+    """How a script reads its arguments: 'argparse', 'argv' (bare sys.argv) or None (hard-coded paths)."""
+    source = script.read_text(encoding='utf-8', errors='replace')
+    if 'argparse' in source:
+        return 'argparse'
+    return 'argv' if 'sys.argv' in source else None
+
+
+def run_script(script, argv):
+    """Run a repo script as `python <script> <argv>` would, in this process."""
+    path = PROJECT_ROOT / script
+    if not path.exists():
+        print(f"❌ Script not found: {script}")
+        return 1
+    sys.argv = [str(path)] + list(argv)
+    # As for `python script.py`: its own directory first, for sibling imports
+    sys.path.insert(0, str(path.parent))
+    runpy.run_path(str(path), run_name='__main__')
+    return 0
+
+
+def run_command(group, name, argv):
+    script, description = COMMANDS[group][name]
+    kind = command_line(PROJECT_ROOT / script)
+    # Only argparse scripts know --help; the others would take it as an argument (or ignore it and run)
+    if kind != 'argparse' and argv in (['-h'], ['--help']):
+        print(f"usage: asr.py {group} {name}{' ...' if kind else ''}\n\n{description}.\nRuns {script}"
+              f"{'' if kind else ' (no command-line options; paths are set in the script)'}.")
+        return 0
+    if kind is None and argv:
+        print(f"❌ {group} {name} takes no arguments ({script} has its paths set in the script)")
+        return 2
+    return run_script(script, argv)
+
+
+def serve(args):
+    for key, value in (('ASR_MODEL_PATH', args.model), ('ASR_SERVER_HOST', args.host),
+                       ('ASR_SERVER_PORT', args.port), ('ASR_SERVER_WORKERS', args.workers)):
+        if value is not None:
+            os.environ[key] = str(value)
+    return run_script(SERVER_SCRIPT, [])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="asr.py", description="ASR fine-tuning / evaluation command line",
+                                     epilog="Options after a command go to its script, e.g. "
+                                            "`asr.py benchmark run --help`.")
+    groups = parser.add_subparsers(dest="group", metavar="command", required=True)
+
+    serve_parser = groups.add_parser("serve", help="run the transcription server (inference/asr_server.py)",
+                                     description="Run the FastAPI transcription server")
+    serve_parser.add_argument("--model", type=str, default=None,
+                              help="Path to .nemo model file (default: the server's MODEL_PATH)")
+    serve_parser.add_argument("--host", type=str, default=None, help="Bind address (default 0.0.0.0)")
+    serve_parser.add_argument("--port", type=int, default=None, help="Port (default 8001)")
+    serve_parser.add_argument("--workers", type=int, default=None,
+                              help="Uvicorn worker processes (default: autotuned, else 1)")
+
+    for group, commands in COMMANDS.items():
+        group_parser = groups.add_parser(group, help=GROUP_HELP[group], description=GROUP_HELP[group].capitalize())
+        names = group_parser.add_subparsers(dest="command", metavar="command", required=True)
+        for name, (_, description) in commands.items():
+            names.add_parser(name, help=description, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # `<group> <command> ...`: everything after the command belongs to the script
+    if len(argv) >= 2 and argv[1] in COMMANDS.get(argv[0], {}):
+        return run_command(argv[0], argv[1], argv[2:])
+    # Anything else is serve, a help request or a usage error (argparse exits on the last two)
+    args = build_parser().parse_args(argv)
+    return serve(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
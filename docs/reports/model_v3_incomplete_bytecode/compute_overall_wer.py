@@ -4,8 +4,12 @@ Compute overall WER/CER on full dataset
 Compares metrics before and after bytecode corrections
 """
 
+import sys
 import json
-from jiwer import wer, cer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from evaluation.benchmarking.engine.metrics import CorpusAlignment
 
 # Read original data (with bytecode issues)
 with open('benchmark_incomplete_v3.json', 'r', encoding='utf-8') as f:
@@ -29,13 +33,18 @@ predictions_corrected = [entry['prediction'].strip() for entry in corrected_data
 changed_count = sum(1 for orig, corr in zip(predictions_original, predictions_corrected) if orig != corr)
 print(f"Entries with bytecode corrections: {changed_count}\n")
 
+# Both prediction sets share one alignment cache: unchanged entries are only aligned once
+n = len(ground_truths)
+alignment = CorpusAlignment.from_pairs(ground_truths * 2, predictions_original + predictions_corrected,
+                                       keep_ops=False)
+
 # Compute metrics for original predictions (with bytecode issues)
-wer_original = wer(ground_truths, predictions_original) * 100
-cer_original = cer(ground_truths, predictions_original) * 100
+metrics_original = alignment.metrics(range(n), ndigits=None)
+wer_original, cer_original = metrics_original['wer'], metrics_original['cer']
 
 # Compute metrics for corrected predictions (with proper Kannada)
-wer_corrected = wer(ground_truths, predictions_corrected) * 100
-cer_corrected = cer(ground_truths, predictions_corrected) * 100
+metrics_corrected = alignment.metrics(range(n, 2 * n), ndigits=None)
+wer_corrected, cer_corrected = metrics_corrected['wer'], metrics_corrected['cer']
 
 # Display results
 print("📊 ORIGINAL (with bytecode issues):")
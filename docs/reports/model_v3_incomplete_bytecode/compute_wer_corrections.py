@@ -4,8 +4,12 @@ Compute WER for bytecode corrections
 Compares WER before and after fixing bytecode issues
 """
 
+import sys
 import json
-from jiwer import wer, cer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from evaluation.benchmarking.engine.metrics import CorpusAlignment
 
 # Read corrections file
 with open('bytecode_corrections.json', 'r', encoding='utf-8') as f:
@@ -22,12 +26,12 @@ predictions_original = [entry['prediction_original'].strip() for entry in correc
 predictions_corrected = [entry['prediction_corrected'].strip() for entry in corrections]
 
 # Compute metrics for original predictions
-wer_original = wer(ground_truths, predictions_original) * 100
-cer_original = cer(ground_truths, predictions_original) * 100
+metrics_original = CorpusAlignment.from_pairs(ground_truths, predictions_original, keep_ops=False).metrics(ndigits=None)
+wer_original, cer_original = metrics_original['wer'], metrics_original['cer']
 
 # Compute metrics for corrected predictions
-wer_corrected = wer(ground_truths, predictions_corrected) * 100
-cer_corrected = cer(ground_truths, predictions_corrected) * 100
+metrics_corrected = CorpusAlignment.from_pairs(ground_truths, predictions_corrected, keep_ops=False).metrics(ndigits=None)
+wer_corrected, cer_corrected = metrics_corrected['wer'], metrics_corrected['cer']
 
 # Display results
 print("📊 ORIGINAL (with bytecode issues):")
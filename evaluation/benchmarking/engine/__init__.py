@@ -0,0 +1,40 @@
+"""
+ASR Benchmark Engine
+
+Shared building blocks for every benchmark runner in
+evaluation/benchmarking/run/:
+
+- data.py           manifest discovery, validation, loading and audio reading
+- models.py         .nemo model loading (plain and self-healing)
+- cache.py          on-disk cache helpers (healed model configs, file hashes)
+- weight_cache.py   config + tokenizer + mmap-able weights per .nemo hash (no extraction)
+- backends.py       pluggable inference backends (transcribe, rnnt, ctc, ctc_kenlm, api)
+- metrics.py        WER/CER, S/D/I breakdowns and confusions from cached alignments
+- significance.py   bootstrap WER/CER CIs, paired bootstrap and sign tests
+- slices.py         WER/CER by manifest metadata (source, lang, duration, ...)
+- predictions_io.py streaming predictions reader/writer (JSONL, gzip, zstd)
+- report.py         report writing (one schema for all runners)
+- checkpoint.py     per-benchmark run log for resuming interrupted runs
+- runner.py         runs a backend over one or more benchmark manifests
+- parallel.py       multi-process sharded runs and worker-scaling sweeps
+- audio_store.py    audio decoded once into a memory-mapped store shared by runs
+- feature_cache.py  log-mel features cached per preprocessor config, in shards
+- matrix.py         several models x several benchmarks, one combined report
+- hybrid.py         per-decoder runs and reports from one shared encoder pass
+- decoder_vocab.py  validated CTC decoder vocab, cached per model hash
+- lm_decode.py      CTC + KenLM beam search in a shared-memory process pool
+- logit_cache.py    memory-mapped cache of per-utterance CTC log-probs
+- lm_tuning.py      KenLM alpha/beta scoring from the logit cache, in a process pool
+- autotune.py       batch seconds / threads / workers sweep, recommended config per box
+- profiling.py      torch profiler + Python stack sampling under an overhead budget
+- coldstart.py      per-phase cold-start timing (imports .. first inference) per checkpoint
+- export.py         slim inference .nemo (one head, optional bf16/fp16) + size / load / RSS comparison
+- perf.py           stage timers, peak memory and report performance blocks
+- history.py        SQLite history of benchmark runs, cross-run diffs
+- sarvam_client.py  async Sarvam API client (rate limit, retries, response cache)
+- cli.py            shared argparse flags for the runners
+
+Import modules explicitly, e.g.:
+
+    from evaluation.benchmarking.engine import backends, runner
+"""
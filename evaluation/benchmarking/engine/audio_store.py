@@ -0,0 +1,148 @@
+"""
+Decoded audio shared by every model of a multi-model run.
+
+Reading and resampling a wav costs the same whatever model consumes it, so
+when several checkpoints are evaluated on the same benchmark sets each file
+is decoded once into a flat memory-mapped file:
+
+    <store>/samples.f32   16 kHz mono float32 waveforms back to back
+    <store>/index.json    sample rate, and per audio path: sample offset and
+                          length (or the error it failed to decode with)
+
+A backend with an attached store (Backend.audio_store) reads waveforms from
+it instead of calling data.load_audio; paths not in the store are decoded as
+usual. Any number of processes can open the same store; np.memmap shares
+the OS page cache, so parallel model workers don't each hold a copy.
+
+The default location is $ASR_CACHE_DIR/audio/<key>, the key hashing the
+audio paths with their sizes and mtimes, so the same benchmark selection
+reuses the store across runs and an edited file gets a fresh one.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from evaluation.benchmarking.engine.cache import cache_dir, write_json_atomic
+from evaluation.benchmarking.engine.data import SAMPLE_RATE, load_audio
+
+INDEX_NAME = "index.json"
+DATA_NAME = "samples.f32"
+STORE_VERSION = 1
+
+
+def store_key(paths, sr=SAMPLE_RATE):
+    h = hashlib.sha256(f"v{STORE_VERSION}-sr{sr}".encode())
+    for path in sorted(set(paths)):
+        try:
+            st = os.stat(path)
+            h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        except OSError:
+            h.update(f"{path}\0missing\n".encode())
+    return h.hexdigest()[:16]
+
+
+def default_store_path(paths, sr=SAMPLE_RATE):
+    return os.path.join(cache_dir('audio'), store_key(paths, sr))
+
+
+def _decode(path, sr):
+    try:
+        return load_audio(path, sr=sr)
+    except Exception as e:
+        return e
+
+
+def build_audio_store(paths, store_path=None, sr=SAMPLE_RATE, num_workers=None, rebuild=False):
+    """
+    Decode every path once into a store (or reuse an existing one).
+
+    Files are decoded by a thread pool (resampling and file reads release
+    the GIL) and written in order. Written into a temp dir and renamed at the
+    end, so a crash never leaves a store that looks complete.
+    """
+    paths = list(dict.fromkeys(paths))
+    store_path = store_path or default_store_path(paths, sr)
+    if AudioStore.exists(store_path) and not rebuild:
+        store = AudioStore(store_path)
+        if set(paths) <= store.paths():
+            print(f"♻️  Using decoded audio: {store_path} ({store.info()['audio_hours']} h)")
+            return store
+
+    num_workers = num_workers or min(8, os.cpu_count() or 1)
+    tmp_path = f"{store_path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    index = {'version': STORE_VERSION, 'sample_rate': sr, 'files': {}, 'failed': {}}
+    offset = 0
+    start = time.perf_counter()
+    print(f"🎧 Decoding {len(paths)} audio files once ({num_workers} threads) -> {store_path}")
+    with open(os.path.join(tmp_path, DATA_NAME), 'wb') as f, ThreadPoolExecutor(num_workers) as pool:
+        for i, (path, audio) in enumerate(zip(paths, pool.map(lambda p: _decode(p, sr), paths)), 1):
+            if isinstance(audio, Exception):
+                index['failed'][path] = str(audio)
+            else:
+                f.write(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+                index['files'][path] = [offset, int(len(audio))]
+                offset += int(len(audio))
+            if i % 1000 == 0 or i == len(paths):
+                print(f"   Decoded {i}/{len(paths)}")
+
+    index['total_samples'] = offset
+    index['decode_seconds'] = round(time.perf_counter() - start, 3)
+    write_json_atomic(os.path.join(tmp_path, INDEX_NAME), index)
+    if os.path.exists(store_path):
+        shutil.rmtree(store_path)
+    os.replace(tmp_path, store_path)
+    store = AudioStore(store_path)
+    info = store.info()
+    print(f"   ✅ {info['files']} files, {info['audio_hours']} h in {info['decode_seconds']}s "
+          f"({info['size_mb']} MB, {info['failed']} failed)")
+    return store
+
+
+class AudioStore:
+    """Read side: store.get(path) is the waveform as a float32 array."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_NAME), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.files = self.index['files']
+        self.failed = self.index['failed']
+        self.data = None
+        if self.index['total_samples']:
+            self.data = np.memmap(os.path.join(path, DATA_NAME), dtype=np.float32, mode='r',
+                                  shape=(self.index['total_samples'],))
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, INDEX_NAME))
+
+    def __contains__(self, path):
+        return path in self.files or path in self.failed
+
+    def paths(self):
+        return set(self.files) | set(self.failed)
+
+    def get(self, path):
+        if path in self.failed:
+            raise RuntimeError(f"Audio failed to decode: {self.failed[path]}")
+        offset, length = self.files[path]
+        # A copy: callers hand it to torch, which wants writable memory
+        return np.array(self.data[offset:offset + length])
+
+    def info(self):
+        total = self.index['total_samples']
+        return {
+            'path': self.path,
+            'files': len(self.files),
+            'failed': len(self.failed),
+            'audio_hours': round(total / self.index['sample_rate'] / 3600, 4),
+            'size_mb': round(total * 4 / 2 ** 20, 1),
+            'decode_seconds': self.index.get('decode_seconds'),
+        }
@@ -0,0 +1,392 @@
+"""
+Batch size / thread count / worker count autotuning for one model on one box.
+
+run/run_autotune.py runs the model over a sample of a manifest and sweeps, in
+order:
+
+    1. intra-op threads  (CPU only; one process, torch.set_num_threads)
+    2. batch size        as seconds of padded audio per batch (max_batch_seconds),
+                         doubling until throughput stops improving or memory
+                         would run out
+    3. worker processes  (CPU only; each with CPU count / workers threads,
+                         through parallel.run_benchmark_sharded)
+
+Each trial records utterances/s, RTFx and peak memory (GPU: torch's peak
+allocation; CPU: the process' peak RSS, reset per trial where Linux allows,
+summed over workers). Before the next, larger batch is tried its peak memory
+is extrapolated from the last one; if that would exceed --memory-fraction of
+the device's memory (or the trial itself ran out of memory) the batch sweep
+stops there, so a sweep never has to recover from a real OOM on the box.
+
+The best trial becomes the recommended configuration, stored in
+$ASR_AUTOTUNE_CONFIG (default $ASR_CACHE_DIR/autotune.json) under a key of
+model hash + backend + hardware:
+
+{
+  "configs": {
+    "<model sha256[:16]>-rnnt-<hardware key>": {
+      "model": "...nemo", "model_sha256": "...", "backend": "rnnt",
+      "hardware": {"device": "cuda", "gpu": "NVIDIA A100-SXM4-80GB",
+                   "gpu_memory_mb": 81050, "cpu_count": 32, "machine": "x86_64"},
+      "recommended": {"batch_size": 256, "max_batch_seconds": 480.0,
+                      "workers": 1, "threads_per_worker": null},
+      "best": {...trial...}, "trials": [...], "sample": 256, "timestamp": "..."
+    }
+  }
+}
+
+load_tuned_config() is how consumers find it: cli.apply_tuned_config fills
+any batch / worker / thread flag not given explicitly (run_benchmark.py,
+run_matrix.py), and inference/asr_server.py sets its threads and uvicorn
+workers from it. A config tuned on other hardware is never picked up.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import platform
+import tempfile
+from datetime import datetime
+
+from evaluation.benchmarking.engine.cache import CACHE_ROOT, file_sha256, read_json, write_json_atomic
+from evaluation.benchmarking.engine.perf import peak_rss_mb, proc_status_mb
+
+CONFIG_VERSION = 1
+DEFAULT_BATCH_SECONDS = (30, 60, 120, 240, 480, 960)
+# Batch size cap while tuning by seconds of audio, so max_batch_seconds is what binds
+TUNING_BATCH_SIZE = 256
+DEFAULT_MEMORY_FRACTION = 0.85
+
+
+def config_path():
+    return os.environ.get("ASR_AUTOTUNE_CONFIG") or os.path.join(CACHE_ROOT, "autotune.json")
+
+
+# -------------------------
+# Hardware + keys
+# -------------------------
+def hardware_info():
+    """What the tuned numbers depend on: the GPU (if any), CPU count and architecture."""
+    info = {'device': 'cpu', 'gpu': None, 'gpu_memory_mb': None,
+            'cpu_count': os.cpu_count(), 'machine': platform.machine()}
+    try:
+        import torch
+    except ImportError:
+        return info
+    if torch.cuda.is_available():
+        props = torch.cuda.get_device_properties(0)
+        info.update(device='cuda', gpu=props.name, gpu_memory_mb=round(props.total_memory / 2 ** 20))
+    return info
+
+
+def hardware_key(info):
+    return hashlib.sha256(json.dumps(info, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def config_key(model_sha256, backend, info):
+    return f"{model_sha256[:16]}-{backend}-{hardware_key(info)}"
+
+
+def load_tuned_config(model_path, backend, path=None, info=None):
+    """The tuned entry for this model + backend on this hardware, or None."""
+    configs = (read_json(path or config_path(), {}) or {}).get('configs') or {}
+    if not configs or not os.path.exists(model_path):
+        return None
+    key = config_key(file_sha256(model_path), backend, info or hardware_info())
+    entry = configs.get(key)
+    if not entry or entry.get('version') != CONFIG_VERSION:
+        return None
+    return entry
+
+
+def save_tuned_config(entry, path=None):
+    path = path or config_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = read_json(path, {}) or {}
+    data.setdefault('configs', {})[config_key(entry['model_sha256'], entry['backend'], entry['hardware'])] = entry
+    write_json_atomic(path, data)
+    return path
+
+
+# -------------------------
+# Memory
+# -------------------------
+def is_oom(error):
+    message = str(error).lower()
+    return 'out of memory' in message or "can't allocate memory" in message or isinstance(error, MemoryError)
+
+
+def memory_limit_mb(device, fraction=DEFAULT_MEMORY_FRACTION):
+    """The memory budget trials must stay under: a fraction of GPU memory or of physical RAM."""
+    if device == 'cuda':
+        import torch
+        total = torch.cuda.get_device_properties(0).total_memory
+    else:
+        try:
+            total = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, OSError, AttributeError):
+            return None
+    return total / 2 ** 20 * fraction
+
+
+def _reset_peak_memory(device):
+    if device == 'cuda':
+        import torch
+        torch.cuda.empty_cache()
+        torch.cuda.reset_peak_memory_stats()
+        return
+    # Resets VmHWM (peak RSS) to the current RSS; Linux only
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _current_memory_mb(device):
+    if device == 'cuda':
+        import torch
+        return torch.cuda.memory_allocated() / 2 ** 20
+    return proc_status_mb('VmRSS')
+
+
+def _peak_memory_mb(device):
+    if device == 'cuda':
+        import torch
+        return torch.cuda.max_memory_allocated() / 2 ** 20
+    peak = proc_status_mb('VmHWM')
+    if peak is None:
+        peak = peak_rss_mb()
+    return peak
+
+
+def _release(device):
+    import gc
+    gc.collect()
+    if device == 'cuda':
+        sys.modules['torch'].cuda.empty_cache()
+
+
+# -------------------------
+# Trials
+# -------------------------
+def sample_entries(entries, n, seed=0):
+    """A random sample of n entries, in manifest order (so the sample doesn't depend on sorting)."""
+    if n is None or n >= len(entries):
+        return list(entries)
+    picked = random.Random(seed).sample(entries, n)
+    return sorted(picked, key=lambda e: e['index'])
+
+
+def run_trial(backend, entries, device, max_batch_seconds, threads=None, batch_size=TUNING_BATCH_SIZE):
+    """One single-process pass over entries with this batch / thread setting."""
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    backend.batch_size = batch_size
+    backend.max_batch_seconds = max_batch_seconds
+    trial = {'workers': 1, 'threads_per_worker': threads, 'batch_size': batch_size,
+             'max_batch_seconds': max_batch_seconds}
+
+    _release(device)
+    baseline = _current_memory_mb(device)
+    _reset_peak_memory(device)
+    start = time.perf_counter()
+    try:
+        backend.transcribe(entries)
+    except Exception as e:
+        if not is_oom(e):
+            raise
+        _release(device)
+        return {**trial, 'status': 'oom', 'error': str(e)[:200]}
+    seconds = time.perf_counter() - start
+    peak = _peak_memory_mb(device)
+    audio_seconds = sum(e.get('duration', 0.0) for e in entries)
+    return {**trial, 'status': 'completed', 'seconds': round(seconds, 3),
+            'utterances_per_second': round(len(entries) / seconds, 2),
+            'rtfx': round(audio_seconds / seconds, 2) if audio_seconds else None,
+            'baseline_memory_mb': round(baseline, 1) if baseline is not None else None,
+            'peak_memory_mb': round(peak, 1) if peak is not None else None}
+
+
+def predicted_peak_mb(trial, scale):
+    """Extrapolate a trial's peak memory to a batch `scale` times larger (activations grow linearly)."""
+    if trial.get('peak_memory_mb') is None or trial.get('baseline_memory_mb') is None:
+        return None
+    baseline = trial['baseline_memory_mb']
+    return baseline + (trial['peak_memory_mb'] - baseline) * scale
+
+
+def _print_trial(trial):
+    if trial['status'] != 'completed':
+        print(f"      ❌ {trial['status']}: batch {trial['max_batch_seconds']}s, "
+              f"{trial['workers']} worker(s) x {trial['threads_per_worker'] or '-'} threads")
+        return
+    print(f"      ⏱️  batch {trial['max_batch_seconds']:>6}s | {trial['workers']} worker(s) x "
+          f"{trial['threads_per_worker'] or '-'} threads | {trial['utterances_per_second']} utt/s | "
+          f"RTFx {trial['rtfx']} | peak {trial['peak_memory_mb']} MB")
+
+
+def _throughput(trial):
+    return trial.get('utterances_per_second') or 0 if trial.get('status') == 'completed' else 0
+
+
+def sweep_threads(backend, entries, device, thread_counts, max_batch_seconds):
+    print(f"\n🧵 Threads: {', '.join(map(str, thread_counts))}")
+    trials = []
+    for threads in thread_counts:
+        trial = run_trial(backend, entries, device, max_batch_seconds, threads=threads)
+        _print_trial(trial)
+        trials.append(trial)
+    return trials
+
+
+def sweep_batch_seconds(backend, entries, device, batch_seconds, threads=None, memory_limit=None, patience=2):
+    """Grow the batch until throughput stops improving for `patience` steps or memory would run out."""
+    print(f"\n📦 Batch seconds: {', '.join(map(str, batch_seconds))}")
+    trials = []
+    best, worse = 0, 0
+    for i, seconds in enumerate(batch_seconds):
+        if trials and memory_limit:
+            previous = trials[-1]
+            predicted = predicted_peak_mb(previous, seconds / previous['max_batch_seconds'])
+            if predicted is not None and predicted > memory_limit:
+                print(f"      🛑 Stopping before {seconds}s: predicted peak {predicted:.0f} MB "
+                      f"> budget {memory_limit:.0f} MB")
+                break
+        trial = run_trial(backend, entries, device, seconds, threads=threads)
+        _print_trial(trial)
+        trials.append(trial)
+        if trial['status'] != 'completed':
+            print(f"      🛑 Out of memory at {seconds}s; keeping smaller batches")
+            break
+        if _throughput(trial) > best:
+            best, worse = _throughput(trial), 0
+        else:
+            worse += 1
+            if worse >= patience:
+                break
+    return trials
+
+
+def sweep_workers(make_backend, entries, worker_counts, max_batch_seconds, memory_limit=None,
+                  single_process_peak_mb=None):
+    """Sharded runs of the sample at each worker count (CPU count / workers threads each)."""
+    from evaluation.benchmarking.engine.data import benchmark_from_manifest
+    from evaluation.benchmarking.engine.parallel import (default_threads_per_worker, run_benchmark_sharded,
+                                                         worker_pool)
+
+    print(f"\n👥 Workers: {', '.join(map(str, worker_counts))}")
+    trials = []
+    with tempfile.TemporaryDirectory(prefix='autotune-') as tmp:
+        manifest = os.path.join(tmp, 'sample.json')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            for e in entries:
+                f.write(json.dumps({k: v for k, v in e.items() if k != 'index'}, ensure_ascii=False) + '\n')
+        benchmark = benchmark_from_manifest(manifest, name='autotune_sample')
+        for n in worker_counts:
+            threads = default_threads_per_worker(n)
+            trial = {'workers': n, 'threads_per_worker': threads, 'batch_size': TUNING_BATCH_SIZE,
+                     'max_batch_seconds': max_batch_seconds}
+            if memory_limit and single_process_peak_mb and single_process_peak_mb * n > memory_limit:
+                print(f"      🛑 Skipping {n} workers: ~{single_process_peak_mb * n:.0f} MB "
+                      f"> budget {memory_limit:.0f} MB")
+                trials.append({**trial, 'status': 'skipped', 'error': 'predicted to exceed the memory budget'})
+                continue
+            predictions_path = os.path.join(tmp, f'workers{n}', 'predictions.jsonl')
+            with worker_pool(n, threads) as pool:
+                result, _ = run_benchmark_sharded(make_backend(max_batch_seconds), benchmark, predictions_path,
+                                                  n, pool, threads_per_worker=threads, resume=False, slice_by=())
+            if result.get('status') != 'completed':
+                oom = is_oom(result.get('error') or '')
+                trial = {**trial, 'status': 'oom' if oom else 'failed', 'error': (result.get('error') or '')[:200]}
+            else:
+                p = result['parallel']
+                peaks = [s.get('peak_rss_mb') or 0 for s in p['shards']]
+                trial = {**trial, 'status': 'completed', 'seconds': p['makespan_seconds'],
+                         'utterances_per_second': p['utterances_per_second'], 'rtfx': p['rtfx'],
+                         'peak_memory_mb': round(sum(peaks), 1) if any(peaks) else None}
+            _print_trial(trial)
+            trials.append(trial)
+    return trials
+
+
+def best_trial(trials):
+    completed = [t for t in trials if t['status'] == 'completed']
+    return max(completed, key=_throughput) if completed else None
+
+
+def default_thread_counts(cpu_count=None):
+    cpu_count = cpu_count or os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cpu_count:
+        counts.append(n)
+        n *= 2
+    return counts + [cpu_count]
+
+
+def default_worker_counts(cpu_count=None):
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return [n for n in (1, 2, 4, 8, 16) if n <= cpu_count]
+
+
+def autotune(backend, entries, make_backend=None, batch_seconds=DEFAULT_BATCH_SECONDS, thread_counts=None,
+             worker_counts=None, memory_fraction=DEFAULT_MEMORY_FRACTION, warmup=8):
+    """
+    Sweep threads, batch seconds and workers for a loaded manual-path backend.
+
+    Args:
+        backend: the model's backend (rnnt / ctc / ctc_kenlm), used for the
+                 single-process trials
+        entries: the manifest sample to run every trial on
+        make_backend: picklable max_batch_seconds -> zero-arg backend factory
+                      for the worker sweep (None skips it)
+
+    Returns {'hardware', 'memory_limit_mb', 'trials', 'best', 'recommended'}.
+    """
+    info = hardware_info()
+    device = info['device']
+    memory_limit = memory_limit_mb(device, memory_fraction)
+    batch_seconds = sorted(batch_seconds)
+    where = info['gpu'] or f"{info['cpu_count']} CPUs"
+    budget = f"{memory_limit:.0f} MB" if memory_limit else "unknown"
+    print(f"\n🔧 Autotuning on {where}: {len(entries)} utterances, memory budget {budget}")
+
+    # Warm-up (cuDNN autotuning, allocator, lazy init) so the first trial isn't penalised
+    if warmup:
+        run_trial(backend, entries[:warmup], device, batch_seconds[0])
+
+    trials = []
+    threads = None
+    if device == 'cpu':
+        thread_counts = thread_counts or default_thread_counts(info['cpu_count'])
+        thread_trials = sweep_threads(backend, entries, device, thread_counts, batch_seconds[0])
+        trials += thread_trials
+        threads = (best_trial(thread_trials) or {}).get('threads_per_worker')
+
+    batch_trials = sweep_batch_seconds(backend, entries, device, batch_seconds, threads=threads,
+                                       memory_limit=memory_limit)
+    trials += batch_trials
+    best = best_trial(trials)
+    if best is None:
+        raise RuntimeError("Every autotune trial failed; nothing to recommend")
+
+    if device == 'cpu' and make_backend is not None:
+        worker_counts = [n for n in (worker_counts or default_worker_counts(info['cpu_count'])) if n > 1]
+        if worker_counts:
+            trials += sweep_workers(make_backend, entries, worker_counts, best['max_batch_seconds'],
+                                    memory_limit=memory_limit, single_process_peak_mb=best.get('peak_memory_mb'))
+            best = best_trial(trials)
+
+    recommended = {'batch_size': best['batch_size'], 'max_batch_seconds': best['max_batch_seconds'],
+                   'workers': best['workers'], 'threads_per_worker': best['threads_per_worker']}
+    return {'hardware': info, 'memory_limit_mb': round(memory_limit, 1) if memory_limit else None,
+            'trials': trials, 'best': best, 'recommended': recommended}
+
+
+def tuned_entry(model_path, backend_name, result, sample):
+    return {'version': CONFIG_VERSION, 'model': model_path, 'model_sha256': file_sha256(model_path),
+            'backend': backend_name, 'timestamp': datetime.now().isoformat(), 'sample': sample, **result}
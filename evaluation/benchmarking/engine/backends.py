@@ -0,0 +1,507 @@
+"""
+Pluggable inference backends.
+
+Every backend takes a list of manifest entries and returns one prediction per
+entry, in the same order. A backend may return an Exception instance in place
+of a prediction to mark a single entry as failed; the runner records it as an
+error row instead of failing the whole batch.
+
+| name       | path                                                        |
+|------------|-------------------------------------------------------------|
+| transcribe | model.transcribe() (NeMo's own dataloader + batching)       |
+| rnnt       | manual preprocessor -> encoder -> RNNT greedy, batched      |
+| ctc        | manual preprocessor -> encoder -> CTC head, greedy          |
+| ctc_kenlm  | manual preprocessor -> encoder -> CTC head + pyctcdecode LM |
+| hybrid     | manual path, one encoder pass -> rnnt + ctc (+ ctc_kenlm)   |
+| api        | external HTTP API (Sarvam speech-to-text)                   |
+"""
+
+import os
+
+from evaluation.benchmarking.engine.data import SAMPLE_RATE, load_audio
+from evaluation.benchmarking.engine.perf import StageTimer
+
+
+def hypothesis_text(hyp):
+    """NeMo returns plain strings or Hypothesis objects depending on version."""
+    return hyp.text if hasattr(hyp, 'text') else hyp
+
+
+def unpack_hypotheses(hyps):
+    """Some NeMo versions return (best_hyps, all_hyps) tuples."""
+    if isinstance(hyps, tuple):
+        hyps = hyps[0]
+    return [hypothesis_text(h) for h in hyps]
+
+
+def ctc_head(model):
+    """(decoder, decoding) of the CTC head: aux ctc_* on hybrid models, the main ones on CTC models."""
+    if hasattr(model, 'ctc_decoder'):
+        return model.ctc_decoder, model.ctc_decoding
+    return model.decoder, model.decoding
+
+
+def plan_batches(entries, batch_size, max_batch_seconds=None):
+    """
+    Group entry positions into padded batches of similar length.
+
+    Positions are sorted by manifest 'duration', longest first (so an OOM
+    shows up on the first batch, not an hour in), then packed greedily while
+    the batch has at most batch_size entries and its padded audio
+    (longest duration x entries) stays within max_batch_seconds. An entry
+    longer than the budget gets a batch of its own.
+    """
+    order = sorted(range(len(entries)), key=lambda i: entries[i].get('duration') or 0, reverse=True)
+    batches, current = [], []
+    for i in order:
+        if current:
+            longest = entries[current[0]].get('duration') or 0
+            over_budget = max_batch_seconds is not None and longest * (len(current) + 1) > max_batch_seconds
+            if len(current) >= batch_size or over_budget:
+                batches.append(current)
+                current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+# -------------------------
+# Base classes
+# -------------------------
+class Backend:
+    name = None
+    needs_model = True
+    sort_by_duration = False
+
+    def __init__(self, model=None, batch_size=16, **options):
+        self.model = model
+        self.batch_size = batch_size
+        self.options = options
+        # Filled by whoever loaded the model (see models.load_model)
+        self.load_info = None
+        # Pre-decoded waveforms shared across models (see audio_store.py)
+        self.audio_store = None
+        # Cached preprocessor outputs (see feature_cache.py)
+        self.feature_cache = None
+        self.reset_stats()
+
+    def describe(self):
+        """Backend settings recorded in the report 'config' block."""
+        return {'backend': self.name, 'batch_size': self.batch_size, **self.options}
+
+    def transcribe(self, entries):
+        raise NotImplementedError
+
+    def reset_stats(self):
+        """Start fresh stage timers / batching counters (the runner calls this per benchmark)."""
+        self.timer = StageTimer()
+
+    def batching_stats(self):
+        """Batching counters since reset_stats(), for the report's 'performance' block."""
+        return {}
+
+    def backend_stats(self):
+        """Backend-specific counters since reset_stats() (performance['backend'])."""
+        return {}
+
+    def close(self):
+        """Release worker pools / network sessions (no-op for in-process backends)."""
+
+
+class ManualPathBackend(Backend):
+    """
+    Shared preprocessor -> encoder path that bypasses model.transcribe().
+    Subclasses only implement decode(encoded, encoded_len).
+
+    Entries are sorted by duration and packed into padded batches under
+    batch_size and (optionally) max_batch_seconds of padded audio; predictions
+    come back in the order the entries were passed in.
+    """
+    # Lets the runner hand over duration-sorted shards, so batches pack tightly
+    sort_by_duration = True
+
+    def __init__(self, model=None, batch_size=16, max_batch_seconds=None, **options):
+        super().__init__(model, batch_size, max_batch_seconds=max_batch_seconds, **options)
+        self.max_batch_seconds = max_batch_seconds
+
+    def reset_stats(self):
+        super().reset_stats()
+        if self.model is not None and self.device.type == 'cuda':
+            import torch
+            self.timer.sync = torch.cuda.synchronize
+        self.stats = {'batches': 0, 'entries': 0, 'audio_samples': 0, 'padded_samples': 0}
+        if self.feature_cache is not None:
+            self.feature_cache.reset_stats()
+
+    def batching_stats(self):
+        s = self.stats
+        return {
+            'num_batches': s['batches'],
+            'mean_batch_size': round(s['entries'] / s['batches'], 2) if s['batches'] else None,
+            'padding_efficiency': round(s['audio_samples'] / s['padded_samples'], 4) if s['padded_samples'] else None,
+            'audio_seconds': round(s['audio_samples'] / SAMPLE_RATE, 2),
+        }
+
+    def backend_stats(self):
+        return {'feature_cache': dict(self.feature_cache.stats)} if self.feature_cache is not None else {}
+
+    def close(self):
+        if self.feature_cache is not None:
+            self.feature_cache.flush()
+
+    @property
+    def device(self):
+        return next(self.model.parameters()).device
+
+    def count_batch(self, sample_counts):
+        self.stats['batches'] += 1
+        self.stats['entries'] += len(sample_counts)
+        self.stats['audio_samples'] += sum(sample_counts)
+        self.stats['padded_samples'] += max(sample_counts) * len(sample_counts)
+
+    def collate(self, entries):
+        """Load a batch's audio, zero-padded: [B, T] signals + lengths on the model's device."""
+        import torch
+
+        with self.timer.stage('audio_load'):
+            audios = [self.read_audio(e) for e in entries]
+        lengths = [len(a) for a in audios]
+        padded = torch.zeros(len(audios), max(lengths), dtype=torch.float32)
+        for i, audio in enumerate(audios):
+            padded[i, :len(audio)] = torch.from_numpy(audio)
+        return padded.to(self.device), torch.tensor(lengths, dtype=torch.long, device=self.device)
+
+    def read_audio(self, entry):
+        path = entry['audio_filepath']
+        if self.audio_store is not None and path in self.audio_store:
+            return self.audio_store.get(path)
+        return load_audio(path)
+
+    def collate_features(self, features):
+        """Pad per-utterance [features, frames] tensors into the preprocessor's [B, features, T] layout."""
+        import torch
+
+        lengths = [f.shape[1] for f in features]
+        padded = torch.zeros(len(features), features[0].shape[0], max(lengths), dtype=torch.float32,
+                             device=self.device)
+        for i, f in enumerate(features):
+            padded[i, :, :f.shape[1]] = f
+        return padded, torch.tensor(lengths, dtype=torch.long, device=self.device)
+
+    def encode_entries(self, entries):
+        """
+        Encoder output for one batch. With a feature cache, cached utterances skip
+        audio loading and the preprocessor; only the misses are preprocessed (and cached).
+        """
+        import torch
+
+        cached = [None] * len(entries)
+        if self.feature_cache is not None:
+            with self.timer.stage('feature_cache'):
+                cached = self.feature_cache.get_batch([e['audio_filepath'] for e in entries])
+        misses = [i for i, found in enumerate(cached) if found is None]
+        if len(misses) == len(entries):
+            audio, audio_len = self.collate(entries)
+            self.count_batch(audio_len.tolist())
+            return self.encode(audio, audio_len, entries)
+
+        features = [None if found is None else torch.from_numpy(found[0].T) for found in cached]
+        samples = [None if found is None else found[1] for found in cached]
+        if misses:
+            missed = [entries[i] for i in misses]
+            audio, audio_len = self.collate(missed)
+            processed, processed_len = self.preprocess(audio, audio_len, missed)
+            for j, (i, frames, num_samples) in enumerate(zip(misses, processed_len.tolist(), audio_len.tolist())):
+                features[i], samples[i] = processed[j, :, :frames], num_samples
+        self.count_batch(samples)
+        with self.timer.stage('feature_cache'):
+            processed, processed_len = self.collate_features(features)
+        with self.timer.stage('encoder'):
+            return self.model.encoder(audio_signal=self.encoder_input(processed), length=processed_len)
+
+    def preprocess(self, audio, audio_len, entries=None):
+        """Preprocessor features of a padded batch; with a feature cache and entries, queued for caching."""
+        with self.timer.stage('feature'):
+            processed, processed_len = self.model.preprocessor(
+                input_signal=audio,
+                length=audio_len,
+            )
+        if self.feature_cache is not None and entries is not None:
+            with self.timer.stage('feature_cache'):
+                features = processed.float().cpu().numpy()
+                for entry, f, frames, samples in zip(entries, features, processed_len.tolist(), audio_len.tolist()):
+                    self.feature_cache.put(entry['audio_filepath'], f[:, :frames].T, samples)
+        return processed, processed_len
+
+    def encode(self, audio, audio_len, entries=None):
+        processed, processed_len = self.preprocess(audio, audio_len, entries)
+        with self.timer.stage('encoder'):
+            return self.model.encoder(
+                audio_signal=self.encoder_input(processed),
+                length=processed_len,
+            )
+
+    def encoder_input(self, processed):
+        """Features in the encoder's dtype: half-precision exports keep the preprocessor in fp32."""
+        dtype = next(self.model.encoder.parameters()).dtype
+        return processed if processed.dtype == dtype else processed.to(dtype)
+
+    def decode(self, encoded, encoded_len):
+        raise NotImplementedError
+
+    def transcribe(self, entries):
+        import torch
+
+        predictions = [None] * len(entries)
+        with torch.no_grad():
+            for positions in plan_batches(entries, self.batch_size, self.max_batch_seconds):
+                encoded, encoded_len = self.encode_entries([entries[i] for i in positions])
+                with self.timer.stage('decoder'):
+                    batch_predictions = self.decode(encoded, encoded_len)
+                for i, prediction in zip(positions, batch_predictions):
+                    predictions[i] = prediction
+        if self.feature_cache is not None:
+            with self.timer.stage('feature_cache'):
+                self.feature_cache.flush()
+        return predictions
+
+
+# -------------------------
+# Model backends
+# -------------------------
+class TranscribeBackend(Backend):
+    """NeMo model.transcribe(); supports AI4Bharat cur_decoder / language_id."""
+    name = "transcribe"
+
+    def __init__(self, model=None, batch_size=16, decoder=None, lang_id=None, **options):
+        super().__init__(model, batch_size, decoder=decoder, lang_id=lang_id, **options)
+        self.lang_id = lang_id
+        # Set AI4Bharat specific decoder
+        if decoder and hasattr(model, 'cur_decoder'):
+            model.cur_decoder = decoder
+            print(f"   ℹ️  Decoder set to: {model.cur_decoder}")
+
+    def transcribe(self, entries):
+        kwargs = {'batch_size': self.batch_size}
+        if self.lang_id:
+            kwargs['language_id'] = self.lang_id
+        # Pass audio_files as POSITIONAL argument (no keyword)
+        with self.timer.stage('transcribe'):
+            predictions = self.model.transcribe([e['audio_filepath'] for e in entries], **kwargs)
+        return unpack_hypotheses(predictions)
+
+
+class RNNTBackend(ManualPathBackend):
+    name = "rnnt"
+
+    def decode(self, encoded, encoded_len):
+        hyps = self.model.decoding.rnnt_decoder_predictions_tensor(
+            encoder_output=encoded,
+            encoded_lengths=encoded_len,
+            return_hypotheses=True,
+        )
+        return unpack_hypotheses(hyps)
+
+
+class CTCBackend(ManualPathBackend):
+    name = "ctc"
+
+    def decode(self, encoded, encoded_len):
+        decoder, decoding = ctc_head(self.model)
+        log_probs = decoder(encoder_output=encoded)
+        hyps = decoding.ctc_decoder_predictions_tensor(
+            log_probs,
+            decoder_lengths=encoded_len,
+            return_hypotheses=True,
+        )
+        return unpack_hypotheses(hyps)
+
+
+class CTCKenLMBackend(ManualPathBackend):
+    """
+    CTC head + pyctcdecode beam search with a KenLM model.
+
+    With lm_workers > 0 the beam search runs in a process pool (see
+    lm_decode.py): log-probs of each batch are handed to the pool and the
+    encoder moves on to the next batch while they are decoded.
+    lm_workers=0 decodes in this process.
+    """
+    name = "ctc_kenlm"
+
+    def __init__(self, model=None, batch_size=16, kenlm_model_path=None,
+                 alpha=0.6, beta=1.5, beam_width=128, lm_workers=None, model_path=None, **options):
+        from evaluation.benchmarking.engine import lm_decode
+        from evaluation.benchmarking.engine.decoder_vocab import load_decoder_vocab
+
+        if lm_workers is None:
+            lm_workers = lm_decode.default_lm_workers()
+        super().__init__(model, batch_size, kenlm_model_path=kenlm_model_path,
+                         alpha=alpha, beta=beta, beam_width=beam_width, lm_workers=lm_workers, **options)
+        if not kenlm_model_path:
+            raise ValueError("ctc_kenlm backend needs --kenlm-model-path")
+
+        print(f"🧠 Loading KenLM: {kenlm_model_path}")
+        # Cached per .nemo hash when the path is known (see decoder_vocab.py)
+        vocab = load_decoder_vocab(model_path, model)['vocab']
+        self.beam_width = beam_width
+        if lm_workers:
+            print(f"   ⚙️  Beam search in {lm_workers} worker processes")
+            self.decoder = None
+            self.pool = lm_decode.ParallelCTCDecoder(vocab, kenlm_model_path, alpha=alpha, beta=beta,
+                                                     beam_width=beam_width, num_workers=lm_workers)
+        else:
+            self.pool = None
+            self.decoder = lm_decode.build_decoder(vocab, kenlm_model_path, alpha, beta)
+
+    def reset_stats(self):
+        super().reset_stats()
+        if getattr(self, 'pool', None) is not None:
+            self.pool.reset_stats()
+
+    def backend_stats(self):
+        stats = super().backend_stats()
+        if self.pool is not None:
+            stats['lm_decode'] = self.pool.stats()
+        return stats
+
+    def close(self):
+        super().close()
+        if self.pool is not None:
+            self.pool.close()
+
+    def decode(self, encoded, encoded_len):
+        log_probs = ctc_head(self.model)[0](encoder_output=encoded).float().cpu().numpy()
+        predictions = []
+        for j in range(log_probs.shape[0]):
+            valid_time = int(encoded_len[j].item())
+            if self.pool is not None:
+                # A Future; resolved in transcribe() once the whole list is encoded
+                predictions.append(self.pool.submit(log_probs[j][:valid_time]))
+            else:
+                predictions.append(self.decoder.decode(log_probs[j][:valid_time], beam_width=self.beam_width))
+        return predictions
+
+    def transcribe(self, entries):
+        predictions = super().transcribe(entries)
+        if self.pool is None:
+            return predictions
+        with self.timer.stage('lm_decode_wait'):
+            return [self.pool.result(future) for future in predictions]
+
+
+# -------------------------
+# External API backend
+# -------------------------
+class SarvamAPIBackend(Backend):
+    """
+    Sarvam speech-to-text over HTTP via the async client in sarvam_client.py:
+    one keep-alive session for the whole run, max_workers requests in
+    flight, optional rate limit, retries with backoff and a response cache.
+    """
+    name = "api"
+    needs_model = False
+
+    def __init__(self, model=None, batch_size=16, api_key=None, api_model="saarika:v2.5",
+                 language_code="kn-IN", max_workers=5, api_url=None, rate_limit=None, max_retries=5,
+                 response_cache=True, **options):
+        from evaluation.benchmarking.engine.sarvam_client import SARVAM_URL, SarvamClient
+
+        api_url = api_url or os.getenv('SARVAM_API_URL') or SARVAM_URL
+        super().__init__(None, batch_size, api_model=api_model, language_code=language_code,
+                         max_workers=max_workers, api_url=api_url, rate_limit=rate_limit,
+                         max_retries=max_retries, response_cache=response_cache, **options)
+        if not api_key:
+            raise ValueError("API key required. Provide via --api-key or SARVAM_API_KEY env var")
+        self.api_model = api_model
+        self.language_code = language_code
+        self.client = SarvamClient(api_key, model=api_model, language_code=language_code, url=api_url,
+                                   concurrency=max_workers, rate_limit=rate_limit, max_retries=max_retries,
+                                   cache=response_cache)
+
+    def reset_stats(self):
+        super().reset_stats()
+        if getattr(self, 'client', None) is not None:
+            self.client.reset_stats()
+
+    def backend_stats(self):
+        return {'api': self.client.stats()}
+
+    def transcribe(self, entries):
+        with self.timer.stage('api'):
+            return self.client.transcribe_files([entry['audio_filepath'] for entry in entries])
+
+    def close(self):
+        self.client.close()
+
+
+class HybridBackend(ManualPathBackend):
+    """
+    One encoder pass, several decoders (hybrid RNNT/CTC models).
+
+    Each batch is encoded once and the same encoder output is decoded by
+    every head in `decoders` (rnnt, ctc, ctc_kenlm), so comparing heads costs
+    one encoder run instead of one per head. Predictions are dicts
+    {decoder: text}; hybrid.py splits them into per-decoder runs and reports.
+    Time per head is kept apart from the shared stages, in
+    backend_stats()['decoders'].
+    """
+    name = "hybrid"
+    HEADS = {'rnnt': RNNTBackend, 'ctc': CTCBackend, 'ctc_kenlm': CTCKenLMBackend}
+
+    def __init__(self, model=None, batch_size=16, decoders=('rnnt', 'ctc'), max_batch_seconds=None, **options):
+        unknown = [d for d in decoders if d not in self.HEADS]
+        if unknown or not decoders:
+            raise ValueError(f"hybrid decoders must be a subset of {sorted(self.HEADS)}, got {list(decoders)}")
+        # ctc_kenlm options (kenlm_model_path, alpha, ...) only reach that head
+        self.heads = {d: self.HEADS[d](model, batch_size, **(options if d == 'ctc_kenlm' else {}))
+                      for d in decoders}
+        super().__init__(model, batch_size, max_batch_seconds=max_batch_seconds, decoders=list(decoders), **options)
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.decoder_timer = StageTimer(sync=self.timer.sync)
+        for head in getattr(self, 'heads', {}).values():
+            head.reset_stats()
+
+    def backend_stats(self):
+        stats = super().backend_stats()
+        stats['decoders'] = self.decoder_timer.as_dict()
+        for head in self.heads.values():
+            stats.update(head.backend_stats())
+        return stats
+
+    def close(self):
+        super().close()
+        for head in self.heads.values():
+            head.close()
+
+    def decode(self, encoded, encoded_len):
+        outputs = {}
+        for name, head in self.heads.items():
+            with self.decoder_timer.stage(name):
+                outputs[name] = head.decode(encoded, encoded_len)
+        return [dict(zip(outputs, texts)) for texts in zip(*outputs.values())]
+
+    def transcribe(self, entries):
+        predictions = super().transcribe(entries)
+        head = self.heads.get('ctc_kenlm')
+        if head is None or head.pool is None:
+            return predictions
+        # Beam search futures, resolved once the whole list is encoded
+        with self.timer.stage('lm_decode_wait'), self.decoder_timer.stage('ctc_kenlm'):
+            for p in predictions:
+                p['ctc_kenlm'] = head.pool.result(p['ctc_kenlm'])
+        return predictions
+
+
+BACKENDS = {
+    cls.name: cls
+    for cls in [TranscribeBackend, RNNTBackend, CTCBackend, CTCKenLMBackend, HybridBackend, SarvamAPIBackend]
+}
+
+
+def build_backend(name, model=None, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose from: {sorted(BACKENDS)}")
+    return BACKENDS[name](model=model, **options)
@@ -0,0 +1,110 @@
+"""
+On-disk cache helpers shared by the engine.
+
+Everything lives under $ASR_CACHE_DIR (default ~/.cache/asr-finetuning).
+Artifacts are keyed by the content hash of the file they were derived from,
+so renaming or copying a .nemo keeps its cache entries valid and retraining
+into the same path invalidates them.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+CACHE_ROOT = os.environ.get("ASR_CACHE_DIR", os.path.expanduser("~/.cache/asr-finetuning"))
+HASH_CHUNK = 8 * 1024 * 1024
+
+
+def cache_dir(*parts):
+    path = os.path.join(CACHE_ROOT, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path, obj):
+    """Write JSON via a temp file + rename so readers never see half a file."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def entry_complete(path):
+    """A cache entry dir is complete once its meta.json exists (always written last)."""
+    return read_json(os.path.join(path, 'meta.json')) is not None
+
+
+def publish_dir(tmp_path, path, complete=entry_complete):
+    """
+    Rename a finished per-process temp dir into place as cache entry `path`.
+
+    Processes filling the same entry at once each build their own temp dir;
+    the first rename wins and the others drop theirs. An existing entry that
+    isn't complete (crashed writer, older format) is replaced. Returns True
+    if this process's dir was published.
+    """
+    try:
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        pass
+    if not complete(path):
+        # Nobody reads an incomplete entry, so it is safe to remove
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            pass
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    return False
+
+
+def file_sha256(path):
+    """
+    sha256 of a file's contents.
+
+    Hashing a multi-GB .nemo takes seconds, so results are memoized in
+    file_hashes.json keyed by (absolute path, size, mtime).
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    index_path = os.path.join(cache_dir(), 'file_hashes.json')
+    index = read_json(index_path, {})
+    known = index.get(path)
+    if known and known['size'] == st.st_size and known['mtime_ns'] == st.st_mtime_ns:
+        return known['sha256']
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    index = read_json(index_path, {})
+    index[path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+    write_json_atomic(index_path, index)
+    return digest
+
+
+def nemo_version():
+    """Installed NeMo version, read from package metadata (no heavy import)."""
+    from importlib import metadata
+
+    for dist in ("nemo_toolkit", "nemo-toolkit"):
+        try:
+            return metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            continue
+    return "unknown"
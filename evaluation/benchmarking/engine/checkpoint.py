@@ -0,0 +1,80 @@
+"""
+Durable per-benchmark run log, so a crashed run can resume.
+
+Results are appended shard by shard to <predictions>.log.jsonl, one row per
+manifest entry, and fsync'd before the next shard starts. The first line is a
+header describing the manifest + backend; a log written with different
+settings is discarded instead of resumed.
+
+Next to it, <predictions>.progress.json holds the running WER/CER over the
+entries finished so far, so partial metrics can be read while a run is going:
+
+    cat models/results_x/kn_clean_read/predictions.progress.json
+"""
+
+import os
+import json
+from datetime import datetime
+
+from evaluation.benchmarking.engine.cache import write_json_atomic
+from evaluation.benchmarking.engine.predictions_io import strip_suffixes
+
+
+def entry_key(entry):
+    """Stable identity of a manifest entry within one manifest."""
+    return f"{entry['index']}:{entry['audio_filepath']}"
+
+
+def log_paths(predictions_path):
+    stem = strip_suffixes(predictions_path)
+    return f"{stem}.log.jsonl", f"{stem}.progress.json"
+
+
+class RunLog:
+    def __init__(self, predictions_path, header, resume=True):
+        self.path, self.progress_path = log_paths(predictions_path)
+        # Round-trip through JSON so it compares equal to the header read back from disk
+        self.header = json.loads(json.dumps(header, ensure_ascii=False))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.done = self.load() if resume else {}
+        if not self.done:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'_header': header}, ensure_ascii=False) + '\n')
+
+    def load(self):
+        """Return {key: row} for entries that finished without error."""
+        if not os.path.exists(self.path):
+            return {}
+        done = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash
+                if i == 0:
+                    if row.get('_header') != self.header:
+                        print("   ⚠️  Existing run log was written with different settings; starting fresh")
+                        return {}
+                    continue
+                if row.get('error'):
+                    done.pop(row['key'], None)  # failed entries are retried on resume
+                else:
+                    done[row['key']] = row
+        return done
+
+    def append(self, rows):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_progress(self, running, total, failed):
+        write_json_atomic(self.progress_path, {
+            'updated': datetime.now().isoformat(),
+            'done': running.num_samples,
+            'total': total,
+            'failed': failed,
+            **running.as_dict(),
+        })
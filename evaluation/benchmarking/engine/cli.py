@@ -0,0 +1,163 @@
+"""
+Shared argparse options so every runner exposes the same backend flags.
+"""
+
+import os
+import argparse
+
+from evaluation.benchmarking.engine.autotune import load_tuned_config
+from evaluation.benchmarking.engine.backends import BACKENDS, ManualPathBackend, build_backend
+from evaluation.benchmarking.engine.feature_cache import FeatureCache
+from evaluation.benchmarking.engine.models import load_model
+from evaluation.benchmarking.engine.slices import DEFAULT_SLICE_FIELDS
+
+
+def add_backend_args(parser, default_backend="transcribe", default_batch_size=16, default_robust_load=False):
+    parser.add_argument("--backend", type=str, default=default_backend, choices=sorted(BACKENDS),
+                        help="Inference backend")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"Batch size (default: the autotuned one, else {default_batch_size})")
+    parser.add_argument("--max-batch-seconds", type=float, default=None,
+                        help="rnnt/ctc/ctc_kenlm: cap on padded audio seconds per batch (longest x batch size)")
+    parser.add_argument("--autotune", action=argparse.BooleanOptionalAction, default=True,
+                        help="Take batch / worker / thread settings not given explicitly from the config "
+                             "run/run_autotune.py recommended for this model, backend and hardware")
+    parser.set_defaults(default_batch_size=default_batch_size)
+    parser.add_argument("--feature-cache", action=argparse.BooleanOptionalAction, default=False,
+                        help="rnnt/ctc/ctc_kenlm: reuse cached log-mel features (keyed by preprocessor config)")
+    parser.add_argument("--robust-load", action=argparse.BooleanOptionalAction, default=default_robust_load,
+                        help="Self-healing model load (extract, sanitize tokenizer paths, prune bad keys)")
+    parser.add_argument("--heal-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="Reuse the cached healed config for --robust-load (keyed by .nemo hash + NeMo version)")
+    parser.add_argument("--weight-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="Load from / populate the memory-mapped weight cache (keyed by .nemo hash)")
+    parser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=True,
+                        help="Resume from the run log of an interrupted run in the same output dir")
+    parser.add_argument("--predictions-ext", type=str, default=".jsonl",
+                        choices=[".jsonl", ".jsonl.gz", ".jsonl.zst", ".json"],
+                        help="Predictions file format (.json = legacy array)")
+    parser.add_argument("--limit", type=int, default=None, help="Only run the first N entries per manifest")
+    parser.add_argument("--subset-fraction", type=float, default=None,
+                        help="Only run the first fraction of each manifest (e.g. 0.25)")
+    parser.add_argument("--slice-by", type=str, nargs="*", default=list(DEFAULT_SLICE_FIELDS),
+                        help="Manifest fields to break WER/CER down by in the report; "
+                             "'a+b' crosses two fields, none disables slicing")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile inference (torch profiler + Python stack sampling) into "
+                             "<output-dir>/<benchmark>/profile/: Chrome traces, folded stacks, top ops")
+    parser.add_argument("--profile-seconds", type=float, default=60.0,
+                        help="--profile: stop profiling after this much profiled time per benchmark")
+    parser.add_argument("--profile-fraction", type=float, default=1.0,
+                        help="--profile: max share of wall time spent profiled (e.g. 0.05 = every ~20th shard)")
+    # transcribe (AI4Bharat)
+    parser.add_argument("--decoder", type=str, default=None, choices=["rnnt", "ctc"],
+                        help="AI4Bharat cur_decoder for the transcribe backend")
+    parser.add_argument("--lang-id", type=str, default=None, help="Language ID for the transcribe backend")
+    # ctc_kenlm
+    parser.add_argument("--kenlm-model-path", type=str, default=None, help="KenLM .arpa/.bin for ctc_kenlm")
+    parser.add_argument("--beam-width", type=int, default=128)
+    parser.add_argument("--alpha", type=float, default=0.6)
+    parser.add_argument("--beta", type=float, default=1.5)
+    parser.add_argument("--lm-workers", type=int, default=None,
+                        help="ctc_kenlm beam-search worker processes (default: CPU count - 1; 0 = in-process)")
+    # hybrid
+    parser.add_argument("--decoders", type=str, nargs="+", default=["rnnt", "ctc"],
+                        choices=["rnnt", "ctc", "ctc_kenlm"],
+                        help="hybrid: heads decoding the same encoder output (ctc_kenlm uses the KenLM flags)")
+    # api
+    parser.add_argument("--api-key", type=str, default=None, help="Sarvam API key (or SARVAM_API_KEY env var)")
+    parser.add_argument("--api-model", type=str, default="saarika:v2.5", help="Sarvam model to use")
+    parser.add_argument("--language-code", type=str, default="kn-IN", help="Language code (e.g., kn-IN)")
+    parser.add_argument("--max-workers", type=int, default=5, help="Concurrent API requests")
+    parser.add_argument("--api-url", type=str, default=None,
+                        help="Speech-to-text endpoint (default: $SARVAM_API_URL or the Sarvam API)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Max API requests per second")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx/connection errors")
+    parser.add_argument("--response-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="Reuse cached API responses (keyed by audio hash + model + language)")
+    return parser
+
+
+def apply_tuned_config(args):
+    """
+    Fill batch_size, max_batch_seconds, workers and threads_per_worker where
+    they weren't given on the command line: from the autotuned config for
+    this model + backend + hardware (see autotune.py) if there is one, else
+    the usual defaults. Safe to call more than once.
+    """
+    if getattr(args, 'tuned_config', None) is not None:
+        return args
+    tuned = None
+    if args.autotune and BACKENDS[args.backend].needs_model and args.model and os.path.exists(args.model):
+        tuned = load_tuned_config(args.model, args.backend)
+    recommended = (tuned or {}).get('recommended') or {}
+    if tuned:
+        print(f"   🔧 Autotuned config for this model + hardware: {recommended}")
+    args.tuned_config = recommended
+    if args.batch_size is None:
+        args.batch_size = recommended.get('batch_size') or args.default_batch_size
+    if args.max_batch_seconds is None:
+        args.max_batch_seconds = recommended.get('max_batch_seconds')
+    if getattr(args, 'workers', 1) is None:
+        args.workers = recommended.get('workers') or 1
+    if hasattr(args, 'threads_per_worker') and args.threads_per_worker is None:
+        args.threads_per_worker = recommended.get('threads_per_worker')
+    return args
+
+
+def backend_args(backend, model, default_batch_size=16, **values):
+    """
+    add_backend_args' defaults for `backend` + `model`, overridden by `values`:
+    lets runners with their own flags go through backend_from_args (and the
+    autotuned config) like run_benchmark.py does. batch_size etc. left None
+    are filled by apply_tuned_config.
+    """
+    parser = add_backend_args(argparse.ArgumentParser(), default_backend=backend,
+                              default_batch_size=default_batch_size)
+    args = parser.parse_args([])
+    args.model = model
+    for name, value in values.items():
+        setattr(args, name, value)
+    return args
+
+
+def profile_options(args):
+    """Profiler options for runner.run_benchmark(profile=...), None unless --profile."""
+    if not getattr(args, 'profile', False):
+        return None
+    return {'max_seconds': args.profile_seconds, 'max_fraction': args.profile_fraction}
+
+
+def backend_options(args):
+    """Pick the options relevant to args.backend out of the parsed args."""
+    options = {'batch_size': args.batch_size}
+    if args.backend in ("rnnt", "ctc", "ctc_kenlm", "hybrid"):
+        options['max_batch_seconds'] = args.max_batch_seconds
+    if args.backend == "hybrid":
+        options['decoders'] = list(dict.fromkeys(args.decoders))
+    if args.backend == "transcribe":
+        options.update(decoder=args.decoder, lang_id=args.lang_id)
+    elif args.backend == "ctc_kenlm" or (args.backend == "hybrid" and "ctc_kenlm" in args.decoders):
+        options.update(kenlm_model_path=args.kenlm_model_path, beam_width=args.beam_width,
+                       alpha=args.alpha, beta=args.beta, lm_workers=args.lm_workers, model_path=args.model)
+    elif args.backend == "api":
+        options.update(api_key=args.api_key or os.getenv('SARVAM_API_KEY'), api_model=args.api_model,
+                       language_code=args.language_code, max_workers=args.max_workers, api_url=args.api_url,
+                       rate_limit=args.rate_limit, max_retries=args.max_retries,
+                       response_cache=args.response_cache)
+    return options
+
+
+def backend_from_args(args):
+    """Load the model (once) if the backend needs one, then build the backend."""
+    apply_tuned_config(args)
+    model, load_info = None, None
+    if BACKENDS[args.backend].needs_model:
+        model, load_info = load_model(args.model, robust=args.robust_load, use_cache=args.heal_cache,
+                                      weight_cache=args.weight_cache)
+    backend = build_backend(args.backend, model=model, **backend_options(args))
+    backend.load_info = load_info
+    if args.feature_cache and isinstance(backend, ManualPathBackend):
+        backend.feature_cache = FeatureCache.for_model(model)
+        print(f"   🗃️  Feature cache: {backend.feature_cache.path} ({len(backend.feature_cache)} utterances)")
+    return backend
@@ -0,0 +1,274 @@
+"""
+Cold-start benchmark: what it costs to go from a fresh Python process to a
+first transcription, per checkpoint and per phase.
+
+Every run happens in its own spawned interpreter (nothing imported, no CUDA
+context), so each run is a true cold start apart from the OS page cache.
+Phases, in the order they happen:
+
+    import_torch        import torch
+    import_nemo_asr     import nemo.collections.asr (on top of torch)
+    extract             unpacking the .nemo tar (NeMo's SaveRestoreConnector)
+    config_instantiate  building the model from its config: modules, tokenizer,
+                        decoding (restore_from minus the other restore phases)
+    state_dict_read     torch.load of the weights from the extracted archive
+    state_dict_load     model.load_state_dict
+    eval_freeze         model.eval() + model.freeze()
+    device_transfer     model.to(device) (+ CUDA sync)
+    first_inference     preprocessor -> encoder -> greedy decode of a fixed
+                        clip, the first time (lazy init, cuDNN autotune, ...)
+    warm_inference      the same clip again, for comparison
+
+restore_from runs on CPU (map_location='cpu') so device_transfer is measured
+on its own; restore_total and total (all phases) are reported as well.
+
+The report (run/run_coldstart.py --output) is stable JSON meant to be diffed
+across commits / NeMo upgrades:
+
+{
+  "schema_version": 1,
+  "timestamp": "...",
+  "environment": {"python": "3.10.12", "torch": "2.1.0", "nemo": "1.23.0",
+                  "device": "cuda", "gpu": "NVIDIA A100-SXM4-80GB", "cpu_count": 32},
+  "settings": {"repeats": 3, "backend": "rnnt", "clip_seconds": 5.0, "robust": true},
+  "checkpoints": [
+    {"name": "100m_v3", "model": "...nemo", "model_sha256": "...", "size_mb": 458.2,
+     "status": "completed",
+     "phases": {"import_torch": {"median": 1.92, "min": 1.88, "max": 2.31}, ...},
+     "runs": [{"import_torch": 1.92, ..., "process_seconds": 31.4}, ...]}
+  ]
+}
+
+compare_reports() flags phases whose median grew by more than a threshold.
+"""
+
+import os
+import sys
+import time
+import platform
+import statistics
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from evaluation.benchmarking.engine.cache import file_sha256, nemo_version
+from evaluation.benchmarking.engine.data import SAMPLE_RATE
+from evaluation.benchmarking.engine.perf import StageTimer
+
+COLDSTART_SCHEMA_VERSION = 1
+PHASES = ('import_torch', 'import_nemo_asr', 'extract', 'config_instantiate', 'state_dict_read',
+          'state_dict_load', 'eval_freeze', 'device_transfer', 'first_inference', 'warm_inference')
+RESTORE_PHASES = ('extract', 'config_instantiate', 'state_dict_read', 'state_dict_load')
+DEFAULT_CLIP_SECONDS = 5.0
+
+
+def timed_connector(timer):
+    """A SaveRestoreConnector that bills restore_from's internal steps to timer stages."""
+    from nemo.core.connectors.save_restore_connector import SaveRestoreConnector
+
+    class TimedSaveRestoreConnector(SaveRestoreConnector):
+        # These are static methods in NeMo, called through self; overriding
+        # them per instance keeps restore_from itself untouched
+        def _unpack_nemo_file(self, *args, **kwargs):
+            with timer.stage('extract'):
+                return SaveRestoreConnector._unpack_nemo_file(*args, **kwargs)
+
+        def _load_state_dict_from_disk(self, *args, **kwargs):
+            with timer.stage('state_dict_read'):
+                return SaveRestoreConnector._load_state_dict_from_disk(*args, **kwargs)
+
+        def load_instance_with_state_dict(self, *args, **kwargs):
+            with timer.stage('state_dict_load'):
+                return super().load_instance_with_state_dict(*args, **kwargs)
+
+    return TimedSaveRestoreConnector()
+
+
+def clip(seconds=DEFAULT_CLIP_SECONDS, audio_path=None):
+    """The audio every run transcribes: a real file, or seeded low-level noise (same every run)."""
+    import numpy as np
+
+    if audio_path:
+        from evaluation.benchmarking.engine.data import load_audio
+        return load_audio(audio_path)
+    return (np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE)) * 0.01).astype(np.float32)
+
+
+def measure_cold_start(model_path, backend_name='rnnt', device=None, override_config_path=None,
+                       clip_seconds=DEFAULT_CLIP_SECONDS, audio_path=None):
+    """
+    One cold start, in this (fresh) process. Returns {phase: seconds}.
+    Must run before torch / NeMo are imported, or the import phases are meaningless.
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+    with timer.stage('import_torch'):
+        import torch
+    with timer.stage('import_nemo_asr'):
+        import nemo.collections.asr as nemo_asr
+
+    connector = timed_connector(timer)
+    restore_start = time.perf_counter()
+    model = nemo_asr.models.ASRModel.restore_from(restore_path=model_path, override_config_path=override_config_path,
+                                                  map_location=torch.device('cpu'), save_restore_connector=connector)
+    restore_seconds = time.perf_counter() - restore_start
+    # Whatever restore_from spent outside extraction and weights is config -> model construction
+    timer.seconds['config_instantiate'] = max(0.0, restore_seconds - sum(
+        timer.seconds[p] for p in RESTORE_PHASES if p != 'config_instantiate'))
+
+    with timer.stage('eval_freeze'):
+        model.eval()
+        model.freeze()
+    device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+    sync = torch.cuda.synchronize if device.type == 'cuda' else None
+    with timer.stage('device_transfer'):
+        model = model.to(device)
+        if sync:
+            sync()
+
+    from evaluation.benchmarking.engine.backends import build_backend
+    backend = build_backend(backend_name, model=model, batch_size=1)
+    audio = clip(clip_seconds, audio_path)
+    for phase in ('first_inference', 'warm_inference'):
+        timer.sync = sync
+        with timer.stage(phase), torch.no_grad():
+            signal = torch.from_numpy(audio).unsqueeze(0).to(device)
+            length = torch.tensor([len(audio)], dtype=torch.long, device=device)
+            encoded, encoded_len = backend.encode(signal, length)
+            backend.decode(encoded, encoded_len)
+        timer.sync = None
+    backend.close()
+
+    run = {phase: round(timer.seconds.get(phase, 0.0), 4) for phase in PHASES}
+    run['restore_total'] = round(restore_seconds, 4)
+    run['total'] = round(time.perf_counter() - start, 4)
+    run['device'] = device.type
+    run['gpu'] = torch.cuda.get_device_name(device) if device.type == 'cuda' else None
+    return run
+
+
+def _cold_run(model_path, backend_name, device, override_config_path, clip_seconds, audio_path):
+    # Runs in a spawned worker: nothing heavy is imported yet
+    imported = [m for m in ('torch', 'nemo') if m in sys.modules]
+    if imported:
+        raise RuntimeError(f"Not a cold process: {', '.join(imported)} already imported")
+    return measure_cold_start(model_path, backend_name, device, override_config_path, clip_seconds, audio_path)
+
+
+def _prepare_healed_config(model_path):
+    from evaluation.benchmarking.engine.models import load_model_robust
+    _, info = load_model_robust(model_path)
+    return info.get('cache_key')
+
+
+def healed_override_path(model_path):
+    """Override config from the self-healing load cache (models.py), populating it in a throwaway process."""
+    from evaluation.benchmarking.engine.cache import cache_dir
+    from evaluation.benchmarking.engine.models import heal_cache_key
+
+    entry_dir = os.path.join(cache_dir('healed_models'), heal_cache_key(model_path))
+    if not os.path.exists(os.path.join(entry_dir, 'meta.json')):
+        print("   🛠️  No healed config cached yet; healing once (not timed)")
+        in_fresh_process(_prepare_healed_config, model_path)
+    return os.path.join(entry_dir, 'override_config.yaml')
+
+
+def in_fresh_process(fn, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def phase_summary(runs):
+    keys = list(PHASES) + ['restore_total', 'total', 'process_seconds']
+    return {k: {'median': round(statistics.median(r[k] for r in runs), 4),
+                'min': round(min(r[k] for r in runs), 4),
+                'max': round(max(r[k] for r in runs), 4)}
+            for k in keys if all(k in r for r in runs)}
+
+
+def benchmark_checkpoint(spec, repeats=3, backend_name='rnnt', device=None, robust=False,
+                         clip_seconds=DEFAULT_CLIP_SECONDS, audio_path=None):
+    """`repeats` cold starts of one checkpoint, each in a new interpreter."""
+    model_path = spec['model']
+    print(f"\n🧊 Cold start: {spec['name']} ({model_path})")
+    result = {'name': spec['name'], 'model': model_path}
+    try:
+        result.update(model_sha256=file_sha256(model_path), size_mb=round(os.path.getsize(model_path) / 2 ** 20, 1))
+        override = healed_override_path(model_path) if robust else None
+    except Exception as e:
+        print(f"   ❌ {e}")
+        return {**result, 'status': 'failed', 'error': str(e)}
+
+    runs = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        try:
+            run = in_fresh_process(_cold_run, model_path, backend_name, device, override, clip_seconds, audio_path)
+        except Exception as e:
+            print(f"   ❌ Run {i + 1} failed: {e}")
+            return {**result, 'status': 'failed', 'error': str(e), 'runs': runs}
+        run['process_seconds'] = round(time.perf_counter() - start, 4)
+        runs.append(run)
+        print(f"   ⏱️  Run {i + 1}/{repeats}: " + " | ".join(f"{p} {run[p]:.2f}s" for p in PHASES) +
+              f" | total {run['total']:.2f}s")
+    return {**result, 'status': 'completed', 'phases': phase_summary(runs), 'runs': runs}
+
+
+def environment_info(checkpoints):
+    """Versions from package metadata; device + GPU as seen by the runs (torch isn't imported here)."""
+    from importlib import metadata
+
+    try:
+        torch_version = metadata.version('torch')
+    except metadata.PackageNotFoundError:
+        torch_version = None
+    run = next((r for c in checkpoints for r in c.get('runs') or []), {})
+    return {'python': platform.python_version(), 'torch': torch_version, 'nemo': nemo_version(),
+            'device': run.get('device'), 'gpu': run.get('gpu'), 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpu_count': os.cpu_count()}
+
+
+def run_coldstart(specs, repeats=3, backend_name='rnnt', device=None, robust=False,
+                  clip_seconds=DEFAULT_CLIP_SECONDS, audio_path=None):
+    checkpoints = [benchmark_checkpoint(s, repeats, backend_name, device, robust, clip_seconds, audio_path)
+                   for s in specs]
+    return {
+        'schema_version': COLDSTART_SCHEMA_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'environment': environment_info(checkpoints),
+        'settings': {'repeats': repeats, 'backend': backend_name, 'device': device, 'robust': robust,
+                     'clip_seconds': None if audio_path else clip_seconds, 'audio': audio_path},
+        'checkpoints': checkpoints,
+    }
+
+
+def format_coldstart(report):
+    """Median seconds per phase, one row per checkpoint."""
+    columns = list(PHASES) + ['total']
+    lines = [f"{'checkpoint':<20} " + " ".join(f"{c[:12]:>12}" for c in columns)]
+    for c in report['checkpoints']:
+        if c.get('status') != 'completed':
+            lines.append(f"{c['name'][:20]:<20} {c.get('status')}: {c.get('error')}")
+            continue
+        lines.append(f"{c['name'][:20]:<20} " + " ".join(f"{c['phases'][p]['median']:>12.3f}" for p in columns))
+    return '\n'.join(lines) + '\n'
+
+
+def compare_reports(baseline, candidate, threshold=0.10, min_seconds=0.05):
+    """Phases whose median got slower by more than threshold (relative) and min_seconds (absolute)."""
+    base = {c['model_sha256']: c for c in baseline['checkpoints'] if c.get('status') == 'completed'}
+    regressions = []
+    for c in candidate['checkpoints']:
+        b = base.get(c.get('model_sha256'))
+        if c.get('status') != 'completed' or b is None:
+            continue
+        for phase, stats in c['phases'].items():
+            old = (b['phases'].get(phase) or {}).get('median')
+            if old is None:
+                continue
+            delta = stats['median'] - old
+            if delta > min_seconds and delta > threshold * old:
+                regressions.append({'checkpoint': c['name'], 'phase': phase, 'baseline': old,
+                                    'candidate': stats['median'], 'delta': round(delta, 4),
+                                    'relative': round(delta / old, 4) if old else None})
+    return regressions
@@ -0,0 +1,102 @@
+"""
+Benchmark data loading: manifest discovery, validation and audio reading.
+"""
+
+import os
+import json
+
+REQUIRED_FIELDS = ["audio_filepath", "text", "duration"]
+SAMPLE_RATE = 16000
+
+
+def discover_benchmarks(benchmark_dir, benchmark_set):
+    """List every <name>.json manifest in benchmark_dir/benchmark_set."""
+    version_dir = os.path.join(benchmark_dir, benchmark_set)
+    if not os.path.exists(version_dir):
+        print(f"❌ Benchmark set '{benchmark_set}' not found at {version_dir}")
+        return []
+    benchmarks = []
+    for f in sorted(os.listdir(version_dir)):
+        if f.endswith('.json'):
+            benchmarks.append({'name': f.replace('.json', ''), 'manifest': os.path.join(version_dir, f)})
+    return benchmarks
+
+
+def benchmark_from_manifest(manifest_path, name=None):
+    """Wrap a single manifest path in the same dict shape as discover_benchmarks."""
+    if name is None:
+        name = os.path.splitext(os.path.basename(manifest_path))[0]
+    return {'name': name, 'manifest': manifest_path}
+
+
+def validate_manifest(manifest_path):
+    """Check the manifest exists, is non-empty and has the required fields."""
+    if not os.path.exists(manifest_path):
+        return False, "Manifest file not found"
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            first = None
+            count = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                if first is None:
+                    first = json.loads(line)
+                count += 1
+        if first is None:
+            return False, "Manifest is empty"
+        missing = [k for k in REQUIRED_FIELDS if k not in first]
+        if missing:
+            return False, f"Missing fields: {missing}"
+        return True, f"Valid ({count} entries)"
+    except Exception as e:
+        return False, f"Error: {e}"
+
+
+def load_manifest(manifest_path, limit=None, subset_fraction=None, path_remap=None, shard=None):
+    """
+    Load a NeMo JSONL manifest into a list of entry dicts.
+
+    Every entry gets an 'index' (its line position among non-empty lines) so
+    results can always be matched back to the manifest.
+
+    Args:
+        limit: keep only the first N entries
+        subset_fraction: keep only the first fraction of entries (e.g. 0.25)
+        path_remap: {old_prefix: new_prefix} rewrites for audio_filepath
+        shard: (k, n) keeps only shard k of n; entries are dealt out
+               round-robin by duration so every shard gets a similar
+               mix of audio, then returned in manifest order
+    """
+    entries = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry.setdefault('text', "")
+            if path_remap:
+                for old, new in path_remap.items():
+                    if entry['audio_filepath'].startswith(old):
+                        entry['audio_filepath'] = entry['audio_filepath'].replace(old, str(new), 1)
+                        break
+            entry['index'] = len(entries)
+            entries.append(entry)
+
+    if subset_fraction is not None and subset_fraction < 1.0:
+        entries = entries[:int(len(entries) * subset_fraction)]
+    if limit is not None:
+        entries = entries[:limit]
+    if shard is not None:
+        k, n = shard
+        by_duration = sorted(entries, key=lambda e: e.get('duration') or 0, reverse=True)
+        entries = sorted(by_duration[k::n], key=lambda e: e['index'])
+    return entries
+
+
+def load_audio(path, sr=SAMPLE_RATE):
+    """Read and resample an audio file to a mono float32 numpy array."""
+    import librosa
+
+    audio, _ = librosa.load(path, sr=sr)
+    return audio
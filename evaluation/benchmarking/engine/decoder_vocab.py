@@ -0,0 +1,143 @@
+"""
+Decoder vocabulary for CTC + KenLM decoding, extracted once per model.
+
+pyctcdecode needs one label per CTC output: the tokenizer's raw BPE pieces
+(with their '▁' word markers), deduplicated because an AggregateTokenizer
+repeats pieces across its sub-tokenizers, with the blank last (NeMo's CTC
+head puts it at index vocab_size).
+
+extract_decoder_vocab() pulls every piece in one batched ids_to_tokens call
+and checks vocab + blank against the CTC head's output size, so a
+tokenizer/head mismatch fails here instead of as garbage beam-search output.
+load_decoder_vocab() stores the result as a small JSON artifact keyed by the
+.nemo's content hash (see cache.py):
+
+    <cache>/decoder_vocab/<sha256>.json
+        {"format": 1, "model_sha256": ..., "vocab": [...], "blank_id": 4024,
+         "ctc_output_size": 4025, "tokenizer_vocab_size": 4024, "num_duplicates": 3}
+
+so LM decoding tools (the ctc_kenlm backend, the alpha/beta grid search,
+final_eval.py) reuse it rather than walking the tokenizer again.
+"""
+
+import os
+from datetime import datetime
+
+from evaluation.benchmarking.engine.cache import cache_dir, file_sha256, read_json, write_json_atomic
+
+VOCAB_FORMAT = 1
+
+
+def dedup_tokens(tokens):
+    """Rename repeated pieces ('x', 'x_dup1', 'x_dup2', ...) so pyctcdecode doesn't crash."""
+    seen, unique = {}, []
+    for token in tokens:
+        if token in seen:
+            seen[token] += 1
+            unique.append(f"{token}_dup{seen[token]}")
+        else:
+            seen[token] = 0
+            unique.append(token)
+    return unique
+
+
+def raw_tokens(model):
+    """Raw BPE pieces of the model's tokenizer, in id order."""
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is not None and hasattr(tokenizer, 'ids_to_tokens'):
+        vocab_size = tokenizer.vocab_size
+        try:
+            tokens = list(tokenizer.ids_to_tokens(list(range(vocab_size))))
+            if len(tokens) == vocab_size:
+                return tokens
+        except Exception:
+            pass
+        # Some tokenizers reject a batched call (or drop unknown ids); go id by id
+        tokens = []
+        for i in range(vocab_size):
+            try:
+                piece = tokenizer.ids_to_tokens([i])
+                tokens.append(piece[0] if piece else str(i))
+            except Exception:
+                tokens.append(f"<unk_{i}>")
+        return tokens
+    if hasattr(getattr(model, 'decoder', None), 'vocabulary'):
+        return list(model.decoder.vocabulary)
+    raise AttributeError("Could not find vocabulary API.")
+
+
+def ctc_output_size(model):
+    """Number of CTC head outputs (vocab + blank), or None if the model has no CTC head."""
+    head = getattr(model, 'ctc_decoder', None)
+    if head is None and not hasattr(model, 'joint'):
+        # CTC-only models (e.g. a CTC inference export): the main decoder is the CTC head
+        head = getattr(model, 'decoder', None)
+    if head is None:
+        return None
+    for attr in ('num_classes_with_blank', '_num_classes'):
+        size = getattr(head, attr, None)
+        if isinstance(size, int):
+            return size
+    return None
+
+
+def extract_decoder_vocab(model):
+    """Deduplicated vocab + blank position, validated against the CTC head."""
+    tokens = raw_tokens(model)
+    vocab = dedup_tokens(tokens)
+    output_size = ctc_output_size(model)
+    if output_size is not None and output_size != len(vocab) + 1:
+        raise ValueError(f"Tokenizer has {len(vocab)} pieces but the CTC head has {output_size} outputs "
+                         f"(expected vocab + blank = {len(vocab) + 1})")
+    return {
+        'format': VOCAB_FORMAT,
+        'vocab': vocab,
+        'blank_id': len(vocab),
+        'ctc_output_size': output_size,
+        'tokenizer_vocab_size': len(tokens),
+        'num_duplicates': sum(1 for a, b in zip(tokens, vocab) if a != b),
+    }
+
+
+def vocab_artifact_path(model_path):
+    return os.path.join(cache_dir('decoder_vocab'), f"{file_sha256(model_path)}.json")
+
+
+def _valid_artifact(artifact):
+    return (isinstance(artifact, dict) and artifact.get('format') == VOCAB_FORMAT
+            and isinstance(artifact.get('vocab'), list) and artifact.get('blank_id') == len(artifact['vocab']))
+
+
+def load_decoder_vocab(model_path=None, model=None, rebuild=False):
+    """
+    Decoder vocab artifact for a .nemo: read from the cache, or extracted
+    from `model` (already loaded) and cached.
+
+    Without model_path nothing is cached and `model` is required; with
+    model_path but no cached artifact, `model` is required too.
+    """
+    if model_path is None:
+        if model is None:
+            raise ValueError("load_decoder_vocab needs model_path or model")
+        return extract_decoder_vocab(model)
+
+    path = vocab_artifact_path(model_path)
+    artifact = None if rebuild else read_json(path)
+    if artifact is not None and not _valid_artifact(artifact):
+        print(f"   ⚠️  Ignoring invalid decoder vocab artifact: {path}")
+        artifact = None
+    if artifact is not None:
+        output_size = ctc_output_size(model) if model is not None else None
+        if output_size is None or output_size == artifact['ctc_output_size']:
+            print(f"   ♻️  Decoder vocab from cache ({len(artifact['vocab'])} pieces): {path}")
+            return artifact
+        print(f"   ⚠️  Cached decoder vocab doesn't match the CTC head ({output_size} outputs), rebuilding")
+
+    if model is None:
+        raise ValueError(f"No cached decoder vocab for {model_path}; load the model to build it")
+    artifact = {**extract_decoder_vocab(model), 'model_sha256': file_sha256(model_path),
+                'model_path': os.path.abspath(model_path), 'created': datetime.now().isoformat()}
+    write_json_atomic(path, artifact)
+    print(f"   ✅ Decoder vocab: {len(artifact['vocab'])} pieces ({artifact['num_duplicates']} duplicates renamed), "
+          f"blank at {artifact['blank_id']} -> {path}")
+    return artifact
@@ -0,0 +1,275 @@
+"""
+Slim inference artifacts: a .nemo holding only what one decoding path needs.
+
+Training checkpoints carry both heads of a hybrid model, the dataset /
+optimizer / SpecAugment config and whatever else training left in the
+config. export_inference_model() writes a new .nemo with:
+
+    preprocessor + encoder + one head   rnnt: decoder + joint (EncDecRNNT[BPE]Model)
+                                        ctc:  the CTC head as the main decoder
+                                              (EncDecCTCModel[BPE])
+    tokenizer artifacts                 as in the original
+    config                              the loaded (healed, resolved) config minus
+                                        TRAINING_KEYS and the other head
+
+Optionally the encoder and head weights are stored as bf16 / fp16 (the
+preprocessor stays fp32); cfg.inference_dtype records it, and
+models.load_model casts the restored model back down (restore_from builds
+fp32 modules). Backends feed the encoder features in its dtype.
+
+The export is a plain .nemo: ASRModel.restore_from, load_model, the weight
+cache, the backends and inference/asr_server.py load it like any other.
+A CTC export decodes with the ctc / ctc_kenlm backends (backends.ctc_head).
+
+compare_artifacts() loads the original and the export, each in a fresh
+process on the same device, and reports artifact size, load time, RSS added
+by the load (and its peak) and parameter bytes side by side, plus whether
+both transcribe a fixed clip the same. The report is written next to the
+export as <name>.export.json:
+
+{
+  "original": {"path": ..., "size_mb": 458.2, "load_seconds": 21.4, "rss_mb": 1610.3,
+               "peak_rss_mb": 2244.9, "parameters": 114720000, "parameter_mb": 437.6, "text": "..."},
+  "slim": {...},
+  "reduction": {"size_mb": 0.52, "load_seconds": 0.31, "rss_mb": 0.47, ...},
+  "same_output": true,
+  "export": {"head": "rnnt", "dtype": "bf16", "model_class": ..., "dropped_config_keys": [...], ...}
+}
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import importlib
+from datetime import datetime
+
+from evaluation.benchmarking.engine.cache import file_sha256, nemo_version
+from evaluation.benchmarking.engine.models import CAST_MODULES, INFERENCE_DTYPES
+
+EXPORT_VERSION = 1
+DTYPES = ('fp32',) + tuple(INFERENCE_DTYPES)
+TRAINING_KEYS = ('train_ds', 'validation_ds', 'test_ds', 'optim', 'spec_augment')
+# Top-level modules (state dict prefixes) each head keeps
+HEAD_MODULES = {
+    'rnnt': ('preprocessor', 'encoder', 'decoder', 'joint'),
+    'ctc': ('preprocessor', 'encoder', 'decoder'),
+}
+# (head, has tokenizer) -> class the export restores as
+TARGET_CLASSES = {
+    ('rnnt', True): 'nemo.collections.asr.models.EncDecRNNTBPEModel',
+    ('rnnt', False): 'nemo.collections.asr.models.EncDecRNNTModel',
+    ('ctc', True): 'nemo.collections.asr.models.EncDecCTCModelBPE',
+    ('ctc', False): 'nemo.collections.asr.models.EncDecCTCModel',
+}
+COMPARED = ('size_mb', 'load_seconds', 'rss_mb', 'peak_rss_mb', 'parameter_mb')
+
+
+def model_heads(model):
+    """Heads a loaded model can export: hybrid models have both."""
+    heads = []
+    if hasattr(model, 'joint'):
+        heads.append('rnnt')
+    if hasattr(model, 'ctc_decoder') or not hasattr(model, 'joint'):
+        heads.append('ctc')
+    return heads
+
+
+def slim_config(config, head, hybrid, dtype='fp32'):
+    """Inference config for one head: no training keys, the other head's config dropped."""
+    slim = {k: v for k, v in config.items() if k not in TRAINING_KEYS and k != 'aux_ctc'}
+    if head == 'ctc':
+        if hybrid:
+            aux = config['aux_ctc']
+            slim['decoder'] = aux['decoder']
+            slim['decoding'] = aux['decoding']
+            if 'ctc_reduction' in aux:
+                slim['ctc_reduction'] = aux['ctc_reduction']
+        for key in ('joint', 'loss'):
+            slim.pop(key, None)
+    if dtype != 'fp32':
+        slim['inference_dtype'] = dtype
+    return slim
+
+
+def slim_state_dict(state, head, hybrid):
+    """State dict of the kept modules; a hybrid model's ctc_decoder.* becomes decoder.*."""
+    keep = HEAD_MODULES[head]
+    slim = {}
+    for key, tensor in state.items():
+        module, _, rest = key.partition('.')
+        if head == 'ctc' and hybrid:
+            if module == 'ctc_decoder':
+                key, module = f"decoder.{rest}", 'decoder'
+            elif module == 'decoder':
+                continue
+        if module in keep:
+            slim[key] = tensor
+    return slim
+
+
+def _instantiate(class_path, config_path, folder):
+    from omegaconf import OmegaConf
+    from nemo.core.classes.modelPT import ModelPT
+
+    module_name, class_name = class_path.rsplit('.', 1)
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    cfg = OmegaConf.load(config_path)
+    # As restore_from does: no dataloader setup, tokenizer artifacts from `folder`
+    ModelPT._set_model_restore_state(is_being_restored=True, folder=folder)
+    try:
+        return model_class.from_config_dict(cfg)
+    finally:
+        ModelPT._set_model_restore_state(is_being_restored=False)
+
+
+def _parameter_stats(model):
+    params = list(model.parameters())
+    return {'parameters': sum(p.numel() for p in params),
+            'parameter_mb': round(sum(p.numel() * p.element_size() for p in params) / 2 ** 20, 1)}
+
+
+def export_inference_model(model_path, output_path, head='rnnt', dtype='fp32', robust=True):
+    """Write the slim .nemo for one head to output_path. Returns the 'export' block of the report."""
+    import torch
+    from omegaconf import OmegaConf
+
+    from evaluation.benchmarking.engine.models import load_model
+    from evaluation.benchmarking.engine.weight_cache import write_portable_config
+
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}, got {dtype}")
+    start = time.perf_counter()
+    model, _ = load_model(model_path, robust=robust, device='cpu', weight_cache=False)
+    heads = model_heads(model)
+    if head not in heads:
+        raise ValueError(f"{type(model).__name__} has no {head} head (has: {', '.join(heads)})")
+    hybrid = hasattr(model, 'ctc_decoder')
+
+    config = OmegaConf.to_container(model.cfg, resolve=True)
+    slim = slim_config(config, head, hybrid, dtype)
+    if hybrid:
+        class_path = TARGET_CLASSES[(head, 'tokenizer' in slim)]
+    else:
+        class_path = f"{type(model).__module__}.{type(model).__name__}"
+    state = slim_state_dict(model.state_dict(), head, hybrid)
+    original_stats = _parameter_stats(model)
+    del model
+
+    folder = tempfile.mkdtemp(prefix='asr_export_')
+    try:
+        _, override_path = write_portable_config(None, model_path, folder, config=slim)
+        print(f"   📦 Building {class_path.rsplit('.', 1)[1]} ({head} head, {dtype})")
+        slim_model = _instantiate(class_path, override_path, folder)
+        slim_model.load_state_dict(state, strict=True)
+        if dtype != 'fp32':
+            torch_dtype = getattr(torch, INFERENCE_DTYPES[dtype])
+            for name in CAST_MODULES:
+                module = getattr(slim_model, name, None)
+                if module is not None:
+                    module.to(torch_dtype)
+        slim_model.eval()
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        slim_model.save_to(output_path)
+        slim_stats = _parameter_stats(slim_model)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    dropped = sorted(set(config) - set(slim))
+    print(f"   ✅ Exported {output_path} ({os.path.getsize(output_path) / 2 ** 20:.1f} MB); "
+          f"dropped config: {', '.join(dropped) or 'none'}")
+    return {
+        'version': EXPORT_VERSION,
+        'head': head,
+        'dtype': dtype,
+        'model_class': class_path,
+        'hybrid_source': hybrid,
+        'dropped_config_keys': dropped,
+        'dropped_parameters': original_stats['parameters'] - slim_stats['parameters'],
+        'export_seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def measure_load(model_path, robust, backend_name, device, clip_seconds, audio_path):
+    """
+    Load a checkpoint and transcribe the fixed clip, in this (fresh) process.
+    RSS figures are what the load added on top of the torch + NeMo imports.
+    """
+    import gc
+    import torch
+    import nemo.collections.asr  # noqa: F401  (import cost is not the artifact's)
+
+    from evaluation.benchmarking.engine.backends import build_backend
+    from evaluation.benchmarking.engine.coldstart import clip
+    from evaluation.benchmarking.engine.models import load_model
+    from evaluation.benchmarking.engine.perf import proc_status_mb
+
+    gc.collect()
+    baseline = proc_status_mb('VmRSS')
+    start = time.perf_counter()
+    model, info = load_model(model_path, robust=robust, device=device, weight_cache=False)
+    load_seconds = time.perf_counter() - start
+    gc.collect()
+    rss, peak = proc_status_mb('VmRSS'), proc_status_mb('VmHWM')
+
+    backend = build_backend(backend_name, model=model, batch_size=1)
+    audio = clip(clip_seconds, audio_path)
+    with torch.no_grad():
+        signal = torch.from_numpy(audio).unsqueeze(0).to(backend.device)
+        length = torch.tensor([len(audio)], dtype=torch.long, device=backend.device)
+        encoded, encoded_len = backend.encode(signal, length)
+        text = backend.decode(encoded, encoded_len)[0]
+    backend.close()
+
+    result = {
+        'load_seconds': round(load_seconds, 3),
+        'rss_mb': round(rss - baseline, 1) if None not in (rss, baseline) else None,
+        'peak_rss_mb': round(peak - baseline, 1) if None not in (peak, baseline) else None,
+        'dtype': info.get('dtype'),
+        'text': text,
+    }
+    result.update(_parameter_stats(model))
+    return result
+
+
+def compare_artifacts(original_path, slim_path, head='rnnt', robust=True, device='cpu', clip_seconds=5.0,
+                      audio_path=None):
+    """Load both artifacts in fresh processes; sizes, load cost and outputs side by side."""
+    from evaluation.benchmarking.engine.coldstart import in_fresh_process
+
+    results = {}
+    for name, path, robust_load in (('original', original_path, robust), ('slim', slim_path, False)):
+        print(f"\n⏱️  Loading {name} in a fresh process: {path}")
+        result = in_fresh_process(measure_load, path, robust_load, head, device, clip_seconds, audio_path)
+        results[name] = {'path': path, 'size_mb': round(os.path.getsize(path) / 2 ** 20, 1), **result}
+    reduction = {}
+    for key in COMPARED:
+        before, after = results['original'].get(key), results['slim'].get(key)
+        if before and after is not None:
+            reduction[key] = round(1 - after / before, 4)
+    return {**results, 'reduction': reduction, 'same_output': results['original']['text'] == results['slim']['text']}
+
+
+def export_report(model_path, output_path, export_info, comparison, device, clip_seconds, audio_path):
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'model_sha256': file_sha256(model_path),
+        'nemo_version': nemo_version(),
+        'settings': {'device': device, 'clip_seconds': None if audio_path else clip_seconds, 'audio': audio_path},
+        'export': {**export_info, 'output': output_path},
+        **comparison,
+    }
+
+
+def format_export(report):
+    lines = [f"{'':<16} {'original':>12} {'slim':>12} {'reduction':>10}"]
+    for key in COMPARED:
+        before, after = report['original'].get(key), report['slim'].get(key)
+        if before is None or after is None:
+            continue
+        reduction = report['reduction'].get(key)
+        lines.append(f"{key:<16} {before:>12} {after:>12} "
+                     f"{f'{reduction:.1%}' if reduction is not None else '-':>10}")
+    lines.append(f"{'parameters':<16} {report['original']['parameters']:>12} {report['slim']['parameters']:>12}")
+    lines.append(f"same output on the test clip: {'yes' if report['same_output'] else 'NO'}")
+    return '\n'.join(lines)
@@ -0,0 +1,170 @@
+"""
+On-disk cache of preprocessor outputs (log-mel features) per audio file.
+
+The fine-tuned checkpoints share one FastConformer preprocessor config, so
+their log-mel features for a given wav are identical; only the encoder and
+decoder differ. With a feature cache attached (Backend.feature_cache,
+--feature-cache) the manual path looks each batch up first, per utterance:
+cached features skip audio loading and the preprocessor, the misses run the
+preprocessor as usual (together, as one smaller batch) and only their
+features are added to the cache. Both are padded into one encoder batch.
+
+The cache lives in $ASR_CACHE_DIR/features/<key>, the key hashing the
+model's preprocessor config (resolved), the sample rate and the NeMo
+version, so a checkpoint with a different config (or a NeMo upgrade) gets a
+fresh cache and models with the same config share one. Inside, features are
+stored in append-only shards, one per transcribe() call of a writer:
+
+    <cache>/preprocessor.json          the config the key was computed from
+    <cache>/shard-<pid>-<n>.f32        [frames, features] float32 matrices
+                                       back to back (memory-mapped on read)
+    <cache>/shard-<pid>-<n>.json       per audio file: path, size + mtime,
+                                       frame offset, frames, audio samples
+
+A shard's index is written (atomically) after its data, so a crash leaves
+at most an orphan data file, and concurrent writers (sharded runs) never
+touch each other's files. Entries are matched on path + size + mtime, so an
+edited wav is simply a miss. Shards written by other processes after a
+cache is opened are not seen until it is reopened.
+
+Features are stored unpadded, per utterance; per_feature normalization in
+the preprocessor only looks at each utterance's own frames, so batching a
+cached utterance with different neighbours doesn't change its features.
+"""
+
+import os
+import json
+import glob
+import hashlib
+from itertools import count
+
+import numpy as np
+
+from evaluation.benchmarking.engine.cache import cache_dir, nemo_version, read_json, write_json_atomic
+from evaluation.benchmarking.engine.data import SAMPLE_RATE
+
+CACHE_VERSION = 1
+CONFIG_NAME = "preprocessor.json"
+
+
+def preprocessor_config(model):
+    """The model's preprocessor config as plain JSON (None if it has none)."""
+    cfg = getattr(getattr(model, 'cfg', None), 'preprocessor', None)
+    if cfg is None:
+        return None
+    try:
+        from omegaconf import OmegaConf
+        return OmegaConf.to_container(cfg, resolve=True)
+    except (ImportError, ValueError):
+        return dict(cfg)
+
+
+def preprocessor_key(config, sr=SAMPLE_RATE):
+    payload = json.dumps({'config': config, 'sample_rate': sr, 'nemo': nemo_version(), 'version': CACHE_VERSION},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def file_key(path):
+    st = os.stat(path)
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+class FeatureCache:
+    """
+    cache.get_batch(paths) -> [([frames, features] array, audio samples) or
+    None per path]; cache.put(path, features, num_samples) queues one
+    utterance and flush() writes the queue as a shard.
+
+    stats: 'hits' = utterances served from the cache, 'misses' = utterances
+    whose features had to be computed (and were queued).
+    """
+
+    def __init__(self, path, config=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if config is not None and not os.path.exists(os.path.join(path, CONFIG_NAME)):
+            write_json_atomic(os.path.join(path, CONFIG_NAME), config)
+        self.entries = {}
+        self._maps = {}
+        self._pending = []
+        self._shard_ids = count()
+        self.reset_stats()
+        for index_path in sorted(glob.glob(os.path.join(path, 'shard-*.json'))):
+            shard = read_json(index_path)
+            if not shard or shard.get('version') != CACHE_VERSION:
+                continue
+            name = os.path.basename(index_path)[:-len('.json')]
+            for u in shard['utterances']:
+                self.entries[u['audio_filepath']] = (name, shard['num_features'], u)
+
+    @classmethod
+    def for_model(cls, model):
+        """The cache shared by every model with this model's preprocessor config."""
+        config = preprocessor_config(model)
+        if config is None:
+            raise ValueError("Model has no preprocessor config; can't key a feature cache")
+        return cls(os.path.join(cache_dir('features'), preprocessor_key(config)), config)
+
+    def reset_stats(self):
+        self.stats = {'hits': 0, 'misses': 0, 'written': 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _data(self, name, num_features):
+        data = self._maps.get(name)
+        if data is None:
+            data = np.memmap(os.path.join(self.path, f"{name}.f32"), dtype=np.float32, mode='r')
+            data = data.reshape(-1, num_features)
+            self._maps[name] = data
+        return data
+
+    def _get(self, path):
+        found = self.entries.get(path)
+        try:
+            if found is None or found[2]['file_key'] != file_key(path):
+                return None
+        except OSError:
+            return None
+        name, num_features, u = found
+        features = self._data(name, num_features)[u['offset']:u['offset'] + u['frames']]
+        return np.array(features), u['samples']
+
+    def get_batch(self, paths):
+        """Cached (features, samples) per path, None where it's missing (only those are recomputed)."""
+        cached = [self._get(path) for path in paths]
+        self.stats['hits'] += sum(found is not None for found in cached)
+        return cached
+
+    def put(self, path, features, num_samples):
+        """Queue one utterance's [frames, features] matrix for the next flush()."""
+        try:
+            key = file_key(path)
+        except OSError:
+            return
+        self._pending.append((path, key, np.ascontiguousarray(features, dtype=np.float32), int(num_samples)))
+        self.stats['misses'] += 1
+
+    def flush(self):
+        """Write queued features as one new shard."""
+        if not self._pending:
+            return
+        name = f"shard-{os.getpid()}-{next(self._shard_ids)}"
+        while os.path.exists(os.path.join(self.path, f"{name}.json")):
+            name = f"shard-{os.getpid()}-{next(self._shard_ids)}"
+        num_features = self._pending[0][2].shape[1]
+        shard = {'version': CACHE_VERSION, 'num_features': num_features, 'utterances': []}
+        offset = 0
+        with open(os.path.join(self.path, f"{name}.f32"), 'wb') as f:
+            for path, key, features, num_samples in self._pending:
+                f.write(features.tobytes())
+                u = {'audio_filepath': path, 'file_key': key, 'offset': offset,
+                     'frames': int(features.shape[0]), 'samples': num_samples}
+                shard['utterances'].append(u)
+                offset += u['frames']
+        write_json_atomic(os.path.join(self.path, f"{name}.json"), shard)
+        for u in shard['utterances']:
+            self.entries[u['audio_filepath']] = (name, num_features, u)
+        self.stats['written'] += len(self._pending)
+        self._pending = []
@@ -0,0 +1,373 @@
+"""
+Local history of benchmark runs (SQLite), for comparing models without
+opening report files by hand.
+
+Every report written by report.write_report is ingested automatically into
+$ASR_HISTORY_DB (default models/benchmark_history.sqlite; set it to an empty
+string to turn this off). Older reports and bare predictions files can be
+ingested with evaluation/benchmarking/run/benchmark_history.py.
+
+Tables:
+
+    runs        one row per ingested report: model, backend, benchmark set,
+                timestamp, config, run-level performance
+    benchmarks  one row per (run, benchmark): WER/CER, throughput, status
+    utterances  one row per (run, benchmark, manifest index): texts and the
+                word/char edit counts the corpus metrics are summed from
+
+A run is keyed by the sha256 of its report (or predictions file), so
+ingesting the same file twice is a no-op. Ingestion is one transaction of
+bulk inserts, so its cost depends on the size of the new run, not on how
+many runs are already stored.
+
+Run diffs include a paired bootstrap and sign test over the utterances both
+runs share (significance.py), so a WER change can be told apart from noise.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from evaluation.benchmarking.engine.cache import file_sha256
+from evaluation.benchmarking.engine.metrics import RunningMetrics, utterance_counts
+from evaluation.benchmarking.engine.predictions_io import iter_predictions, strip_suffixes
+from evaluation.benchmarking.engine.significance import compare_runs
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_DB = str(PROJECT_ROOT / "models" / "benchmark_history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_key TEXT UNIQUE NOT NULL,
+    model TEXT,
+    model_id TEXT,
+    backend TEXT,
+    benchmark_set TEXT,
+    timestamp TEXT,
+    source_path TEXT,
+    config TEXT,
+    performance TEXT,
+    ingested_at TEXT
+);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    status TEXT,
+    wer REAL,
+    cer REAL,
+    num_samples INTEGER,
+    utterances_per_second REAL,
+    rtfx REAL,
+    predictions_path TEXT,
+    metrics TEXT,
+    performance TEXT,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS utterances (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    benchmark TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    audio_filepath TEXT,
+    ground_truth TEXT,
+    prediction TEXT,
+    word_errors INTEGER,
+    ref_words INTEGER,
+    char_errors INTEGER,
+    ref_chars INTEGER,
+    error TEXT,
+    PRIMARY KEY (run_id, benchmark, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_model ON runs(model_id, timestamp);
+"""
+
+
+def history_db_path():
+    """$ASR_HISTORY_DB, the default path, or None if history is turned off."""
+    path = os.environ.get("ASR_HISTORY_DB", DEFAULT_DB)
+    return path or None
+
+
+def connect(db_path=None):
+    db_path = db_path or history_db_path() or DEFAULT_DB
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# -------------------------
+# Normalizing reports
+# -------------------------
+def model_id_from(model):
+    """'training/models/foo_final.nemo' -> 'foo_final'; API names pass through."""
+    if not model:
+        return None
+    return os.path.splitext(os.path.basename(model))[0] if model.endswith('.nemo') else model
+
+
+def benchmark_set_from(manifest):
+    """'.../benchmarking/data/v1/kn_clean_read.json' -> 'v1'"""
+    return os.path.basename(os.path.dirname(manifest)) if manifest else None
+
+
+def normalize_report(report):
+    """
+    Return (run fields, benchmark results) for any report shape this repo
+    has written: engine reports (schema_version >= 1), the old suite runner's
+    {'results': [...]}, and the old single-manifest {'metrics': {...}} files.
+    """
+    if 'benchmarks' in report:
+        benchmarks = report['benchmarks']
+    elif 'results' in report:
+        benchmarks = report['results']
+    else:
+        benchmarks = [{'name': report.get('name', 'default'), 'status': report.get('status', 'completed'),
+                       'metrics': report.get('metrics') or {}}]
+    run = {
+        'model': report.get('model'),
+        'backend': report.get('backend'),
+        'timestamp': report.get('timestamp'),
+        'config': report.get('config') or {},
+        'performance': report.get('performance') or {},
+    }
+    return run, benchmarks
+
+
+def _resolve(path, base_dir):
+    if not path or os.path.exists(path):
+        return path
+    candidate = os.path.join(base_dir, path)
+    return candidate if os.path.exists(candidate) else None
+
+
+def _utterance_rows(run_id, benchmark, predictions_path):
+    for row in iter_predictions(predictions_path):
+        counts = utterance_counts(row.get('ground_truth', ''), row.get('prediction', ''))
+        yield (run_id, benchmark, row['index'], row.get('audio_filepath'), row.get('ground_truth'),
+               row.get('prediction'), counts['word_errors'], counts['ref_words'], counts['char_errors'],
+               counts['ref_chars'], row.get('error'))
+
+
+# -------------------------
+# Ingestion
+# -------------------------
+def _insert_run(conn, run_key, run, source_path, model_id=None, benchmark_set=None):
+    cur = conn.execute(
+        "INSERT INTO runs (run_key, model, model_id, backend, benchmark_set, timestamp, source_path, "
+        "config, performance, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (run_key, run['model'], model_id or model_id_from(run['model']), run['backend'], benchmark_set,
+         run['timestamp'], os.path.abspath(source_path), json.dumps(run['config'], ensure_ascii=False),
+         json.dumps(run['performance'], ensure_ascii=False), datetime.now().isoformat()))
+    return cur.lastrowid
+
+
+def _insert_benchmark(conn, run_id, result, predictions_path):
+    metrics = result.get('metrics') or {}
+    performance = result.get('performance') or result.get('throughput') or {}
+    conn.execute(
+        "INSERT INTO benchmarks (run_id, name, status, wer, cer, num_samples, utterances_per_second, rtfx, "
+        "predictions_path, metrics, performance) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (run_id, result['name'], result.get('status'), metrics.get('wer'), metrics.get('cer'),
+         metrics.get('num_samples'), performance.get('utterances_per_second'), performance.get('rtfx'),
+         predictions_path, json.dumps(metrics, ensure_ascii=False),
+         json.dumps(performance, ensure_ascii=False)))
+    if predictions_path:
+        conn.executemany("INSERT INTO utterances VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         _utterance_rows(run_id, result['name'], predictions_path))
+
+
+def ingest_report(report_path, db_path=None, model_id=None, benchmark_set=None, conn=None):
+    """
+    Ingest one report (and the predictions files it points to).
+    Returns the run id, or None if this exact report was ingested before.
+    """
+    with open(report_path, 'rb') as f:
+        raw = f.read()
+    run_key = hashlib.sha256(raw).hexdigest()
+    run, benchmarks = normalize_report(json.loads(raw))
+    base_dir = os.path.dirname(os.path.abspath(report_path))
+    if benchmark_set is None:
+        benchmark_set = next((benchmark_set_from(b.get('manifest')) for b in benchmarks if b.get('manifest')), None)
+
+    own_conn = conn is None
+    conn = conn or connect(db_path)
+    try:
+        with conn:
+            if conn.execute("SELECT 1 FROM runs WHERE run_key = ?", (run_key,)).fetchone():
+                return None
+            run_id = _insert_run(conn, run_key, run, report_path, model_id, benchmark_set)
+            for result in benchmarks:
+                _insert_benchmark(conn, run_id, result, _resolve(result.get('predictions_path'), base_dir))
+        return run_id
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def ingest_predictions(predictions_path, model_id, benchmark=None, db_path=None, conn=None):
+    """
+    Ingest a bare predictions file (no report), e.g. old results_* dirs.
+    Metrics are recomputed from the predictions.
+    """
+    run_key = file_sha256(predictions_path)
+    benchmark = benchmark or os.path.basename(os.path.dirname(os.path.abspath(predictions_path)))
+    running, num_failed = RunningMetrics(), 0
+    for row in iter_predictions(predictions_path):
+        num_failed += bool(row.get('error'))
+        running.add(utterance_counts(row.get('ground_truth', ''), row.get('prediction', '')))
+    metrics = {**running.as_dict(), 'num_failed': num_failed}
+    run = {'model': model_id, 'backend': None, 'config': {}, 'performance': {},
+           'timestamp': datetime.fromtimestamp(os.path.getmtime(predictions_path)).isoformat()}
+
+    own_conn = conn is None
+    conn = conn or connect(db_path)
+    try:
+        with conn:
+            if conn.execute("SELECT 1 FROM runs WHERE run_key = ?", (run_key,)).fetchone():
+                return None
+            run_id = _insert_run(conn, run_key, run, predictions_path, model_id)
+            _insert_benchmark(conn, run_id, {'name': benchmark, 'status': 'completed', 'metrics': metrics},
+                              os.path.abspath(predictions_path))
+        return run_id
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def record_run(report_path):
+    """Best-effort ingestion right after a report is written."""
+    db_path = history_db_path()
+    if not db_path:
+        return None
+    try:
+        run_id = ingest_report(report_path, db_path)
+    except Exception as e:
+        print(f"⚠️  Could not record run in history ({db_path}): {e}")
+        return None
+    if run_id is not None:
+        print(f"🗂️  Recorded in history as run {run_id} ({db_path})")
+    return run_id
+
+
+# -------------------------
+# Queries
+# -------------------------
+def list_runs(conn, model=None, limit=50):
+    sql = ("SELECT r.id, r.model_id, r.backend, r.benchmark_set, r.timestamp, COUNT(b.name) AS num_benchmarks "
+           "FROM runs r LEFT JOIN benchmarks b ON b.run_id = r.id")
+    params = []
+    if model:
+        sql += " WHERE r.model_id LIKE ?"
+        params.append(f"%{model}%")
+    sql += " GROUP BY r.id ORDER BY r.timestamp DESC, r.id DESC LIMIT ?"
+    return conn.execute(sql, params + [limit]).fetchall()
+
+
+def resolve_run(conn, ref):
+    """A run id, 'latest', or a model id (substring) meaning its latest run."""
+    if str(ref).isdigit():
+        row = conn.execute("SELECT id FROM runs WHERE id = ?", (int(ref),)).fetchone()
+    elif ref == 'latest':
+        row = conn.execute("SELECT id FROM runs ORDER BY timestamp DESC, id DESC LIMIT 1").fetchone()
+    else:
+        row = conn.execute("SELECT id FROM runs WHERE model_id LIKE ? ORDER BY timestamp DESC, id DESC LIMIT 1",
+                           (f"%{ref}%",)).fetchone()
+    if row is None:
+        raise ValueError(f"No run matches '{ref}'")
+    return row['id']
+
+
+def utterance_significance(conn, run_a, run_b, benchmark, alpha=0.05):
+    """
+    Paired bootstrap + sign test of WER(B) - WER(A) over the utterances of
+    one benchmark present in both runs (matched by audio file).
+    """
+    rows = conn.execute(
+        "SELECT a.word_errors, b.word_errors, a.ref_words FROM utterances a JOIN utterances b "
+        "ON a.audio_filepath = b.audio_filepath AND a.benchmark = b.benchmark "
+        "WHERE a.run_id = ? AND b.run_id = ? AND a.benchmark = ?", (run_a, run_b, benchmark)).fetchall()
+    if not rows:
+        return None
+    counts = np.array([tuple(r) for r in rows], dtype=np.int64)
+    return compare_runs(counts[:, 0], counts[:, 1], counts[:, 2], level=1 - alpha, alpha=alpha)
+
+
+def diff_benchmarks(conn, run_a, run_b, wer_threshold=0.5, throughput_threshold=10.0, alpha=0.05,
+                    require_significance=False):
+    """
+    Per-benchmark comparison of two runs (B relative to A).
+
+    A benchmark is flagged when WER rises by more than wer_threshold points,
+    or utterances/s falls by more than throughput_threshold percent. Each
+    diff carries 'significance' (paired test over shared utterances, or None
+    when either run has no per-utterance rows); with require_significance a
+    WER rise is only flagged when that test is significant at alpha.
+    """
+    rows = conn.execute(
+        "SELECT a.name, a.wer AS wer_a, b.wer AS wer_b, a.cer AS cer_a, b.cer AS cer_b, "
+        "a.utterances_per_second AS ups_a, b.utterances_per_second AS ups_b, "
+        "a.num_samples AS n_a, b.num_samples AS n_b "
+        "FROM benchmarks a JOIN benchmarks b ON a.name = b.name "
+        "WHERE a.run_id = ? AND b.run_id = ? ORDER BY a.name", (run_a, run_b)).fetchall()
+    diffs = []
+    for r in rows:
+        d = dict(r)
+        d['wer_delta'] = d['wer_b'] - d['wer_a'] if None not in (d['wer_a'], d['wer_b']) else None
+        d['cer_delta'] = d['cer_b'] - d['cer_a'] if None not in (d['cer_a'], d['cer_b']) else None
+        d['throughput_change_pct'] = ((d['ups_b'] - d['ups_a']) / d['ups_a'] * 100
+                                      if d['ups_a'] and d['ups_b'] is not None else None)
+        d['significance'] = utterance_significance(conn, run_a, run_b, d['name'], alpha=alpha)
+        flags = []
+        significant = d['significance'] is not None and d['significance']['significant']
+        if d['wer_delta'] is not None and d['wer_delta'] > wer_threshold and (significant or not require_significance):
+            flags.append('WER')
+        if d['throughput_change_pct'] is not None and d['throughput_change_pct'] < -throughput_threshold:
+            flags.append('THROUGHPUT')
+        d['regressions'] = flags
+        diffs.append(d)
+    return diffs
+
+
+def diff_utterances(conn, run_a, run_b, benchmark, limit=20):
+    """
+    Per-utterance comparison of one benchmark across two runs, matched by
+    audio file. Returns (summary counts, most regressed, most improved).
+    """
+    base = ("FROM utterances a JOIN utterances b ON a.audio_filepath = b.audio_filepath "
+            "AND a.benchmark = b.benchmark WHERE a.run_id = ? AND b.run_id = ? AND a.benchmark = ?")
+    params = (run_a, run_b, benchmark)
+    summary = conn.execute(
+        "SELECT COUNT(*) AS matched, "
+        "SUM(b.word_errors > a.word_errors) AS regressed, "
+        "SUM(b.word_errors < a.word_errors) AS improved, "
+        "SUM(b.word_errors = a.word_errors) AS unchanged " + base, params).fetchone()
+    columns = ("SELECT a.idx, a.audio_filepath, a.ground_truth, a.prediction AS prediction_a, "
+               "b.prediction AS prediction_b, a.word_errors AS errors_a, b.word_errors AS errors_b, "
+               "b.word_errors - a.word_errors AS delta ")
+    regressed = conn.execute(columns + base + " AND b.word_errors > a.word_errors ORDER BY delta DESC LIMIT ?",
+                             params + (limit,)).fetchall()
+    improved = conn.execute(columns + base + " AND b.word_errors < a.word_errors ORDER BY delta ASC LIMIT ?",
+                            params + (limit,)).fetchall()
+    return dict(summary), regressed, improved
+
+
+def find_predictions_files(root):
+    """Predictions files under a results dir (any supported format, no run logs)."""
+    found = []
+    for path in sorted(Path(root).rglob("predictions*")):
+        name = strip_suffixes(path.name)
+        if '.shard' in name or path.name.endswith(('.log.jsonl', '.progress.json')):
+            continue
+        if path.name.endswith(('.json', '.jsonl', '.jsonl.gz', '.jsonl.zst')):
+            found.append(str(path))
+    return found
@@ -0,0 +1,155 @@
+"""
+Per-decoder benchmark runs from one encoder pass (backends.HybridBackend).
+
+The runner scores one prediction per entry, so the hybrid backend is split
+into one DecoderView per head. The first view to reach an entry has the
+hybrid backend encode it once and decode it with every head; the outputs
+are kept (per benchmark) and the other views just read theirs. Each view is
+then an ordinary run: its own run log, predictions, metrics, report and
+history entry, under <output_dir>/<decoder>/.
+
+Timing is re-attributed after each benchmark so every decoder's
+'performance' block reads as if it had run alone on the shared encoder
+output: shared stages (audio_load, feature, encoder) plus that decoder's
+own time, with a 'shared_encoder' backend block:
+
+    {"decoders": ["rnnt", "ctc"], "shared_seconds": 52.7,
+     "decoder_seconds": {"rnnt": 24.9, "ctc": 1.3}, "saved_seconds": 52.7}
+
+saved_seconds is the shared work a separate run per decoder would have
+repeated. decoders.json in <output_dir> has WER/CER and decoder time for
+every (benchmark, decoder).
+"""
+
+import os
+import json
+
+from evaluation.benchmarking.engine.backends import Backend
+from evaluation.benchmarking.engine.checkpoint import entry_key
+from evaluation.benchmarking.engine.perf import benchmark_performance
+from evaluation.benchmarking.engine.report import build_report, write_report
+from evaluation.benchmarking.engine.runner import run_benchmark, transcribe_entries
+
+# Stages that belong to the runner's bookkeeping of each view, not to the model
+VIEW_STAGES = ('metrics', 'write')
+
+
+class SharedDecodes:
+    """Outputs of the hybrid backend per entry, computed the first time any view asks."""
+
+    def __init__(self, hybrid):
+        self.hybrid = hybrid
+        self.outputs = {}
+
+    def clear(self):
+        self.outputs = {}
+
+    def predictions(self, entries, decoder):
+        todo = [e for e in entries if entry_key(e) not in self.outputs]
+        if todo:
+            for entry, output in zip(todo, transcribe_entries(self.hybrid, todo)):
+                self.outputs[entry_key(entry)] = output
+        outputs = [self.outputs[entry_key(e)] for e in entries]
+        return [o if isinstance(o, Exception) else o[decoder] for o in outputs]
+
+
+class DecoderView(Backend):
+    """One head of a HybridBackend, as a backend the runner can run."""
+    sort_by_duration = True
+
+    def __init__(self, shared, decoder):
+        self.shared = shared
+        self.name = decoder
+        hybrid = shared.hybrid
+        options = {k: v for k, v in hybrid.options.items()
+                   if k == 'max_batch_seconds' or (decoder == 'ctc_kenlm' and k != 'decoders')}
+        super().__init__(hybrid.model, hybrid.batch_size, shared_encoder=list(hybrid.heads), **options)
+        self.load_info = hybrid.load_info
+
+    def transcribe(self, entries):
+        return self.shared.predictions(entries, self.name)
+
+
+def attribute_performance(hybrid, results):
+    """Rewrite each decoder's performance block as shared stages + its own decoder time."""
+    stages = hybrid.timer.as_dict()
+    decoder_seconds = hybrid.decoder_timer.as_dict()
+    shared = {k: v for k, v in stages.items() if k not in ('decoder', 'lm_decode_wait')}
+    shared_seconds = round(sum(shared.values()), 3)
+    batching = hybrid.batching_stats()
+    batching.pop('audio_seconds', None)
+    backend_stats = hybrid.backend_stats()
+    for decoder, result in results.items():
+        performance = result.get('performance')
+        if result.get('status') != 'completed' or not performance:
+            continue
+        own = {k: v for k, v in performance['stage_seconds'].items() if k in VIEW_STAGES}
+        stage_seconds = {**shared, 'decoder': decoder_seconds.get(decoder, 0.0), **own}
+        backend = {'shared_encoder': {'decoders': list(results), 'shared_seconds': shared_seconds,
+                                      'decoder_seconds': decoder_seconds,
+                                      'saved_seconds': round(shared_seconds * (len(results) - 1), 3)}}
+        if decoder == 'ctc_kenlm' and 'lm_decode' in backend_stats:
+            backend['lm_decode'] = backend_stats['lm_decode']
+        if 'feature_cache' in backend_stats:
+            backend['feature_cache'] = backend_stats['feature_cache']
+        result['performance'] = benchmark_performance(
+            performance['utterances'], performance['audio_seconds'], sum(stage_seconds.values()),
+            stage_seconds=stage_seconds, batching=batching, rss_mb=performance['peak_rss_mb'],
+            gpu_mb=performance['peak_gpu_memory_mb'], backend=backend)
+
+
+def run_suite_hybrid(hybrid, benchmarks, output_dir, model_name=None, predictions_ext='.jsonl', **run_kwargs):
+    """runner.run_suite for a HybridBackend: one report per decoder, plus decoders.json."""
+    shared = SharedDecodes(hybrid)
+    views = {d: DecoderView(shared, d) for d in hybrid.heads}
+    print(f"\n📋 Found {len(benchmarks)} benchmark(s); decoders sharing one encoder pass: {', '.join(views)}")
+    results = {d: [] for d in views}
+    for b in benchmarks:
+        hybrid.reset_stats()
+        shared.clear()
+        by_decoder = {}
+        for d, view in views.items():
+            predictions_path = os.path.join(output_dir, d, b['name'], f'predictions{predictions_ext}')
+            by_decoder[d] = run_benchmark(view, b, predictions_path, **run_kwargs)
+            results[d].append(by_decoder[d])
+        attribute_performance(hybrid, by_decoder)
+    shared.clear()
+
+    reports = {}
+    for d, view in views.items():
+        reports[d] = build_report(model_name, d, results[d], config=view.describe(), model_load=hybrid.load_info)
+        write_report(reports[d], os.path.join(output_dir, d, 'report.json'))
+    write_decoder_summary(reports, output_dir)
+    return reports
+
+
+def write_decoder_summary(reports, output_dir):
+    decoders = list(reports)
+    rows = []
+    for i, first in enumerate(next(iter(reports.values()))['benchmarks']):
+        row = {'benchmark': first['name'], 'decoders': {}}
+        for d in decoders:
+            result = reports[d]['benchmarks'][i]
+            metrics = result.get('metrics') or {}
+            stage_seconds = (result.get('performance') or {}).get('stage_seconds') or {}
+            row['decoders'][d] = {'status': result.get('status'), 'wer': metrics.get('wer'),
+                                  'cer': metrics.get('cer'), 'decoder_seconds': stage_seconds.get('decoder')}
+        shared = (((first.get('performance') or {}).get('backend') or {}).get('shared_encoder') or {})
+        row['shared_seconds'] = shared.get('shared_seconds')
+        rows.append(row)
+
+    print(f"\n{'benchmark':<24} " + " ".join(f"{d + ' WER':>16} {'s':>8}" for d in decoders))
+    for row in rows:
+        cells = []
+        for d in decoders:
+            c = row['decoders'][d]
+            wer = f"{c['wer']:.2f}" if c['wer'] is not None else '-'
+            seconds = f"{c['decoder_seconds']:.1f}" if c['decoder_seconds'] is not None else '-'
+            cells.append(f"{wer:>16} {seconds:>8}")
+        print(f"{row['benchmark'][:24]:<24} " + " ".join(cells))
+
+    path = os.path.join(output_dir, 'decoders.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'decoders': decoders, 'benchmarks': rows}, f, indent=2, ensure_ascii=False)
+    print(f"📄 Per-decoder summary saved to: {path}")
+    return path
@@ -0,0 +1,140 @@
+"""
+CTC + KenLM beam search in a process pool.
+
+pyctcdecode's beam search is pure Python and single-threaded, so at beam
+width 128 it dominates a ctc_kenlm run while the acoustic model sits idle.
+ParallelCTCDecoder moves it into worker processes:
+
+- each worker builds the pyctcdecode decoder (and loads KenLM) once, in its
+  initializer
+- log-prob matrices are handed over through multiprocessing.shared_memory,
+  so only a block name + shape cross the process boundary
+- submit() returns a Future immediately, so the caller keeps running the
+  acoustic model on the next batch while earlier ones are being decoded;
+  at most max_pending utterances are in flight, which bounds shared memory
+
+stats() reports decode-stage throughput: utterances, summed per-utterance
+decode CPU time, wall time from first submit to last result, and how long
+the caller blocked waiting on the pool.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Per worker process: the pyctcdecode decoder built by _init_worker
+_worker_decoder = None
+
+
+def default_lm_workers():
+    # Leave a core for the process running the acoustic model
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def build_decoder(labels, kenlm_model_path, alpha, beta):
+    try:
+        from pyctcdecode import build_ctcdecoder
+    except ImportError:
+        raise ImportError("pyctcdecode not found. Run: pip install pyctcdecode")
+    return build_ctcdecoder(labels=labels, kenlm_model_path=kenlm_model_path, alpha=alpha, beta=beta)
+
+
+def _init_worker(labels, kenlm_model_path, alpha, beta):
+    global _worker_decoder
+    # One beam search per process; keep BLAS from oversubscribing the cores
+    os.environ['OMP_NUM_THREADS'] = '1'
+    _worker_decoder = build_decoder(labels, kenlm_model_path, alpha, beta)
+
+
+def _decode_shared(name, shape, dtype, beam_width):
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # doesn't hand ownership over; the parent unlinks the block when done
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        log_probs = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        start = time.perf_counter()
+        text = _worker_decoder.decode(log_probs, beam_width=beam_width)
+        seconds = time.perf_counter() - start
+        del log_probs
+    finally:
+        shm.close()
+    return text, seconds
+
+
+class ParallelCTCDecoder:
+    def __init__(self, labels, kenlm_model_path, alpha=0.6, beta=1.5, beam_width=128,
+                 num_workers=None, max_pending=None):
+        self.beam_width = beam_width
+        self.num_workers = num_workers or default_lm_workers()
+        self.max_pending = max_pending or 8 * self.num_workers
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.num_workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(list(labels), kenlm_model_path, alpha, beta))
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.utterances = 0
+        self.decode_cpu_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.first_submit = None
+        self.last_done = None
+
+    def _on_done(self, shm, future):
+        shm.close()
+        shm.unlink()
+        if future.exception() is None:
+            with self.lock:
+                self.utterances += 1
+                self.decode_cpu_seconds += future.result()[1]
+                self.last_done = time.perf_counter()
+
+    def submit(self, log_probs):
+        """Queue one [T, V] log-prob matrix; returns a Future of (text, decode_seconds)."""
+        while len(self.pending) >= self.max_pending:
+            future = self.pending.popleft()
+            if not future.done():
+                start = time.perf_counter()
+                future.exception()
+                self.wait_seconds += time.perf_counter() - start
+
+        log_probs = np.ascontiguousarray(log_probs)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, log_probs.nbytes))
+        np.ndarray(log_probs.shape, dtype=log_probs.dtype, buffer=shm.buf)[:] = log_probs
+        if self.first_submit is None:
+            self.first_submit = time.perf_counter()
+        future = self.pool.submit(_decode_shared, shm.name, log_probs.shape, log_probs.dtype.str, self.beam_width)
+        future.add_done_callback(lambda f: self._on_done(shm, f))
+        self.pending.append(future)
+        return future
+
+    def result(self, future):
+        """Block for one submitted decode; returns its text."""
+        start = time.perf_counter()
+        try:
+            return future.result()[0]
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+    def stats(self):
+        wall = (self.last_done - self.first_submit) if self.first_submit and self.last_done else 0.0
+        return {
+            'workers': self.num_workers,
+            'utterances': self.utterances,
+            'decode_cpu_seconds': round(self.decode_cpu_seconds, 2),
+            'decode_wall_seconds': round(wall, 2),
+            'utterances_per_second': round(self.utterances / wall, 2) if wall > 0 else None,
+            # How much of the pool's capacity the beam searches kept busy
+            'worker_utilization': round(self.decode_cpu_seconds / (wall * self.num_workers), 4) if wall > 0 else None,
+            'caller_wait_seconds': round(self.wait_seconds, 2),
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,215 @@
+"""
+KenLM alpha/beta evaluation over cached CTC log-probs (see logit_cache.py).
+
+LMTuner owns a process pool whose workers each open the logit cache
+(memmap) and build the pyctcdecode decoder + KenLM once. evaluate() scores
+any set of (alpha, beta) points on any subset of cached utterances: work is
+split into (point, chunk of utterances) tasks so every worker stays busy
+whether there are few points or many. Workers only send back summed edit
+counts (plus a few example predictions), never log-probs or texts.
+
+Every call adds to tuner.compute, the utterance decodes and summed decode
+seconds spent so far, which is how search strategies are compared.
+
+successive_halving() is the cheap alternative to an exhaustive grid: all
+points are scored on a small random subset, the best 1/eta are promoted to
+an eta-times larger subset, and so on. Subsets are nested prefixes of one
+shuffled order, so a promoted point only decodes the utterances it hasn't
+seen yet. The search stops early once the leader has held for two rungs and
+its WER confidence interval is narrower than ci_tolerance.
+"""
+
+import os
+import math
+import time
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluation.benchmarking.engine.lm_decode import build_decoder, default_lm_workers
+from evaluation.benchmarking.engine.logit_cache import LogitCache
+from evaluation.benchmarking.engine.metrics import RunningMetrics, utterance_counts
+
+# Per worker process, set up by _init_worker
+_worker = {}
+
+
+def decoder_labels(cache):
+    """
+    pyctcdecode labels for the cached log-probs: the decoder vocab artifact's
+    pieces (see decoder_vocab.py), without a blank label; pyctcdecode adds
+    its own as the last label, where NeMo's CTC head has it.
+    """
+    if cache.vocab_size is not None and len(cache.vocab) + 1 != cache.vocab_size:
+        raise ValueError(f"Logit cache {cache.path} has {cache.vocab_size} log-prob columns but "
+                         f"{len(cache.vocab)} vocab pieces (expected vocab + blank = {len(cache.vocab) + 1}); "
+                         f"rebuild it (--rebuild-cache)")
+    return list(cache.vocab)
+
+
+def _init_worker(cache_path, kenlm_model_path):
+    os.environ['OMP_NUM_THREADS'] = '1'
+    cache = LogitCache(cache_path)
+    _worker['cache'] = cache
+    _worker['decoder'] = build_decoder(decoder_labels(cache), kenlm_model_path, alpha=0.5, beta=0.0)
+
+
+def _score_chunk(alpha, beta, beam_width, indices, n_examples):
+    cache, decoder = _worker['cache'], _worker['decoder']
+    decoder.reset_params(alpha=alpha, beta=beta)
+    running = RunningMetrics()
+    word_counts = []
+    examples = []
+    start = time.perf_counter()
+    for i in indices:
+        # '▁' pieces make pyctcdecode join BPE pieces into words itself, as in the ctc_kenlm backend
+        prediction = decoder.decode(cache.log_probs(i), beam_width=beam_width).strip()
+        counts = utterance_counts(cache.reference(i), prediction)
+        running.add(counts)
+        word_counts.append((counts['word_errors'], counts['ref_words']))
+        if len(examples) < n_examples:
+            examples.append({'index': cache.utterances[i]['index'], 'reference': cache.reference(i),
+                             'prediction': prediction})
+    return running.totals, word_counts, time.perf_counter() - start, examples
+
+
+class LMTuner:
+    def __init__(self, cache_path, kenlm_model_path, beam_width=64, num_workers=None, chunk_size=32):
+        self.cache = LogitCache(cache_path)
+        # Fail here on a vocab / log-prob size mismatch, not in every worker's initializer
+        decoder_labels(self.cache)
+        self.beam_width = beam_width
+        self.chunk_size = chunk_size
+        self.num_workers = num_workers or default_lm_workers()
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.num_workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(cache_path, kenlm_model_path))
+        self.compute = {'utterance_decodes': 0, 'decode_seconds': 0.0}
+
+    def __len__(self):
+        return len(self.cache)
+
+    def evaluate(self, points, indices=None, n_examples=0):
+        """
+        Score each (alpha, beta) point on the given utterance indices (default:
+        all cached). Returns {point: {'wer', 'cer', ..., 'examples'}}.
+        """
+        indices = list(range(len(self.cache))) if indices is None else list(indices)
+        chunks = [indices[i:i + self.chunk_size] for i in range(0, len(indices), self.chunk_size)]
+        futures = {}
+        for point in points:
+            alpha, beta = point
+            for k, chunk in enumerate(chunks):
+                futures[self.pool.submit(_score_chunk, alpha, beta, self.beam_width, chunk,
+                                         n_examples if k == 0 else 0)] = point
+
+        running = {point: RunningMetrics() for point in points}
+        word_counts = {point: [] for point in points}
+        examples = {point: [] for point in points}
+        for future, point in futures.items():
+            totals, chunk_word_counts, seconds, chunk_examples = future.result()
+            # totals are summed counts, so fold them in as one "sample" and fix num_samples below
+            running[point].add(totals)
+            word_counts[point].extend(chunk_word_counts)
+            examples[point].extend(chunk_examples)
+            self.compute['utterance_decodes'] += len(chunk_word_counts)
+            self.compute['decode_seconds'] += seconds
+
+        results = {}
+        for point in points:
+            running[point].num_samples = len(indices)
+            results[point] = {**running[point].as_dict(ndigits=None), 'examples': examples[point],
+                              'word_counts': word_counts[point]}
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+def wer_confidence_interval(word_counts, z=1.96):
+    """
+    Normal-approximation CI (in WER points) for corpus WER = sum(errors) / sum(words)
+    over utterances, using the ratio-estimator variance. Returns (wer, half_width).
+    """
+    m = len(word_counts)
+    total_words = sum(n for _, n in word_counts)
+    if m < 2 or not total_words:
+        return None, None
+    ratio = sum(e for e, _ in word_counts) / total_words
+    residual_ss = sum((e - ratio * n) ** 2 for e, n in word_counts)
+    se = math.sqrt(residual_ss / (m * (m - 1))) * m / total_words
+    return ratio * 100, z * se * 100
+
+
+def successive_halving(tuner, points, min_subset=128, eta=2, ci_tolerance=0.25, seed=0):
+    """
+    Successive halving over (alpha, beta) points. Returns a dict with the best
+    point, per-rung history and decode compute spent vs an exhaustive grid.
+    """
+    order = list(range(len(tuner)))
+    random.Random(seed).shuffle(order)
+    decodes_before = tuner.compute['utterance_decodes']
+    seconds_before = tuner.compute['decode_seconds']
+
+    totals = {p: RunningMetrics() for p in points}
+    word_counts = {p: [] for p in points}
+    seen = 0
+    survivors = list(points)
+    history = []
+    leader, stable_rungs = None, 0
+    subset = min(min_subset, len(order))
+
+    while True:
+        new_indices = order[seen:subset]
+        if new_indices:
+            for point, r in tuner.evaluate(survivors, new_indices).items():
+                totals[point].add({k: r[k] for k in ('word_errors', 'ref_words', 'char_errors', 'ref_chars')})
+                word_counts[point].extend(r['word_counts'])
+        seen = subset
+
+        scored = []
+        for point in survivors:
+            metrics = totals[point].as_dict(ndigits=None)
+            _, half_width = wer_confidence_interval(word_counts[point])
+            scored.append((metrics['wer'], point, metrics['cer'], half_width))
+        scored.sort(key=lambda x: (x[0] is None, x[0]))
+        best_wer, best_point, best_cer, best_ci = scored[0]
+
+        stable_rungs = stable_rungs + 1 if best_point == leader else 0
+        leader = best_point
+        history.append({
+            'rung': len(history), 'subset': subset, 'points': len(survivors),
+            'best': {'alpha': best_point[0], 'beta': best_point[1], 'wer': best_wer, 'ci_half_width': best_ci},
+            'utterance_decodes': tuner.compute['utterance_decodes'] - decodes_before,
+        })
+        # No WER when every utterance of the subset has an empty reference
+        wer_text = f"{best_wer:.2f}%" if best_wer is not None else "-"
+        print(f"   rung {len(history) - 1}: {len(survivors):>3} points x {subset:>6} utts | "
+              f"best α={best_point[0]} β={best_point[1]} WER {wer_text} ± {best_ci or float('nan'):.2f}")
+
+        if subset >= len(order) or len(survivors) == 1:
+            stop_reason = 'full set' if subset >= len(order) else 'one point left'
+            break
+        if stable_rungs >= 1 and best_ci is not None and best_ci <= ci_tolerance:
+            stop_reason = f'leader stable, CI ±{best_ci:.2f} <= {ci_tolerance}'
+            break
+        survivors = [point for _, point, _, _ in scored[:max(1, math.ceil(len(scored) / eta))]]
+        subset = min(subset * eta, len(order))
+
+    spent = tuner.compute['utterance_decodes'] - decodes_before
+    seconds = tuner.compute['decode_seconds'] - seconds_before
+    exhaustive = len(points) * len(order)
+    return {
+        'best': {'alpha': best_point[0], 'beta': best_point[1], 'wer': best_wer, 'cer': best_cer,
+                 'ci_half_width': best_ci, 'num_utterances': subset},
+        'stop_reason': stop_reason,
+        'history': history,
+        'compute': {
+            'utterance_decodes': spent,
+            'decode_seconds': round(seconds, 2),
+            'exhaustive_utterance_decodes': exhaustive,
+            # Exhaustive cost estimated from this run's mean seconds per decode
+            'exhaustive_decode_seconds_est': round(seconds / spent * exhaustive, 2) if spent else None,
+            'fraction_of_exhaustive': round(spent / exhaustive, 4) if exhaustive else None,
+        },
+    }
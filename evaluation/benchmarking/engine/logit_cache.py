@@ -0,0 +1,132 @@
+"""
+On-disk cache of per-utterance CTC log-probabilities.
+
+Tuning KenLM alpha/beta only changes the beam search, not the acoustic
+model, so the acoustic model is run once per (model, manifest) and its CTC
+log-probs are kept in one flat memory-mapped file:
+
+    <cache>/logprobs.bin   all [frames, vocab] matrices back to back
+    <cache>/index.json     vocab, dtype, and per utterance: manifest index,
+                           audio path, reference text, frame offset, frames
+
+Any number of processes can open the same cache; np.memmap shares the OS
+page cache, so workers read log-probs without copying or pickling them.
+
+The default location is $ASR_CACHE_DIR/logits/<model sha>-<manifest sha>,
+so a retrained model or an edited manifest gets a fresh cache.
+"""
+
+import os
+import json
+import shutil
+
+import numpy as np
+
+from evaluation.benchmarking.engine.backends import ManualPathBackend, ctc_head
+from evaluation.benchmarking.engine.cache import cache_dir, file_sha256, write_json_atomic
+from evaluation.benchmarking.engine.data import load_manifest
+
+INDEX_NAME = "index.json"
+DATA_NAME = "logprobs.bin"
+CACHE_VERSION = 1
+
+
+def default_cache_path(model_path, manifest_path):
+    key = f"{file_sha256(model_path)[:16]}-{file_sha256(manifest_path)[:16]}"
+    return os.path.join(cache_dir('logits'), key)
+
+
+class CTCLogProbBackend(ManualPathBackend):
+    """Manual path that stops at the CTC head and returns [frames, vocab] arrays."""
+    name = "ctc_logprobs"
+
+    def decode(self, encoded, encoded_len):
+        log_probs = ctc_head(self.model)[0](encoder_output=encoded).float().cpu().numpy()
+        return [log_probs[j][:int(encoded_len[j].item())] for j in range(log_probs.shape[0])]
+
+
+def build_logit_cache(model, manifest_path, cache_path, vocab, batch_size=16, max_batch_seconds=None,
+                      limit=None, dtype='float32', chunk_size=256):
+    """
+    Run the acoustic model over the manifest and write the cache.
+
+    Written into a temp dir and renamed at the end, so a crash never leaves
+    a cache that looks complete. Entries that fail to load are skipped
+    (and counted in the index).
+    """
+    entries = load_manifest(manifest_path, limit=limit)
+    backend = CTCLogProbBackend(model, batch_size=batch_size, max_batch_seconds=max_batch_seconds)
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+
+    index = {'version': CACHE_VERSION, 'manifest': os.path.abspath(manifest_path), 'dtype': dtype,
+             'vocab': list(vocab), 'vocab_size': None, 'utterances': [], 'failed': 0}
+    offset = 0
+    print(f"🎧 Caching CTC log-probs for {len(entries)} utterances -> {cache_path}")
+    with open(os.path.join(tmp_path, DATA_NAME), 'wb') as f:
+        for start in range(0, len(entries), chunk_size):
+            chunk = entries[start:start + chunk_size]
+            try:
+                outputs = backend.transcribe(chunk)
+            except Exception as e:
+                print(f"   ⚠️  Chunk failed ({e}), caching {len(chunk)} entries one by one")
+                outputs = []
+                for entry in chunk:
+                    try:
+                        outputs.extend(backend.transcribe([entry]))
+                    except Exception as entry_error:
+                        print(f"   ❌ Failed on {entry['audio_filepath']}: {entry_error}")
+                        outputs.append(None)
+            for entry, log_probs in zip(chunk, outputs):
+                if log_probs is None:
+                    index['failed'] += 1
+                    continue
+                if index['vocab_size'] is None:
+                    index['vocab_size'] = int(log_probs.shape[1])
+                f.write(np.ascontiguousarray(log_probs, dtype=dtype).tobytes())
+                index['utterances'].append({
+                    'index': entry['index'],
+                    'audio_filepath': entry['audio_filepath'],
+                    'text': entry['text'],
+                    'offset': offset,
+                    'frames': int(log_probs.shape[0]),
+                })
+                offset += int(log_probs.shape[0])
+            print(f"   Cached {min(start + chunk_size, len(entries))}/{len(entries)}")
+
+    index['total_frames'] = offset
+    write_json_atomic(os.path.join(tmp_path, INDEX_NAME), index)
+    if os.path.exists(cache_path):
+        shutil.rmtree(cache_path)
+    os.replace(tmp_path, cache_path)
+    return LogitCache(cache_path)
+
+
+class LogitCache:
+    """Read side: cache.log_probs(i) is utterance i's [frames, vocab] array (a memmap view)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_NAME), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.utterances = self.index['utterances']
+        self.vocab = self.index['vocab']
+        self.vocab_size = self.index['vocab_size']
+        self.data = None
+        if self.index['total_frames']:
+            self.data = np.memmap(os.path.join(path, DATA_NAME), dtype=self.index['dtype'], mode='r',
+                                  shape=(self.index['total_frames'], self.vocab_size))
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, INDEX_NAME))
+
+    def __len__(self):
+        return len(self.utterances)
+
+    def log_probs(self, i):
+        u = self.utterances[i]
+        return self.data[u['offset']:u['offset'] + u['frames']]
+
+    def reference(self, i):
+        return self.utterances[i]['text']
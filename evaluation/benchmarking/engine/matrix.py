@@ -0,0 +1,207 @@
+"""
+Multi-model evaluation matrix: every model on every benchmark set, with each
+audio file decoded once.
+
+Before any model runs, the audio of all selected benchmarks is decoded and
+resampled into one shared store (see audio_store.py). Each model is then
+loaded in turn (or in parallel spawned processes, each with its own model)
+and run over every benchmark with runner.run_suite, its backend reading
+waveforms from the store. Every model keeps its own predictions, report
+and history entry under <output_dir>/<model name>/, so a matrix cell can be
+compared or resumed like any single run.
+
+The combined report goes to <output_dir>/matrix.json:
+
+{
+  "schema_version": 1,
+  "timestamp": "...",
+  "backend": "rnnt",
+  "models": [{"name": "100m_v3", "model": "...nemo", "report_path": "...",
+              "model_load_seconds": 4.1}, ...],
+  "benchmarks": ["kn_clean_read", ...],
+  "audio_store": {"path": "...", "files": 8192, "failed": 0, "audio_hours": 11.2,
+                  "size_mb": 2461.0, "decode_seconds": 310.4, "decodes_saved": 24576},
+  "cells": [{"model": "100m_v3", "benchmark": "kn_clean_read", "status": "completed",
+             "wer": 14.59, "cer": 2.86, "wer_ci": [13.92, 15.31], "num_samples": 2062,
+             "num_failed": 0, "utterances_per_second": 21.64, "rtfx": 109.24,
+             "wall_seconds": 95.3, "audio_load_seconds": 0.4}, ...]
+}
+
+and a WER and RTFx grid (models x benchmarks) to matrix.txt.
+"""
+
+import gc
+import os
+import sys
+import json
+from datetime import datetime
+
+from evaluation.benchmarking.engine.audio_store import AudioStore, build_audio_store
+from evaluation.benchmarking.engine.data import load_manifest, validate_manifest
+from evaluation.benchmarking.engine.parallel import worker_pool
+from evaluation.benchmarking.engine.runner import run_suite
+
+MATRIX_SCHEMA_VERSION = 1
+
+
+def parse_model_spec(spec):
+    """'name=path/to/model.nemo' or just the path (named after the file)."""
+    name, sep, path = spec.partition('=')
+    if not sep:
+        path = spec
+        name = os.path.splitext(os.path.basename(spec))[0]
+    return {'name': name, 'model': path}
+
+
+def benchmark_audio_paths(benchmarks, limit=None, subset_fraction=None, path_remap=None):
+    """Audio paths the runs will read, in manifest order, without duplicates."""
+    paths = []
+    for b in benchmarks:
+        valid, _ = validate_manifest(b['manifest'])
+        if valid:
+            paths.extend(e['audio_filepath'] for e in load_manifest(
+                b['manifest'], limit=limit, subset_fraction=subset_fraction, path_remap=path_remap))
+    return list(dict.fromkeys(paths))
+
+
+def _release_memory():
+    gc.collect()
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def run_model(make_backend, spec, benchmarks, output_dir, store_path=None, predictions_ext='.jsonl',
+              run_kwargs=None):
+    """
+    One matrix row: load the model, run every benchmark, free the model.
+    Returns its report (every benchmark 'failed' if the model won't load).
+    """
+    print(f"\n{'=' * 60}\n🧪 Model: {spec['name']} ({spec['model']})\n{'=' * 60}")
+    try:
+        backend = make_backend()
+    except Exception as e:
+        print(f"   ❌ Could not load {spec['name']}: {e}")
+        return {'model_load': None,
+                'benchmarks': [{'name': b['name'], 'status': 'failed', 'error': str(e)} for b in benchmarks]}
+    if store_path:
+        backend.audio_store = AudioStore(store_path)
+    try:
+        return run_suite(backend, benchmarks, os.path.join(output_dir, spec['name']), model_name=spec['model'],
+                         predictions_ext=predictions_ext, **(run_kwargs or {}))
+    finally:
+        backend.close()
+        del backend
+        _release_memory()
+
+
+def matrix_cells(specs, reports):
+    cells = []
+    for spec, report in zip(specs, reports):
+        for b in report['benchmarks']:
+            metrics, performance = b.get('metrics') or {}, b.get('performance') or {}
+            cells.append({
+                'model': spec['name'],
+                'benchmark': b['name'],
+                'status': b.get('status'),
+                'wer': metrics.get('wer'),
+                'cer': metrics.get('cer'),
+                'wer_ci': metrics.get('wer_ci'),
+                'cer_ci': metrics.get('cer_ci'),
+                'num_samples': metrics.get('num_samples'),
+                'num_failed': metrics.get('num_failed'),
+                'utterances_per_second': performance.get('utterances_per_second'),
+                'rtfx': performance.get('rtfx'),
+                'wall_seconds': performance.get('wall_seconds'),
+                'audio_load_seconds': (performance.get('stage_seconds') or {}).get('audio_load'),
+            })
+    return cells
+
+
+def format_matrix(report):
+    """WER and RTFx grids, one row per model, one column per benchmark."""
+    cells = {(c['model'], c['benchmark']): c for c in report['cells']}
+    names = [m['name'] for m in report['models']]
+    benchmarks = report['benchmarks']
+    width = max([len(n) for n in names] + [5])
+    lines = []
+    for key, title in (('wer', 'WER %'), ('rtfx', 'RTFx')):
+        lines.append(f"{title:<{width}}  " + "  ".join(f"{b[:16]:>16}" for b in benchmarks))
+        for name in names:
+            values = []
+            for b in benchmarks:
+                value = (cells.get((name, b)) or {}).get(key)
+                values.append(f"{value:>16.2f}" if value is not None else f"{'-':>16}")
+            lines.append(f"{name:<{width}}  " + "  ".join(values))
+        lines.append("")
+    store = report.get('audio_store')
+    if store:
+        lines.append(f"Audio decoded once: {store['files']} files, {store['audio_hours']} h in "
+                     f"{store['decode_seconds']}s; {store['decodes_saved']} file decodes saved")
+    return '\n'.join(lines).rstrip() + '\n'
+
+
+def write_matrix_report(report, output_dir):
+    json_path = os.path.join(output_dir, 'matrix.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    text_path = os.path.join(output_dir, 'matrix.txt')
+    with open(text_path, 'w', encoding='utf-8') as f:
+        f.write(format_matrix(report))
+    print(f"\n{format_matrix(report)}")
+    print(f"📄 Matrix report saved to: {json_path}")
+    print(f"📄 Matrix table saved to: {text_path}")
+    return json_path
+
+
+def run_matrix(model_backends, benchmarks, output_dir, backend_name=None, parallel_models=1,
+               threads_per_worker=None, share_audio=True, audio_store_path=None, rebuild_audio_store=False,
+               decode_workers=None, predictions_ext='.jsonl', **run_kwargs):
+    """
+    Run every model over every benchmark and write the combined report.
+
+    Args:
+        model_backends: [(spec, make_backend)]; spec from parse_model_spec,
+                        make_backend a picklable zero-arg callable building
+                        that model's backend
+        parallel_models: run this many models at once, each in its own
+                         spawned process (1 = one after another in this one)
+        share_audio: decode the audio once into a shared store (only used
+                     by manual-path backends)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    specs = [spec for spec, _ in model_backends]
+    print(f"\n📋 Matrix: {len(specs)} model(s) x {len(benchmarks)} benchmark(s)")
+
+    store_info = None
+    store_path = None
+    if share_audio:
+        paths = benchmark_audio_paths(benchmarks, run_kwargs.get('limit'), run_kwargs.get('subset_fraction'),
+                                      run_kwargs.get('path_remap'))
+        store = build_audio_store(paths, audio_store_path, num_workers=decode_workers, rebuild=rebuild_audio_store)
+        store_path = store.path
+        store_info = {**store.info(), 'decodes_saved': len(paths) * (len(specs) - 1)}
+        del store
+
+    if parallel_models > 1:
+        with worker_pool(parallel_models, threads_per_worker) as pool:
+            futures = [pool.submit(run_model, make_backend, spec, benchmarks, output_dir, store_path,
+                                   predictions_ext, run_kwargs) for spec, make_backend in model_backends]
+            reports = [f.result() for f in futures]
+    else:
+        reports = [run_model(make_backend, spec, benchmarks, output_dir, store_path, predictions_ext, run_kwargs)
+                   for spec, make_backend in model_backends]
+
+    report = {
+        'schema_version': MATRIX_SCHEMA_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'backend': backend_name,
+        'models': [{**spec, 'report_path': os.path.join(output_dir, spec['name'], 'report.json'),
+                    'model_load_seconds': (r.get('model_load') or {}).get('load_seconds')}
+                   for spec, r in zip(specs, reports)],
+        'benchmarks': [b['name'] for b in benchmarks],
+        'audio_store': store_info,
+        'cells': matrix_cells(specs, reports),
+    }
+    write_matrix_report(report, output_dir)
+    return report
@@ -0,0 +1,317 @@
+"""
+WER/CER metrics shared by every benchmark runner and analysis script.
+
+Corpus WER/CER is the sum of per-utterance edit counts over the sum of
+reference lengths, which is exactly what jiwer computes for a list of
+sentences. Working from per-utterance counts lets metrics be computed
+while streaming predictions, and aggregated incrementally during a run.
+
+Each utterance is aligned once, at word and character level, with
+rapidfuzz's C++ Levenshtein kernel (a pure-python DP is the fallback).
+utterance_alignment() returns the counts plus the word edit ops;
+CorpusAlignment keeps them for a whole corpus, so WER/CER, the
+substitution/deletion/insertion breakdown, top confusions and any subset
+of utterances are all derived from the cache without re-aligning.
+Identical (reference, prediction) pairs are only aligned once.
+
+scripts/evaluation/benchmark_wer_engine.py compares speed and results
+against jiwer.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from evaluation.benchmarking.engine.significance import metric_intervals
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    Levenshtein = None
+
+# Per-utterance counts kept by CorpusAlignment, in column order
+COUNT_FIELDS = ('word_errors', 'ref_words', 'char_errors', 'ref_chars',
+                'substitutions', 'deletions', 'insertions', 'hits',
+                'char_substitutions', 'char_deletions', 'char_insertions')
+
+_TAGS = {'replace': 'S', 'delete': 'D', 'insert': 'I'}
+
+
+def compute_metrics(results):
+    """
+    Compute corpus WER/CER (in %) from an iterable of prediction rows.
+
+    Rows that failed inference (have an 'error' key) are scored with an
+    empty prediction, same as the old bypass runner did. Rows that already
+    carry per-utterance 'counts' (the runner computes them as it goes) are
+    not aligned again.
+
+    Per-utterance counts are kept as arrays for bootstrap confidence
+    intervals of WER/CER (see significance.py).
+    """
+    running = RunningMetrics()
+    num_failed = 0
+    per_utterance = {k: [] for k in COUNT_FIELDS[:4]}
+    try:
+        for r in results:
+            num_failed += bool(r.get('error'))
+            counts = r.get('counts') or utterance_counts(r['ground_truth'], r['prediction'])
+            running.add(counts)
+            for k, values in per_utterance.items():
+                values.append(counts[k])
+    except Exception as e:
+        return {'status': 'failed', 'error': str(e)}
+    metrics = running.as_dict()
+    intervals = metric_intervals(*per_utterance.values())
+    if metrics['wer'] is not None:
+        ci = f" (95% CI {intervals['wer_ci'][0]}-{intervals['wer_ci'][1]})" if intervals['wer_ci'] else ""
+        print(f"      WER: {metrics['wer']:.2f}%{ci} | CER: {metrics['cer']:.2f}%")
+    return {'wer': metrics['wer'], 'cer': metrics['cer'], 'num_samples': metrics['num_samples'],
+            'num_failed': num_failed, **intervals, 'status': 'completed'}
+
+
+# -------------------------
+# Alignment kernel
+# -------------------------
+def edit_distance(ref_tokens, hyp_tokens):
+    """Levenshtein distance between two token sequences or strings (rapidfuzz, or two-row DP)."""
+    if Levenshtein is not None:
+        return Levenshtein.distance(ref_tokens, hyp_tokens)
+    if len(ref_tokens) < len(hyp_tokens):
+        ref_tokens, hyp_tokens = hyp_tokens, ref_tokens
+    previous = list(range(len(hyp_tokens) + 1))
+    for i, r in enumerate(ref_tokens, 1):
+        current = [i]
+        for j, h in enumerate(hyp_tokens, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def edit_ops(ref_tokens, hyp_tokens):
+    """
+    Edit ops of one optimal alignment as (tag, ref_pos, hyp_pos) with tag in
+    'S', 'D', 'I'; positions follow rapidfuzz's editops convention.
+    """
+    if Levenshtein is not None:
+        return [(_TAGS[op.tag], op.src_pos, op.dest_pos) for op in Levenshtein.editops(ref_tokens, hyp_tokens)]
+    return _backtrace_ops(ref_tokens, hyp_tokens)
+
+
+def _backtrace_ops(ref, hyp):
+    """Pure-python fallback for edit_ops (full DP table + backtrace)."""
+    n, m = len(ref), len(hyp)
+    d = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1): d[i][0] = i
+    for j in range(m + 1): d[0][j] = j
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (ref[i - 1] != hyp[j - 1]))
+    ops = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and d[i][j] == d[i - 1][j - 1] + (ref[i - 1] != hyp[j - 1]):
+            if ref[i - 1] != hyp[j - 1]:
+                ops.append(('S', i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif i > 0 and d[i][j] == d[i - 1][j] + 1:
+            ops.append(('D', i - 1, j))
+            i -= 1
+        else:
+            ops.append(('I', i, j - 1))
+            j -= 1
+    ops.reverse()
+    return ops
+
+
+def _op_counts(ops):
+    counts = {'S': 0, 'D': 0, 'I': 0}
+    for tag, _, _ in ops:
+        counts[tag] += 1
+    return counts
+
+
+def word_alignment_counts(ref_words, hyp_words):
+    """Substitution/deletion/insertion/hit counts from one optimal word alignment."""
+    c = _op_counts(edit_ops(ref_words, hyp_words))
+    return {'substitutions': c['S'], 'deletions': c['D'], 'insertions': c['I'],
+            'hits': len(ref_words) - c['S'] - c['D']}
+
+
+# -------------------------
+# Per-utterance error counts
+# -------------------------
+def utterance_counts(ref, hyp, breakdown=False):
+    """
+    Word and character edit counts for one utterance, tokenised the way
+    jiwer's default wer/cer transforms do, so summing them over a corpus
+    reproduces jiwer's corpus WER/CER.
+
+    breakdown=True adds word-level substitutions/deletions/insertions/hits.
+    """
+    if breakdown:
+        counts, _ = utterance_alignment(ref, hyp)
+        return {k: counts[k] for k in COUNT_FIELDS[:8]}
+    ref_words, hyp_words = ref.split(), hyp.split()
+    ref_chars, hyp_chars = ref.strip(), hyp.strip()
+    return {
+        'word_errors': edit_distance(ref_words, hyp_words),
+        'ref_words': len(ref_words),
+        'char_errors': edit_distance(ref_chars, hyp_chars),
+        'ref_chars': len(ref_chars),
+    }
+
+
+def utterance_alignment(ref, hyp):
+    """
+    Align one utterance at word and character level.
+
+    Returns (counts, word_ops): counts has every COUNT_FIELDS key; word_ops
+    is [(tag, ref_word, hyp_word)] for each error, with None for the
+    missing side of a deletion/insertion.
+    """
+    ref_words, hyp_words = ref.split(), hyp.split()
+    ref_chars, hyp_chars = ref.strip(), hyp.strip()
+    ops = edit_ops(ref_words, hyp_words)
+    w = _op_counts(ops)
+    c = _op_counts(edit_ops(ref_chars, hyp_chars))
+    counts = {
+        'word_errors': len(ops),
+        'ref_words': len(ref_words),
+        'char_errors': c['S'] + c['D'] + c['I'],
+        'ref_chars': len(ref_chars),
+        'substitutions': w['S'],
+        'deletions': w['D'],
+        'insertions': w['I'],
+        'hits': len(ref_words) - w['S'] - w['D'],
+        'char_substitutions': c['S'],
+        'char_deletions': c['D'],
+        'char_insertions': c['I'],
+    }
+    word_ops = [(tag,
+                 ref_words[i] if tag != 'I' else None,
+                 hyp_words[j] if tag != 'D' else None) for tag, i, j in ops]
+    return counts, word_ops
+
+
+class RunningMetrics:
+    """Corpus WER/CER (and any extra counts) accumulated utterance by utterance."""
+
+    def __init__(self):
+        self.totals = {'word_errors': 0, 'ref_words': 0, 'char_errors': 0, 'ref_chars': 0}
+        self.num_samples = 0
+
+    def add(self, counts):
+        for k, v in counts.items():
+            self.totals[k] = self.totals.get(k, 0) + v
+        self.num_samples += 1
+
+    def as_dict(self, ndigits=2):
+        t = self.totals
+
+        def pct(num, den):
+            if not den:
+                return None
+            value = num / den * 100
+            return round(value, ndigits) if ndigits is not None else value
+
+        return {
+            'wer': pct(t['word_errors'], t['ref_words']),
+            'cer': pct(t['char_errors'], t['ref_chars']),
+            'num_samples': self.num_samples,
+            **t,
+        }
+
+
+class CorpusAlignment:
+    """
+    Per-utterance alignments of a corpus, computed once and reused.
+
+        alignment = CorpusAlignment.from_rows(iter_predictions(path))
+        alignment.metrics()                  # WER/CER + S/D/I/H breakdown
+        alignment.metrics(indices)           # any subset, no re-alignment
+        alignment.top_confusions(20)
+        alignment.intervals()                # bootstrap WER/CER CIs
+        alignment.count_array()              # [utterances, COUNT_FIELDS] for vectorised stats
+    """
+
+    def __init__(self, keep_ops=True):
+        self.keep_ops = keep_ops
+        self.counts = []
+        self.word_ops = []
+        self._memo = {}
+        self._array = None
+
+    @classmethod
+    def from_pairs(cls, references, predictions, **kwargs):
+        alignment = cls(**kwargs)
+        for ref, hyp in zip(references, predictions):
+            alignment.add(ref, hyp)
+        return alignment
+
+    @classmethod
+    def from_rows(cls, rows, ref_key='ground_truth', hyp_key='prediction', **kwargs):
+        alignment = cls(**kwargs)
+        for row in rows:
+            alignment.add(row[ref_key], row[hyp_key])
+        return alignment
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, ref, hyp):
+        """Align one utterance (or reuse the alignment of an identical pair); returns its counts."""
+        cached = self._memo.get((ref, hyp))
+        if cached is None:
+            cached = utterance_alignment(ref, hyp)
+            self._memo[(ref, hyp)] = cached
+        counts, ops = cached
+        self.counts.append(counts)
+        if self.keep_ops:
+            self.word_ops.append(ops)
+        self._array = None
+        return counts
+
+    def running(self, indices=None):
+        """RunningMetrics over all utterances, or the given positions."""
+        running = RunningMetrics()
+        for i in (range(len(self.counts)) if indices is None else indices):
+            running.add(self.counts[i])
+        return running
+
+    def metrics(self, indices=None, ndigits=2):
+        """Corpus WER/CER (in %), word S/D/I/H and char S/D/I over all or some utterances."""
+        return self.running(indices).as_dict(ndigits=ndigits)
+
+    def count_array(self):
+        """numpy int64 array [utterances, len(COUNT_FIELDS)] of per-utterance counts."""
+        if self._array is None:
+            self._array = np.array([[c[k] for k in COUNT_FIELDS] for c in self.counts],
+                                   dtype=np.int64).reshape(len(self.counts), len(COUNT_FIELDS))
+        return self._array
+
+    def intervals(self, indices=None, **kwargs):
+        """Bootstrap WER/CER confidence intervals over all or some utterances (see significance.py)."""
+        counts = self.count_array()
+        if indices is not None:
+            counts = counts[np.asarray(list(indices), dtype=np.int64)]
+        return metric_intervals(*(counts[:, k] for k in range(4)), **kwargs)
+
+    def top_confusions(self, n=20, indices=None):
+        """Most frequent word substitutions (ref, hyp), deletions and insertions, with counts."""
+        if not self.keep_ops:
+            raise ValueError("CorpusAlignment was built with keep_ops=False")
+        substitutions, deletions, insertions = Counter(), Counter(), Counter()
+        for i in (range(len(self.word_ops)) if indices is None else indices):
+            for tag, ref_word, hyp_word in self.word_ops[i]:
+                if tag == 'S':
+                    substitutions[(ref_word, hyp_word)] += 1
+                elif tag == 'D':
+                    deletions[ref_word] += 1
+                else:
+                    insertions[hyp_word] += 1
+        return {
+            'substitutions': [(ref, hyp, count) for (ref, hyp), count in substitutions.most_common(n)],
+            'deletions': deletions.most_common(n),
+            'insertions': insertions.most_common(n),
+        }
@@ -0,0 +1,316 @@
+"""
+.nemo model loading for benchmark runs.
+
+Two modes:
+- plain:  ASRModel.restore_from(path)
+- robust: the "self-healing" load from the original run_benchmark.py
+  1. Auto-extracts and standardizes tokenizer paths.
+  2. Writes an override config with sanitized tokenizer entries.
+  3. If loading fails due to an "unexpected argument", it auto-removes the bad key and retries.
+
+The robust path caches its outcome under $ASR_CACHE_DIR/healed_models/,
+keyed by the .nemo content hash and the installed NeMo version: the
+tokenizer artifacts and the final healed override config are kept, so later
+runs skip extraction and load in a single attempt.
+
+Either way, the loaded model can be cached as config + tokenizer files +
+memory-mappable weights (weight_cache.py); later loads of the same .nemo
+build the model from that instead of restoring the archive.
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+import yaml
+
+from evaluation.benchmarking.engine.cache import (cache_dir, file_sha256, nemo_version, publish_dir, read_json,
+                                                  write_json_atomic)
+
+DEFAULT_EXTRACT_BASE = "/mnt/data/tmp/nemo_extract"
+MAX_RETRIES = 10
+# Exported inference artifacts (export.py) may carry half-precision weights, noted in cfg.inference_dtype
+INFERENCE_DTYPES = {'bf16': 'bfloat16', 'fp16': 'float16'}
+# Modules cast to the inference dtype; the preprocessor (STFT, log-mel) always stays fp32
+CAST_MODULES = ('encoder', 'decoder', 'joint', 'ctc_decoder')
+
+
+def get_device(device=None):
+    import torch
+
+    if device is not None:
+        return torch.device(device)
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def apply_inference_dtype(model, device):
+    """
+    Cast the model to the half precision its config asks for (cfg.inference_dtype).
+    restore_from builds fp32 modules and copies the saved bf16/fp16 weights into
+    them; this brings them back down. fp16 stays fp32 on CPU (no fp16 conv kernels),
+    and is cast up explicitly: a weight cache entry written by a GPU load holds fp16
+    tensors, which load_state_dict(assign=True) installs as they are.
+    Returns the dtype name used, or None for a plain fp32 model.
+    """
+    import torch
+
+    cfg = getattr(model, 'cfg', None)
+    name = cfg.get('inference_dtype') if cfg is not None else None
+    if name not in INFERENCE_DTYPES:
+        return None
+    if name == 'fp16' and device.type == 'cpu':
+        print("   ℹ️  fp16 export on CPU: running in fp32")
+        name, dtype = None, torch.float32
+    else:
+        dtype = getattr(torch, INFERENCE_DTYPES[name])
+    for module_name in CAST_MODULES:
+        module = getattr(model, module_name, None)
+        if module is not None:
+            module.to(dtype)
+    return name
+
+
+def find_file_recursive(root_dir, extension=None, filename=None):
+    for root, dirs, files in os.walk(root_dir):
+        for file in files:
+            if filename and file == filename: return os.path.join(root, file)
+            if extension and file.endswith(extension): return os.path.join(root, file)
+    return None
+
+
+def prune_config_key(config, bad_key):
+    """Recursively delete a key from a nested dict."""
+    deleted = False
+    if isinstance(config, dict):
+        if bad_key in config:
+            del config[bad_key]
+            deleted = True
+        for k, v in config.items():
+            if prune_config_key(v, bad_key):
+                deleted = True
+    elif isinstance(config, list):
+        for item in config:
+            if prune_config_key(item, bad_key):
+                deleted = True
+    return deleted
+
+
+def extract_archive(model_path, extract_dir):
+    if tarfile.is_tarfile(model_path):
+        with tarfile.open(model_path, 'r:*') as tar: tar.extractall(path=extract_dir)
+    elif zipfile.is_zipfile(model_path):
+        with zipfile.ZipFile(model_path, 'r') as z: z.extractall(path=extract_dir)
+
+
+def prepare_override_config(extract_dir):
+    """Normalize tokenizer artifacts in extract_dir and return (config, override_path)."""
+    found_model = find_file_recursive(extract_dir, extension='.model')
+    target_model = os.path.join(extract_dir, 'tokenizer.model')
+    if found_model and found_model != target_model:
+        shutil.copy2(found_model, target_model)
+
+    found_vocab = find_file_recursive(extract_dir, filename='vocab.txt') or \
+                  find_file_recursive(extract_dir, extension='.vocab')
+    target_vocab = os.path.join(extract_dir, 'vocab.txt')
+    has_vocab = False
+    if found_vocab:
+        has_vocab = True
+        if found_vocab != target_vocab:
+            shutil.copy2(found_vocab, target_vocab)
+
+    config_path = find_file_recursive(extract_dir, filename='model_config.yaml') or \
+                  find_file_recursive(extract_dir, filename='model_config.json')
+    if not config_path: raise FileNotFoundError("model_config not found")
+
+    print(f"   🛠️  Preparing Config: {config_path}")
+    with open(config_path, 'r') as f:
+        try: config = yaml.safe_load(f)
+        except Exception: f.seek(0); config = json.load(f)
+
+    def basic_sanitize(obj):
+        if isinstance(obj, dict):
+            for k, v in list(obj.items()):
+                if k == 'tokenizer' and isinstance(v, dict):
+                    v['dir'] = extract_dir
+                    if v.get('type') in ['sentencepiece', 'google_sentencepiece', 'multilingual']:
+                        v['type'] = 'bpe'
+                    v['model_path'] = target_model
+                    if has_vocab: v['vocab_path'] = target_vocab
+                    elif 'vocab_path' in v: del v['vocab_path']
+                else: basic_sanitize(v)
+        elif isinstance(obj, list):
+            for item in obj: basic_sanitize(item)
+
+    basic_sanitize(config)
+
+    override_path = os.path.join(extract_dir, 'override_config.yaml')
+    with open(override_path, 'w') as f: yaml.dump(config, f)
+    return config, override_path
+
+
+def restore_with_healing(model_path, config, override_path, model_class=None):
+    """
+    restore_from in a loop, pruning deprecated config keys after each failure.
+
+    Returns (model, attempts, pruned_keys).
+    """
+    if model_class is None:
+        import nemo.collections.asr as nemo_asr
+        model_class = nemo_asr.models.ASRModel
+    print("   🔄 Instantiating ASR Model (Self-Healing Mode)...")
+    pruned = []
+    for attempt in range(MAX_RETRIES):
+        try:
+            model = model_class.restore_from(
+                restore_path=model_path,
+                override_config_path=override_path
+            )
+            print(f"   ✅ Success on attempt {attempt+1}!")
+            return model, attempt + 1, pruned
+        except Exception as e:
+            # Regex to catch "unexpected keyword argument 'xyz'"
+            match = re.search(r"unexpected keyword argument '([^']+)'", str(e))
+            if not match:
+                print(f"      ❌ Fatal Error on attempt {attempt+1}: {e}")
+                raise
+            bad_arg = match.group(1)
+            print(f"      ⚠️  Attempt {attempt+1} failed: Found deprecated argument '{bad_arg}'")
+            print(f"      ✂️  Pruning '{bad_arg}' from config and retrying...")
+            prune_config_key(config, bad_arg)
+            pruned.append(bad_arg)
+            with open(override_path, 'w') as f: yaml.dump(config, f)
+    raise RuntimeError("Exceeded max retries for model healing.")
+
+
+def heal_cache_key(model_path):
+    return f"{file_sha256(model_path)[:16]}-nemo{nemo_version()}"
+
+
+def load_model_robust(model_path, extract_base=DEFAULT_EXTRACT_BASE, model_class=None, use_cache=True):
+    """Self-healing load. Returns (model, info)."""
+    if not use_cache:
+        os.makedirs(extract_base, exist_ok=True)
+        extract_dir = tempfile.mkdtemp(dir=extract_base)
+        try:
+            print(f"   📦 Extracting to: {extract_dir}")
+            extract_archive(model_path, extract_dir)
+            config, override_path = prepare_override_config(extract_dir)
+            model, attempts, pruned = restore_with_healing(model_path, config, override_path, model_class)
+            return model, {'cache_hit': False, 'attempts': attempts, 'pruned_keys': pruned}
+        finally:
+            if os.path.exists(extract_dir): shutil.rmtree(extract_dir)
+
+    key = heal_cache_key(model_path)
+    entry_dir = os.path.join(cache_dir('healed_models'), key)
+    meta_path = os.path.join(entry_dir, 'meta.json')
+    override_path = os.path.join(entry_dir, 'override_config.yaml')
+    meta = read_json(meta_path)
+
+    if meta is not None:
+        print(f"   ♻️  Healed config cache hit: {entry_dir}")
+        with open(override_path, 'r') as f: config = yaml.safe_load(f)
+        model, attempts, pruned = restore_with_healing(model_path, config, override_path, model_class)
+        if pruned:
+            # NeMo changed underneath the same version string; keep the cache current
+            meta['pruned_keys'] = meta.get('pruned_keys', []) + pruned
+            write_json_atomic(meta_path, meta)
+        return model, {'cache_hit': True, 'cache_key': key, 'attempts': attempts,
+                       'pruned_keys': meta.get('pruned_keys', []),
+                       'cold_load_seconds': meta.get('cold_load_seconds')}
+
+    # Cold path: extract + heal in a per-process temp dir, then rename it into
+    # place, so concurrent workers never delete or read each other's half-built
+    # entries. The override config points at the entry's final location.
+    start = time.perf_counter()
+    tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        print(f"   📦 Extracting to: {tmp_dir}")
+        extract_archive(model_path, tmp_dir)
+        config, extracted_override = prepare_override_config(tmp_dir)
+        tmp_override = os.path.join(tmp_dir, 'override_config.yaml')
+        if extracted_override != tmp_override: shutil.move(extracted_override, tmp_override)
+        model, attempts, pruned = restore_with_healing(model_path, config, tmp_override, model_class)
+
+        # restore_from reads weights from the .nemo itself; only tokenizer + config are needed
+        for ckpt in glob.glob(os.path.join(tmp_dir, '**', '*.ckpt'), recursive=True):
+            os.remove(ckpt)
+        with open(tmp_override, 'r') as f: healed = f.read()
+        with open(tmp_override, 'w') as f: f.write(healed.replace(tmp_dir, entry_dir))
+        cold_seconds = round(time.perf_counter() - start, 3)
+        write_json_atomic(os.path.join(tmp_dir, 'meta.json'), {
+            'model_path': os.path.abspath(model_path),
+            'cache_key': key,
+            'nemo_version': nemo_version(),
+            'attempts': attempts,
+            'pruned_keys': pruned,
+            'cold_load_seconds': cold_seconds,
+        })
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    publish_dir(tmp_dir, entry_dir)
+    return model, {'cache_hit': False, 'cache_key': key, 'attempts': attempts,
+                   'pruned_keys': pruned, 'cold_load_seconds': cold_seconds}
+
+
+def load_model(model_path, robust=False, device=None, model_class=None,
+               extract_base=DEFAULT_EXTRACT_BASE, use_cache=True, weight_cache=None):
+    """
+    Load a .nemo model once, ready for inference (eval, frozen, on device).
+
+    Args:
+        robust: use the self-healing extraction + config pruning path
+        model_class: NeMo model class to restore with (default ASRModel)
+        use_cache: reuse/populate the healed-config cache (robust mode only)
+        weight_cache: load from / populate the memory-mapped weight cache
+                      (see weight_cache.py); None = on unless ASR_WEIGHT_CACHE=0
+
+    Returns:
+        (model, load_info) where load_info goes into the report's 'model_load' block.
+    """
+    from evaluation.benchmarking.engine import weight_cache as wc
+
+    print(f"\n🔧 Loading ASR model: {model_path}")
+    start = time.perf_counter()
+    info = {'mode': 'robust' if robust else 'plain'}
+    if weight_cache is None:
+        weight_cache = wc.enabled()
+    model = None
+    if weight_cache:
+        model, info['weight_cache'] = wc.load_cached_model(model_path)
+    if model is not None:
+        info['mode'] = 'weight_cache'
+    elif robust:
+        model, heal_info = load_model_robust(model_path, extract_base, model_class, use_cache)
+        info.update(heal_info)
+    else:
+        if model_class is None:
+            import nemo.collections.asr as nemo_asr
+            model_class = nemo_asr.models.ASRModel
+        model = model_class.restore_from(restore_path=model_path)
+    # Before the weight cache write, so a bf16/fp16 export is cached at half the size (an fp16 entry
+    # written on GPU and loaded on CPU is cast back up to fp32 by apply_inference_dtype)
+    info['dtype'] = apply_inference_dtype(model, get_device(device)) or 'fp32'
+    if weight_cache and info['mode'] != 'weight_cache' and not info['weight_cache'].get('unsupported'):
+        try:
+            info['weight_cache']['written'] = wc.write_weight_cache(model, model_path)['write_seconds']
+        except Exception as e:
+            print(f"   ⚠️  Could not write the weight cache: {e}")
+
+    model.eval()
+    model.freeze()
+    model = model.to(get_device(device))
+    info['load_seconds'] = round(time.perf_counter() - start, 3)
+    if info.get('cache_hit') and info.get('cold_load_seconds') is not None:
+        info['saved_seconds'] = round(info['cold_load_seconds'] - info['load_seconds'], 3)
+        print(f"   ⏱️  Loaded in {info['load_seconds']}s (cold load was {info['cold_load_seconds']}s)")
+    print(f"   ✅ Model loaded: {type(model).__name__}")
+    return model, info
@@ -0,0 +1,263 @@
+"""
+Multi-process sharded benchmark execution.
+
+On CPU evaluation boxes one process (one model, one intra-op thread pool)
+leaves most cores idle. Here a manifest is split into N shards (see
+data.load_manifest(shard=...)); each runs in its own spawned worker process
+with its own model copy and a capped thread count. The per-shard predictions
+are then merged back into manifest order; metrics are computed from the
+per-utterance counts the shards already aligned, not by re-aligning.
+
+Each worker loads its backend once and reuses it for every benchmark of the
+suite. Each shard keeps its own run log, so an interrupted run resumes shard
+by shard when re-run with the same worker count.
+
+Every sharded result carries the usual 'performance' block (rates over the
+makespan, stage times summed over shards, the largest per-worker peak RSS)
+and a 'parallel' block:
+
+    {"workers": 4, "threads_per_worker": 8, "wall_seconds": 120.4,
+     "makespan_seconds": 96.1, "utterances_per_second": 85.8, "rtfx": 431.2,
+     "load_balance": 0.97, "shards": [...per-shard performance...]}
+
+makespan_seconds is the slowest shard's inference time (model loading
+excluded), and utterances_per_second / rtfx are computed against it.
+load_balance is mean shard time / slowest shard time.
+
+Scaling efficiency needs a baseline, so run_scaling_sweep runs the same
+benchmark at several worker counts and reports throughput per count:
+
+    scaling_efficiency(n) = (throughput(n) / throughput(base)) / (n / base)
+"""
+
+import os
+import time
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluation.benchmarking.engine.data import validate_manifest
+from evaluation.benchmarking.engine.metrics import compute_metrics, utterance_counts
+from evaluation.benchmarking.engine.perf import benchmark_performance
+from evaluation.benchmarking.engine.predictions_io import iter_predictions, strip_suffixes, write_predictions
+from evaluation.benchmarking.engine.report import build_report, write_report
+from evaluation.benchmarking.engine.runner import run_benchmark
+from evaluation.benchmarking.engine.slices import merge_slices
+
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+# Per worker process: the backend built by make_backend, loaded on first use
+_worker_backend = None
+
+
+def default_threads_per_worker(num_workers):
+    return max(1, (os.cpu_count() or 1) // num_workers)
+
+
+def shard_path(predictions_path, k, n):
+    """'x/predictions.jsonl.gz' -> 'x/predictions.shard0of4.jsonl.gz'"""
+    stem = strip_suffixes(predictions_path)
+    return f"{stem}.shard{k}of{n}{predictions_path[len(stem):]}"
+
+
+# -------------------------
+# Worker side
+# -------------------------
+def limit_threads(threads):
+    """Cap intra-op threads; must happen before torch / numpy spin up their thread pools."""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _run_shard(make_backend, benchmark, path, shard, run_kwargs):
+    global _worker_backend
+    if _worker_backend is None:
+        _worker_backend = make_backend()
+    backend = _worker_backend
+    result = run_benchmark(backend, benchmark, path, shard=shard, **run_kwargs)
+    backend_info = {'backend': backend.name, 'config': backend.describe(), 'model_load': backend.load_info}
+    return result, backend_info
+
+
+def worker_pool(num_workers, threads_per_worker=None):
+    """Spawned (not forked) workers, so each gets a clean CUDA/OpenMP state."""
+    threads = threads_per_worker or default_threads_per_worker(num_workers)
+    return ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=limit_threads, initargs=(threads,))
+
+
+# -------------------------
+# Parent side
+# -------------------------
+def merge_shard_predictions(shard_paths, predictions_path, scored=None):
+    """
+    Merge per-shard prediction files (each in manifest order) into one, streaming.
+    Rows' per-utterance 'counts' are left out of the merged file; with `scored`
+    (a list), {'counts', 'error'} of every row is appended to it in order.
+    """
+    def rows():
+        streams = [iter_predictions(p) for p in shard_paths]
+        for row in heapq.merge(*streams, key=lambda r: r['index']):
+            counts = row.pop('counts', None)
+            if scored is not None:
+                # Shard files written before counts were kept: align these here
+                counts = counts or utterance_counts(row['ground_truth'], row['prediction'])
+                scored.append({'counts': counts, 'error': row.get('error')})
+            yield row
+
+    return write_predictions(rows(), predictions_path)
+
+
+def parallel_stats(shard_results, num_workers, threads_per_worker, wall_seconds):
+    shards = [r['performance'] for r in shard_results]
+    utterances = sum(s['utterances'] for s in shards)
+    audio_seconds = sum(s['audio_seconds'] for s in shards)
+    makespan = max(s['wall_seconds'] for s in shards)
+    mean_shard = sum(s['wall_seconds'] for s in shards) / len(shards)
+    return {
+        'workers': num_workers,
+        'threads_per_worker': threads_per_worker,
+        'wall_seconds': round(wall_seconds, 2),
+        'makespan_seconds': round(makespan, 2),
+        'utterances': utterances,
+        'audio_seconds': round(audio_seconds, 2),
+        'utterances_per_second': round(utterances / makespan, 2) if makespan > 0 else None,
+        'rtfx': round(audio_seconds / makespan, 2) if makespan > 0 and audio_seconds else None,
+        'load_balance': round(mean_shard / makespan, 4) if makespan > 0 else None,
+        'shards': shards,
+    }
+
+
+def merged_performance(parallel, merge_seconds):
+    """Per-benchmark 'performance' block for a sharded run."""
+    shards = parallel['shards']
+    stage_seconds = {}
+    for shard in shards:
+        for name, seconds in shard['stage_seconds'].items():
+            stage_seconds[name] = round(stage_seconds.get(name, 0) + seconds, 3)
+    stage_seconds['merge'] = round(merge_seconds, 3)
+    gpu = [s['peak_gpu_memory_mb'] for s in shards if s.get('peak_gpu_memory_mb') is not None]
+    return benchmark_performance(parallel['utterances'], parallel['audio_seconds'],
+                                 parallel['makespan_seconds'] + merge_seconds, stage_seconds=stage_seconds,
+                                 rss_mb=max((s['peak_rss_mb'] or 0) for s in shards) or None,
+                                 gpu_mb=max(gpu) if gpu else None)
+
+
+def run_benchmark_sharded(make_backend, benchmark, predictions_path, num_workers, pool,
+                          threads_per_worker=None, **run_kwargs):
+    """
+    Run one benchmark split over num_workers processes of `pool`.
+
+    Args:
+        make_backend: picklable zero-arg callable building the backend
+                      (e.g. functools.partial(cli.backend_from_args, args))
+
+    Returns (result, backend_info); result has the same shape as
+    runner.run_benchmark's plus a 'parallel' block.
+    """
+    result = {'name': benchmark['name'], 'manifest': benchmark['manifest']}
+    valid, msg = validate_manifest(benchmark['manifest'])
+    if not valid:
+        print(f"Skipping {benchmark['name']}: {msg}")
+        return {**result, 'status': 'skipped', 'error': msg}, None
+
+    threads = threads_per_worker or default_threads_per_worker(num_workers)
+    print(f"   🚀 Sharded inference: {os.path.basename(benchmark['manifest'])} "
+          f"({num_workers} workers x {threads} threads)")
+    paths = [shard_path(predictions_path, k, num_workers) for k in range(num_workers)]
+
+    start_time = time.perf_counter()
+    futures = [pool.submit(_run_shard, make_backend, benchmark, paths[k], (k, num_workers), run_kwargs)
+               for k in range(num_workers)]
+    outcomes = [f.result() for f in futures]
+    wall_seconds = time.perf_counter() - start_time
+
+    shard_results = [r for r, _ in outcomes]
+    backend_info = outcomes[0][1]
+    not_done = [r for r in shard_results if r.get('status') != 'completed']
+    if not_done:
+        errors = '; '.join(f"shard {k}: {r.get('error')}" for k, r in enumerate(shard_results)
+                           if r.get('status') != 'completed')
+        print(f"      ❌ {len(not_done)}/{num_workers} shard(s) did not complete (re-run to resume)")
+        return {**result, 'status': 'failed', 'error': errors}, backend_info
+
+    merge_start = time.perf_counter()
+    scored = []
+    merge_shard_predictions(paths, predictions_path, scored)
+    for path in paths:
+        os.remove(path)
+    metrics = compute_metrics(scored)
+    slices = merge_slices(r.get('slices') or [] for r in shard_results)
+    merge_seconds = time.perf_counter() - merge_start
+    parallel = parallel_stats(shard_results, num_workers, threads, wall_seconds + merge_seconds)
+    print(f"      ⏱️  {parallel['utterances_per_second']} utt/s | RTFx {parallel['rtfx']} "
+          f"| load balance {parallel['load_balance']}")
+    result = {**result, 'status': 'completed', 'predictions_path': predictions_path, 'metrics': metrics,
+              'slices': slices, 'performance': merged_performance(parallel, merge_seconds), 'parallel': parallel}
+    profiles = [r['profile'] for r in shard_results if r.get('profile')]
+    if profiles:
+        result['profile'] = {'shards': profiles}
+    return result, backend_info
+
+
+def run_suite_sharded(make_backend, benchmarks, output_dir, num_workers, threads_per_worker=None,
+                      model_name=None, report_path=None, predictions_ext='.jsonl', **run_kwargs):
+    """runner.run_suite, with every benchmark split over num_workers processes."""
+    print(f"\n📋 Found {len(benchmarks)} benchmark(s)")
+    results, backend_info = [], None
+    with worker_pool(num_workers, threads_per_worker) as pool:
+        for b in benchmarks:
+            predictions_path = os.path.join(output_dir, b['name'], f'predictions{predictions_ext}')
+            result, info = run_benchmark_sharded(make_backend, b, predictions_path, num_workers, pool,
+                                                 threads_per_worker=threads_per_worker, **run_kwargs)
+            results.append(result)
+            backend_info = backend_info or info
+
+    backend_info = backend_info or {}
+    report = build_report(model_name, backend_info.get('backend'), results, config=backend_info.get('config'),
+                          model_load=backend_info.get('model_load'))
+    write_report(report, report_path or os.path.join(output_dir, 'report.json'))
+    return report
+
+
+def run_scaling_sweep(make_backend, benchmark, output_dir, worker_counts, threads_per_worker=None,
+                      **run_kwargs):
+    """
+    Run one benchmark at each worker count (fresh pool each, no resume) and
+    report throughput and scaling efficiency relative to the smallest count.
+    """
+    worker_counts = sorted(set(worker_counts))
+    rows = []
+    for n in worker_counts:
+        print(f"\n🔁 Scaling sweep: {n} worker(s)")
+        predictions_path = os.path.join(output_dir, benchmark['name'], f'workers{n}', 'predictions.jsonl')
+        with worker_pool(n, threads_per_worker) as pool:
+            result, _ = run_benchmark_sharded(make_backend, benchmark, predictions_path, n, pool,
+                                              threads_per_worker=threads_per_worker,
+                                              **{**run_kwargs, 'resume': False})
+        if result.get('status') != 'completed':
+            rows.append({'workers': n, 'status': result.get('status'), 'error': result.get('error')})
+            continue
+        p = result['parallel']
+        rows.append({'workers': n, 'threads_per_worker': p['threads_per_worker'],
+                     'utterances_per_second': p['utterances_per_second'], 'rtfx': p['rtfx'],
+                     'load_balance': p['load_balance'], 'status': 'completed'})
+
+    completed = [r for r in rows if r['status'] == 'completed' and r['utterances_per_second']]
+    if completed:
+        base = completed[0]
+        for r in completed:
+            speedup = r['utterances_per_second'] / base['utterances_per_second']
+            r['speedup'] = round(speedup, 2)
+            r['scaling_efficiency'] = round(speedup / (r['workers'] / base['workers']), 4)
+
+    print(f"\n{'workers':>8} {'utt/s':>10} {'RTFx':>10} {'speedup':>8} {'efficiency':>11}")
+    for r in completed:
+        print(f"{r['workers']:>8} {r['utterances_per_second']:>10} {r['rtfx'] or '-':>10} "
+              f"{r['speedup']:>8} {r['scaling_efficiency']:>11.1%}")
+    return {'benchmark': benchmark['name'], 'rows': rows}
@@ -0,0 +1,149 @@
+"""
+Performance measurement for benchmark runs: per-stage timers, peak memory
+and the 'performance' blocks of the report (see report.py for the schema).
+
+Stage names used across the engine:
+
+    audio_load   reading + decoding audio files, or reading them from a shared
+                 audio store (manual-path backends, see audio_store.py)
+    feature      preprocessor (log-mel features)
+    feature_cache  reading / writing cached log-mel features (see feature_cache.py)
+    encoder      acoustic encoder
+    decoder      RNNT / CTC decoding (incl. in-process KenLM beam search)
+    lm_decode_wait  waiting on the KenLM beam-search pool (ctc_kenlm, lm_workers > 0)
+    transcribe   model.transcribe() as a whole (features..decoder inside NeMo)
+    api          external API round trips
+    metrics      per-utterance edit counts + corpus metrics
+    write        writing the run log and predictions file
+    merge        merging shard predictions (sharded runs)
+    other        time no stage accounts for
+"""
+
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Accumulates wall time per stage. `sync` (e.g. torch.cuda.synchronize) is
+    called around each stage so asynchronous GPU work is billed to the stage
+    that queued it. While a profiler step is running, `annotate` (e.g.
+    torch.profiler.record_function) labels each stage in the trace.
+    """
+
+    def __init__(self, sync=None):
+        self.seconds = defaultdict(float)
+        self.sync = sync
+        self.annotate = None
+
+    @contextmanager
+    def stage(self, name):
+        if self.sync:
+            self.sync()
+        start = time.perf_counter()
+        try:
+            if self.annotate is not None:
+                with self.annotate(name):
+                    yield
+            else:
+                yield
+        finally:
+            if self.sync:
+                self.sync()
+            self.seconds[name] += time.perf_counter() - start
+
+    def as_dict(self):
+        return {name: round(seconds, 3) for name, seconds in self.seconds.items()}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def proc_status_mb(field):
+    """A memory field of /proc/self/status (VmRSS, VmHWM, ...) in MB; None off Linux."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def peak_gpu_memory_mb():
+    """Peak CUDA memory allocated by torch, if torch is already in use."""
+    torch = sys.modules.get('torch')
+    if torch is None or not torch.cuda.is_available() or not torch.cuda.is_initialized():
+        return None
+    return round(torch.cuda.max_memory_allocated() / 2 ** 20, 1)
+
+
+def _rates(utterances, audio_seconds, wall_seconds):
+    return {
+        'utterances_per_second': round(utterances / wall_seconds, 2) if wall_seconds > 0 else None,
+        # Real-time factor: processing seconds per second of audio (lower is faster)
+        'rtf': round(wall_seconds / audio_seconds, 4) if audio_seconds else None,
+        # Inverse RTF: seconds of audio per processing second (higher is faster)
+        'rtfx': round(audio_seconds / wall_seconds, 2) if wall_seconds > 0 and audio_seconds else None,
+    }
+
+
+def benchmark_performance(utterances, audio_seconds, wall_seconds, stage_seconds=None, batching=None,
+                          rss_mb=None, gpu_mb=None, backend=None):
+    """The per-benchmark 'performance' block."""
+    return {
+        'utterances': utterances,
+        'audio_seconds': round(audio_seconds, 2),
+        'audio_hours': round(audio_seconds / 3600, 4),
+        'wall_seconds': round(wall_seconds, 2),
+        **_rates(utterances, audio_seconds, wall_seconds),
+        'stage_seconds': stage_seconds or {},
+        'peak_rss_mb': rss_mb if rss_mb is not None else peak_rss_mb(),
+        'peak_gpu_memory_mb': gpu_mb if gpu_mb is not None else peak_gpu_memory_mb(),
+        'batching': batching or {},
+        'backend': backend or {},
+    }
+
+
+def run_performance(benchmark_results, model_load=None):
+    """The report-level 'performance' block: totals over all benchmarks of a run."""
+    blocks = [r['performance'] for r in benchmark_results if r.get('performance')]
+    utterances = sum(b['utterances'] for b in blocks)
+    audio_seconds = sum(b['audio_seconds'] for b in blocks)
+    wall_seconds = sum(b['wall_seconds'] for b in blocks)
+    stage_seconds = defaultdict(float)
+    for b in blocks:
+        for name, seconds in b['stage_seconds'].items():
+            stage_seconds[name] += seconds
+    peaks = [b['peak_rss_mb'] for b in blocks if b.get('peak_rss_mb') is not None] + [peak_rss_mb() or 0]
+    gpu_peaks = [b['peak_gpu_memory_mb'] for b in blocks if b.get('peak_gpu_memory_mb') is not None]
+    return {
+        'utterances': utterances,
+        'audio_hours': round(audio_seconds / 3600, 4),
+        'wall_seconds': round(wall_seconds, 2),
+        **_rates(utterances, audio_seconds, wall_seconds),
+        'model_load_seconds': (model_load or {}).get('load_seconds'),
+        'stage_seconds': {name: round(seconds, 3) for name, seconds in stage_seconds.items()},
+        'peak_rss_mb': max(peaks) or None,
+        'peak_gpu_memory_mb': max(gpu_peaks) if gpu_peaks else peak_gpu_memory_mb(),
+    }
+
+
+def format_performance_line(performance):
+    line = (f"      ⏱️  {performance['utterances_per_second']} utt/s | RTF {performance['rtf']} "
+            f"| peak RSS {performance['peak_rss_mb']} MB")
+    efficiency = performance['batching'].get('padding_efficiency')
+    if efficiency is not None:
+        line += f" | padding efficiency {efficiency:.1%}"
+    return line
@@ -0,0 +1,185 @@
+"""
+Streaming reader/writer for benchmark prediction files.
+
+Rows are the usual prediction dicts:
+
+    {"audio_filepath": ..., "ground_truth": ..., "prediction": ..., "index": 0}
+
+The format is picked from the file extension:
+
+    predictions.jsonl        one JSON object per line (default)
+    predictions.jsonl.gz     same, gzip-compressed
+    predictions.jsonl.zst    same, zstd-compressed (pip install zstandard)
+    predictions.json         legacy JSON array
+
+Both directions stream row by row, so memory stays flat however many
+utterances a file holds; that includes reading the legacy JSON arrays.
+
+Convert old files with:
+
+    python scripts/convert_predictions.py predictions.json predictions.jsonl.zst
+"""
+
+import io
+import os
+import gzip
+import json
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+READ_CHUNK = 1 << 16
+
+
+def strip_suffixes(path):
+    """'x/predictions.jsonl.zst' -> 'x/predictions'"""
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    return os.path.splitext(path)[0]
+
+
+def is_legacy_json(path):
+    return path.endswith('.json')
+
+
+def open_text(path, mode='r'):
+    """Open a (possibly gzip/zstd compressed) text file for 'r' or 'w'."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard not installed. Install with: pip install zstandard")
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+# -------------------------
+# Reading
+# -------------------------
+def _iter_json_array(f):
+    """Yield the elements of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buf = f.read(READ_CHUNK).lstrip()
+    if not buf.startswith('['):
+        raise ValueError("Expected a JSON array")
+    buf = buf[1:]
+    eof = False
+    while True:
+        buf = buf.lstrip().lstrip(',').lstrip()
+        if buf.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buf)
+        except ValueError:
+            if eof:
+                raise
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf += chunk
+            continue
+        yield obj
+        buf = buf[end:]
+        if len(buf) < READ_CHUNK and not eof:
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf += chunk
+
+
+class _Prepend:
+    """File-like wrapper that re-emits already consumed characters first."""
+
+    def __init__(self, prefix, f):
+        self.prefix, self.f = prefix, f
+
+    def read(self, n=-1):
+        if self.prefix:
+            out, self.prefix = self.prefix, ''
+            return out + self.f.read(n - len(out) if n > 0 else -1)
+        return self.f.read(n)
+
+
+def iter_predictions(path):
+    """Yield prediction rows from any supported format."""
+    with open_text(path, 'r') as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        if not head:
+            return
+        if head == '[':
+            yield from _iter_json_array(_Prepend(head, f))
+            return
+        first = head + f.readline()
+        if first.strip():
+            yield json.loads(first)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_predictions(path):
+    """Convenience for small files and tools that need random access."""
+    return list(iter_predictions(path))
+
+
+# -------------------------
+# Writing
+# -------------------------
+class PredictionsWriter:
+    """
+    Context manager writing rows one at a time.
+
+        with PredictionsWriter("out/predictions.jsonl.gz") as w:
+            for row in rows:
+                w.write(row)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.legacy = is_legacy_json(path)
+        self.count = 0
+        self.f = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.f = open_text(self.path, 'w')
+        if self.legacy:
+            self.f.write('[')
+        return self
+
+    def write(self, row):
+        line = json.dumps(row, ensure_ascii=False)
+        if self.legacy:
+            self.f.write((',\n  ' if self.count else '\n  ') + line)
+        else:
+            self.f.write(line + '\n')
+        self.count += 1
+
+    def write_all(self, rows):
+        for row in rows:
+            self.write(row)
+        return self.count
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.legacy:
+            self.f.write('\n]\n' if self.count else ']\n')
+        self.f.close()
+        return False
+
+
+def write_predictions(rows, path):
+    with PredictionsWriter(path) as w:
+        w.write_all(rows)
+    return path
+
+
+def convert_predictions(src, dst):
+    """Re-encode a predictions file (e.g. legacy .json -> .jsonl.zst). Returns row count."""
+    with PredictionsWriter(dst) as w:
+        return w.write_all(iter_predictions(src))
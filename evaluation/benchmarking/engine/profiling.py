@@ -0,0 +1,340 @@
+"""
+Profiling of inference steps: torch profiler + Python stack sampling, under
+a hard overhead budget.
+
+A Profiler wraps units of work (a runner chunk of utterances, one server
+request) in step():
+
+    profiler = Profiler('out/kn_clean_read/profile', max_fraction=1.0, max_seconds=60)
+    with profiler.step(backend.timer):
+        backend.transcribe(entries)
+    profiler.write()
+
+A profiled step runs under torch.profiler (CPU + CUDA activities, no shapes
+or stacks, to keep its own cost down) while a background thread samples the
+stepping thread's Python stack, so both the slow ops and the NeMo module /
+function issuing them show up. Engine stages (StageTimer.stage) are
+annotated with record_function, so the trace is labelled audio_load,
+feature, encoder, decoder, ...
+
+The budget is what makes it safe to turn on in production: a step is only
+profiled if, with the expected cost of profiling it (the last step's), the
+time spent profiled stays under max_fraction of the wall time since the
+profiler was created and under max_seconds in total; any other step runs
+untouched. Profiled time includes collecting the step (op totals, Chrome
+trace export). Below max_fraction 1.0 the first step is never profiled, it
+only gives the estimate, so one long request can't blow the budget. The
+sampler also backs off (doubles its interval) whenever its own work exceeds
+max_sampler_overhead of the time it has run.
+
+Servers pass collect_executor (e.g. a one-thread ThreadPoolExecutor) so a
+profiled step's collection runs there instead of in the request.
+
+write() produces, in the output directory:
+
+    trace-<n>.json     Chrome trace of profiled step n (chrome://tracing,
+                       Perfetto), at most max_traces of them
+    stacks.folded      sampled Python stacks, "frame;frame;frame count" per
+                       line (flamegraph.pl / speedscope)
+    profile.json       top-N torch ops by self time and top-N Python frames
+                       (self and inclusive samples), steps profiled/skipped
+    profile.txt        the same top-N tables as text
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+DEFAULT_TOP_N = 25
+
+
+def _frame_label(code):
+    parts = code.co_filename.replace('\\', '/').split('/')
+    return f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a daemon thread."""
+
+    def __init__(self, interval=0.005, max_overhead=0.02):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.stacks = Counter()
+        self.samples = 0
+        self.busy_seconds = 0.0
+        self.run_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(thread_id,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, thread_id):
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            t0 = time.perf_counter()
+            frame = sys._current_frames().get(thread_id)
+            if self._stop.is_set():
+                # The step already finished; the thread is only waiting on us
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+            now = time.perf_counter()
+            self.busy_seconds += now - t0
+            # Back off if sampling costs more than its share of the time it has been running
+            if self.busy_seconds > self.max_overhead * (self.run_seconds + now - started):
+                self.interval = min(self.interval * 2, 1.0)
+        self.run_seconds += time.perf_counter() - started
+
+    def top_frames(self, n=DEFAULT_TOP_N):
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        total = self.samples or 1
+        as_rows = lambda counter: [{'frame': f, 'samples': c, 'share': round(c / total, 4)}
+                                   for f, c in counter.most_common(n)]
+        return {'self': as_rows(own), 'inclusive': as_rows(inclusive)}
+
+
+class Profiler:
+    """
+    Profiles step()s while the overhead budget allows (see module docstring).
+
+    Args:
+        max_fraction: at most this share of wall time (since creation) is
+                      spent in profiled steps; 1.0 profiles every step
+        max_seconds: total profiled time after which profiling stops
+        sample_probability: profile a step only with this probability (for
+                            servers: a random sample of requests)
+        torch_profiler: also run torch.profiler (off = Python sampling only)
+        collect_executor: run the collection of profiled steps there (its
+                          submit()) instead of at the end of the step
+    """
+
+    def __init__(self, output_dir, max_fraction=0.05, max_seconds=60.0, sample_probability=1.0,
+                 sample_interval=0.005, max_sampler_overhead=0.02, torch_profiler=True, max_traces=5,
+                 top_n=DEFAULT_TOP_N, collect_executor=None):
+        self.output_dir = output_dir
+        self.max_fraction = max_fraction
+        self.max_seconds = max_seconds
+        self.sample_probability = sample_probability
+        self.torch_profiler = torch_profiler
+        self.max_traces = max_traces
+        self.top_n = top_n
+        self.collect_executor = collect_executor
+        self.sampler = StackSampler(sample_interval, max_sampler_overhead)
+        self.ops = defaultdict(lambda: {'calls': 0, 'self_cpu_us': 0.0, 'self_device_us': 0.0})
+        self.started = time.perf_counter()
+        self.profiled_seconds = 0.0
+        self.steps = {'profiled': 0, 'skipped': 0}
+        self.traces = []
+        # Cost of the last step (profiled: including its collection), the estimate for the next one
+        self.last_step_seconds = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._active = False
+
+    def should_profile(self):
+        if self._active or self.profiled_seconds >= self.max_seconds:
+            return False
+        # A collection still running on collect_executor hasn't been counted yet
+        if any(not future.done() for future in self._pending):
+            return False
+        if self.sample_probability < 1.0:
+            import random
+            if random.random() >= self.sample_probability:
+                return False
+        if self.max_fraction >= 1.0:
+            return True
+        expected = self.last_step_seconds
+        if expected is None:
+            return False
+        # Profiled time, this step included, must stay within both budgets
+        elapsed = time.perf_counter() - self.started
+        return (self.profiled_seconds + expected <= self.max_seconds
+                and self.profiled_seconds + expected <= self.max_fraction * (elapsed + expected))
+
+    @contextmanager
+    def step(self, timer=None):
+        """Profile the enclosed work if the budget allows; timer stages get record_function labels."""
+        with self._lock:
+            profile = self.should_profile()
+            self._active = self._active or profile
+        if not profile:
+            self.steps['skipped'] += 1
+            start = time.perf_counter()
+            try:
+                yield False
+            finally:
+                self.last_step_seconds = time.perf_counter() - start
+            return
+
+        torch_prof, record_function = self._torch_profiler()
+        if timer is not None and record_function is not None:
+            timer.annotate = record_function
+        start = time.perf_counter()
+        self.sampler.start(threading.get_ident())
+        try:
+            with torch_prof or nullcontext():
+                yield True
+        finally:
+            self.sampler.stop()
+            if timer is not None:
+                timer.annotate = None
+            with self._lock:
+                self.steps['profiled'] += 1
+                n = self.steps['profiled']
+            if torch_prof is None:
+                self._add_profiled(time.perf_counter() - start)
+            elif self.collect_executor is not None:
+                self._add_profiled(time.perf_counter() - start)
+                self._pending.append(self.collect_executor.submit(self._collect, torch_prof, n))
+            else:
+                self._collect(torch_prof, n)
+                self._add_profiled(time.perf_counter() - start)
+            self._active = False
+
+    def _add_profiled(self, seconds, step=True):
+        with self._lock:
+            self.profiled_seconds += seconds
+            if step:
+                self.last_step_seconds = seconds
+            elif self.last_step_seconds is not None:
+                self.last_step_seconds += seconds
+
+    def _torch_profiler(self):
+        if not self.torch_profiler:
+            return None, None
+        torch = sys.modules.get('torch')
+        if torch is None:
+            return None, None
+        try:
+            from torch.profiler import ProfilerActivity, profile, record_function
+        except ImportError:
+            return None, None
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        return profile(activities=activities, record_shapes=False, profile_memory=False, with_stack=False), \
+            record_function
+
+    def _collect(self, prof, n):
+        """Op totals + Chrome trace of profiled step n; on an executor, its time is added when it's done."""
+        start = time.perf_counter()
+        events = prof.key_averages()
+        with self._lock:
+            for event in events:
+                op = self.ops[event.key]
+                op['calls'] += event.count
+                op['self_cpu_us'] += event.self_cpu_time_total
+                # self_cuda_time_total was renamed self_device_time_total in newer torch
+                op['self_device_us'] += getattr(event, 'self_device_time_total',
+                                                getattr(event, 'self_cuda_time_total', 0)) or 0
+            export = len(self.traces) < self.max_traces
+            if export:
+                path = os.path.join(self.output_dir, f"trace-{n}.json")
+                self.traces.append(path)
+        if export:
+            os.makedirs(self.output_dir, exist_ok=True)
+            prof.export_chrome_trace(path)
+        if self.collect_executor is not None:
+            self._add_profiled(time.perf_counter() - start, step=False)
+
+    def wait(self):
+        """Wait for collections still running on collect_executor."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️  Profile collection failed: {e}")
+
+    def top_ops(self, n=None):
+        with self._lock:
+            ops = [{'op': name, **stats} for name, stats in self.ops.items()]
+        rows = sorted(ops,
+                      key=lambda r: r['self_cpu_us'] + r['self_device_us'], reverse=True)
+        total = sum(r['self_cpu_us'] + r['self_device_us'] for r in rows) or 1
+        return [{'op': r['op'], 'calls': r['calls'], 'self_cpu_ms': round(r['self_cpu_us'] / 1000, 3),
+                 'self_device_ms': round(r['self_device_us'] / 1000, 3),
+                 'share': round((r['self_cpu_us'] + r['self_device_us']) / total, 4)}
+                for r in rows[:n or self.top_n]]
+
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        return {
+            'steps': dict(self.steps),
+            'profiled_seconds': round(self.profiled_seconds, 3),
+            'wall_seconds': round(wall, 3),
+            'profiled_fraction': round(self.profiled_seconds / wall, 4) if wall > 0 else None,
+            'budget': {'max_fraction': self.max_fraction, 'max_seconds': self.max_seconds,
+                       'sample_probability': self.sample_probability},
+            'ops': self.top_ops(),
+            'python': {'samples': self.sampler.samples, 'interval_ms': round(self.sampler.interval * 1000, 2),
+                       'sampler_busy_seconds': round(self.sampler.busy_seconds, 3),
+                       **self.sampler.top_frames(self.top_n)},
+            'traces': list(self.traces),
+        }
+
+    def write(self):
+        """Write stacks.folded, profile.json and profile.txt; returns the summary (with paths)."""
+        self.wait()
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary = self.summary()
+        stacks_path = os.path.join(self.output_dir, 'stacks.folded')
+        with open(stacks_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        summary['stacks_path'] = stacks_path
+        summary['summary_path'] = os.path.join(self.output_dir, 'profile.json')
+        with open(summary['summary_path'], 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        with open(os.path.join(self.output_dir, 'profile.txt'), 'w', encoding='utf-8') as f:
+            f.write(format_profile(summary))
+        return summary
+
+
+def format_profile(summary):
+    steps = summary['steps']
+    lines = [f"Profiled {steps['profiled']} step(s), skipped {steps['skipped']}: "
+             f"{summary['profiled_seconds']}s of {summary['wall_seconds']}s wall "
+             f"({(summary['profiled_fraction'] or 0):.1%})", ""]
+    if summary['ops']:
+        lines.append(f"{'op':<48} {'calls':>8} {'self CPU ms':>12} {'self dev ms':>12} {'share':>7}")
+        for r in summary['ops']:
+            lines.append(f"{r['op'][:48]:<48} {r['calls']:>8} {r['self_cpu_ms']:>12.1f} "
+                         f"{r['self_device_ms']:>12.1f} {r['share']:>7.1%}")
+        lines.append("")
+    python = summary['python']
+    if python['samples']:
+        lines.append(f"Python frames ({python['samples']} samples, inclusive)")
+        for r in python['inclusive']:
+            lines.append(f"{r['share']:>7.1%}  {r['frame']}")
+    return '\n'.join(lines).rstrip() + '\n'
+
+
+def profiler_from_options(output_dir, options):
+    """Profiler for a run, from the picklable options dict runners pass around (None = off)."""
+    if not options:
+        return None
+    return Profiler(output_dir, **options)
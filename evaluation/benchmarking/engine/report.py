@@ -0,0 +1,104 @@
+"""
+Report writing.
+
+Per-utterance predictions are written with predictions_io (JSONL by default).
+Every runner writes the same report schema:
+
+{
+  "schema_version": 2,
+  "timestamp": "...",
+  "model": "path/to/model.nemo",
+  "backend": "rnnt",
+  "config": {...backend options...},
+  "model_load": {"mode": "robust", "cache_hit": true, "load_seconds": 4.1,
+                 "cold_load_seconds": 19.8, "saved_seconds": 15.7, ...},
+  "performance": {"utterances": 2062, "audio_hours": 2.8917, "wall_seconds": 95.3,
+                  "utterances_per_second": 21.64, "rtf": 0.0092, "rtfx": 109.24,
+                  "model_load_seconds": 4.1, "stage_seconds": {...},
+                  "peak_rss_mb": 5321.4, "peak_gpu_memory_mb": 3012.7},
+  "benchmarks": [
+    {"name": "kn_clean_read", "manifest": "...", "status": "completed",
+     "predictions_path": "...",
+     "metrics": {"wer": 14.59, "cer": 2.86, "num_samples": 2062, "num_failed": 0,
+                 "wer_ci": [13.92, 15.31], "cer_ci": [2.64, 3.09], "ci_level": 0.95},
+     "slices": [{"field": "duration_bucket", "value": "<2s", "num_samples": 212,
+                 "audio_seconds": 301.5, "wer": 21.4, "cer": 5.02, "word_errors": 130,
+                 "ref_words": 607, "char_errors": 171, "ref_chars": 3406}, ...],
+     "performance": {"utterances": 2062, "audio_seconds": 10410.2, "audio_hours": 2.8917,
+                     "wall_seconds": 95.3, "utterances_per_second": 21.64, "rtf": 0.0092, "rtfx": 109.24,
+                     "stage_seconds": {"audio_load": 9.8, "feature": 3.1, "encoder": 52.7,
+                                       "decoder": 24.9, "metrics": 0.6, "write": 0.2},
+                     "peak_rss_mb": 5321.4, "peak_gpu_memory_mb": 3012.7,
+                     "batching": {"num_batches": 130, "mean_batch_size": 15.86,
+                                  "padding_efficiency": 0.9431},
+                     "backend": {...backend-specific, e.g. ctc_kenlm "lm_decode" pool throughput...}}}
+  ]
+}
+
+Every key above is always present; a value that can't be measured (GPU
+memory on CPU, batching for transcribe/api backends) is null or {}.
+wer_ci/cer_ci are percentile bootstrap intervals over utterances (see
+significance.py). slices break WER/CER down by manifest metadata (source,
+lang, department, duration bucket; see slices.py). Performance covers entries transcribed in this run, not
+ones resumed from an earlier one. Stage names are listed in perf.py. The
+report-level block sums the benchmarks; peak memory is the process peak.
+Runs with --profile add a "profile" block per benchmark (steps profiled,
+profiled seconds and the trace / summary paths; see profiling.py), and their
+performance numbers include the profiler's overhead.
+"""
+
+import os
+import json
+from datetime import datetime
+
+from evaluation.benchmarking.engine.history import record_run
+from evaluation.benchmarking.engine.perf import run_performance
+from evaluation.benchmarking.engine.slices import format_slice_table
+
+REPORT_SCHEMA_VERSION = 2
+
+
+def build_report(model, backend, benchmark_results, config=None, model_load=None):
+    return {
+        'schema_version': REPORT_SCHEMA_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'model': model,
+        'backend': backend,
+        'config': config or {},
+        'model_load': model_load,
+        'performance': run_performance(benchmark_results, model_load),
+        'benchmarks': benchmark_results,
+    }
+
+
+def format_summary_line(result):
+    metrics = result.get('metrics') or {}
+    wer_val, cer_val = metrics.get('wer'), metrics.get('cer')
+    num_samples = metrics.get('num_samples', 0)
+    if wer_val is None or cer_val is None:
+        return f"{result['name']}: WER: N/A | CER: N/A | Samples: {num_samples} ({result.get('status')})"
+    return f"{result['name']}: WER: {wer_val:.2f}% | CER: {cer_val:.2f}% | Samples: {num_samples}"
+
+
+def write_report(report, report_path, text_report_path=None):
+    """
+    Save the JSON report and a text summary (one line per benchmark, then
+    each benchmark's slice table), and record the run in the benchmark history (see history.py).
+    """
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if text_report_path is None:
+        text_report_path = os.path.join(os.path.dirname(report_path), 'report.txt')
+    with open(text_report_path, 'w', encoding='utf-8') as f:
+        for result in report['benchmarks']:
+            f.write(format_summary_line(result) + '\n')
+        for result in report['benchmarks']:
+            if result.get('slices'):
+                f.write(f"\n{result['name']} by slice:\n{format_slice_table(result['slices'])}\n")
+
+    print(f"\n📄 JSON report saved to: {report_path}")
+    print(f"📄 Text report saved to: {text_report_path}")
+    record_run(report_path)
+    return report_path
@@ -0,0 +1,201 @@
+"""
+Runs a backend over benchmark manifests and produces predictions + metrics.
+
+The model (if any) is owned by the backend, so it is loaded once per run and
+reused across every benchmark set.
+
+Each chunk of results is appended to a durable run log (see checkpoint.py)
+before the next chunk starts; re-running the same command resumes from it.
+"""
+
+import os
+import time
+
+from evaluation.benchmarking.engine.checkpoint import RunLog, entry_key
+from evaluation.benchmarking.engine.data import load_manifest, validate_manifest
+from evaluation.benchmarking.engine.metrics import RunningMetrics, compute_metrics, utterance_counts
+from evaluation.benchmarking.engine.perf import benchmark_performance, format_performance_line
+from evaluation.benchmarking.engine.predictions_io import write_predictions
+from evaluation.benchmarking.engine.profiling import profiler_from_options
+from evaluation.benchmarking.engine.report import build_report, write_report
+from evaluation.benchmarking.engine.slices import DEFAULT_SLICE_FIELDS, slice_metrics
+
+DEFAULT_SHARD_SIZE = 256
+
+
+def transcribe_entries(backend, entries):
+    """
+    Run the backend on entries; if a whole batch fails, retry entry by entry
+    so one corrupt file doesn't take the rest of the batch down with it.
+    """
+    try:
+        predictions = backend.transcribe(entries)
+        if len(predictions) != len(entries):
+            raise RuntimeError(f"Backend returned {len(predictions)} predictions for {len(entries)} entries")
+        return predictions
+    except Exception as e:
+        if len(entries) == 1:
+            print(f"   ❌ Failed on {entries[0]['audio_filepath']}: {e}")
+            return [e]
+        print(f"   ⚠️  Batch failed ({e}), retrying {len(entries)} entries one by one")
+        predictions = []
+        for entry in entries:
+            predictions.extend(transcribe_entries(backend, [entry]))
+        return predictions
+
+
+def make_result(entry, prediction):
+    row = {
+        'audio_filepath': entry['audio_filepath'],
+        'ground_truth': entry['text'],
+        'prediction': prediction,
+        'index': entry['index'],
+    }
+    if isinstance(prediction, Exception):
+        row['prediction'] = ""
+        row['error'] = str(prediction)
+    return row
+
+
+def run_benchmark(backend, benchmark, predictions_path, shard_size=DEFAULT_SHARD_SIZE,
+                  limit=None, subset_fraction=None, path_remap=None, resume=True, shard=None,
+                  slice_by=DEFAULT_SLICE_FIELDS, profile=None):
+    """
+    Run one benchmark manifest end-to-end.
+
+    Args:
+        resume: skip entries already finished in an earlier, interrupted run
+                with the same manifest + backend settings
+        shard: (k, n) to run only shard k of n (see data.load_manifest); the
+               shard's predictions keep their per-utterance 'counts' for
+               the parent to sum (see parallel.py)
+        slice_by: manifest fields to break WER/CER down by (see slices.py)
+        profile: Profiler options (see profiling.py) to profile shards of
+                 this run into <predictions dir>/profile[-shard<k>of<n>]/;
+                 None = off
+
+    Returns the per-benchmark result dict that goes into report['benchmarks'].
+    """
+    result = {'name': benchmark['name'], 'manifest': benchmark['manifest']}
+    valid, msg = validate_manifest(benchmark['manifest'])
+    if not valid:
+        print(f"Skipping {benchmark['name']}: {msg}")
+        return {**result, 'status': 'skipped', 'error': msg}
+
+    print(f"   🚀 Inference [{backend.name}]: {os.path.basename(benchmark['manifest'])}")
+    entries = load_manifest(benchmark['manifest'], limit=limit,
+                            subset_fraction=subset_fraction, path_remap=path_remap, shard=shard)
+
+    header = {'manifest': os.path.abspath(benchmark['manifest']), 'num_entries': len(entries),
+              'backend': backend.describe()}
+    # A shard's counts are summed by the parent; a full run's file holds predictions only
+    keep_counts = shard is not None
+    if shard is not None:
+        header['shard'] = list(shard)
+    log = RunLog(predictions_path, header, resume=resume)
+    done = log.done
+    running = RunningMetrics()
+    for row in done.values():
+        running.add(row['counts'])
+    todo = [e for e in entries if entry_key(e) not in done]
+    if backend.sort_by_duration:
+        # Similar lengths end up in the same chunk (and batch); rows are put
+        # back in manifest order when predictions are written
+        todo.sort(key=lambda e: e.get('duration') or 0, reverse=True)
+    if done:
+        print(f"      ♻️  Resuming: {len(done)} already done, {len(todo)} to go")
+    print(f"      Files to transcribe: {len(todo)}")
+
+    failed = {}
+    backend.reset_stats()
+    profiler = None
+    if profile:
+        profile_dir = os.path.join(os.path.dirname(predictions_path) or '.',
+                                   'profile' if shard is None else f"profile-shard{shard[0]}of{shard[1]}")
+        profiler = profiler_from_options(profile_dir, profile)
+    start_time = time.perf_counter()
+    try:
+        for start in range(0, len(todo), shard_size):
+            chunk = todo[start:start + shard_size]
+            if profiler is not None:
+                with profiler.step(backend.timer):
+                    predictions = transcribe_entries(backend, chunk)
+            else:
+                predictions = transcribe_entries(backend, chunk)
+            rows = []
+            with backend.timer.stage('metrics'):
+                for e, p in zip(chunk, predictions):
+                    row = make_result(e, p)
+                    row['key'] = entry_key(e)
+                    if row.get('error'):
+                        failed[row['key']] = row
+                    else:
+                        row['counts'] = utterance_counts(row['ground_truth'], row['prediction'])
+                        running.add(row['counts'])
+                        done[row['key']] = row
+                    rows.append(row)
+            with backend.timer.stage('write'):
+                log.append(rows)
+                log.write_progress(running, len(entries), len(failed))
+            print(f"      Processed {len(done) + len(failed)}/{len(entries)} | running WER: {running.as_dict()['wer']}%")
+    except Exception as e:
+        print(f"      ❌ Failed: {e} (progress kept in {log.path}; re-run to resume)")
+        return {**result, 'status': 'failed', 'error': str(e), 'partial_metrics': running.as_dict()}
+
+    def ordered_rows(keep_counts=False):
+        for e in entries:
+            row = done.get(entry_key(e)) or failed[entry_key(e)]
+            yield {k: v for k, v in row.items() if k != 'key' and (keep_counts or k != 'counts')}
+
+    with backend.timer.stage('write'):
+        write_predictions(ordered_rows(keep_counts), predictions_path)
+    with backend.timer.stage('metrics'):
+        # Counts computed during the run are reused; only failed rows get aligned here
+        for row in failed.values():
+            row['counts'] = utterance_counts(row['ground_truth'], row['prediction'])
+        metrics = compute_metrics(ordered_rows(keep_counts=True))
+        slices = slice_metrics(entries, [r['counts'] for r in ordered_rows(keep_counts=True)], slice_by or ())
+    performance = performance_stats(backend, todo, time.perf_counter() - start_time)
+    result = {**result, 'status': 'completed', 'predictions_path': predictions_path, 'metrics': metrics,
+              'slices': slices, 'performance': performance}
+    if profiler is not None:
+        summary = profiler.write()
+        print(f"      🔬 Profiled {summary['profiled_seconds']}s ({summary['steps']['profiled']} chunk(s)): "
+              f"{summary['summary_path']}")
+        result['profile'] = {k: summary[k] for k in ('steps', 'profiled_seconds', 'profiled_fraction',
+                                                     'summary_path', 'stacks_path', 'traces')}
+    return result
+
+
+def performance_stats(backend, processed, wall_seconds):
+    """
+    Performance of this run (entries resumed from an earlier run are not
+    counted). Audio seconds come from the backend's own sample counts when
+    it has them, else from manifest durations.
+    """
+    batching = backend.batching_stats()
+    audio_seconds = batching.pop('audio_seconds', None) or sum(e.get('duration') or 0 for e in processed)
+    stage_seconds = backend.timer.as_dict()
+    # Whatever no stage accounts for (backends without timers, runner bookkeeping)
+    stage_seconds['other'] = round(max(0.0, wall_seconds - sum(stage_seconds.values())), 3)
+    performance = benchmark_performance(len(processed), audio_seconds, wall_seconds,
+                                        stage_seconds=stage_seconds, batching=batching,
+                                        backend=backend.backend_stats())
+    if processed:
+        print(format_performance_line(performance))
+    return performance
+
+
+def run_suite(backend, benchmarks, output_dir, model_name=None, report_path=None,
+              predictions_ext='.jsonl', **run_kwargs):
+    """Run every benchmark with one backend and write a single report."""
+    print(f"\n📋 Found {len(benchmarks)} benchmark(s)")
+    results = []
+    for b in benchmarks:
+        predictions_path = os.path.join(output_dir, b['name'], f'predictions{predictions_ext}')
+        results.append(run_benchmark(backend, b, predictions_path, **run_kwargs))
+
+    report = build_report(model_name, backend.name, results, config=backend.describe(),
+                          model_load=backend.load_info)
+    write_report(report, report_path or os.path.join(output_dir, 'report.json'))
+    return report
@@ -0,0 +1,241 @@
+"""
+Async client for the Sarvam speech-to-text API.
+
+One aiohttp session (keep-alive connection pool) is shared by every request
+of a run; it lives on an event loop in a background thread, so the
+synchronous engine can call transcribe_files() once per shard while
+connections stay open between shards.
+
+- concurrency caps in-flight requests (and pooled connections)
+- a token bucket caps requests per second (rate_limit), so a big benchmark
+  doesn't walk into the API's own rate limit
+- 429, 5xx and connection errors are retried with exponential backoff and
+  full jitter, honouring Retry-After when the server sends it; other 4xx
+  fail straight away
+- successful responses are stored in ResponseCache, keyed by the sha256 of
+  the audio bytes + model + language code, so a rerun (or the same clip in
+  another manifest) never pays for the call again
+
+stats() reports requests, cache hits, retries, status codes and latency
+percentiles. evaluation/benchmarking/run/sarvam_standin_server.py serves the
+same endpoint locally (with latency and error injection) for offline load
+tests: point url at it.
+"""
+
+import os
+import time
+import random
+import asyncio
+import hashlib
+import threading
+
+from evaluation.benchmarking.engine.cache import cache_dir, read_json, write_json_atomic
+
+SARVAM_URL = "https://api.sarvam.ai/speech-to-text"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ResponseCache:
+    """
+    API responses on disk, one JSON file per (audio, model, language) under
+    $ASR_CACHE_DIR/sarvam/<key[:2]>/<key>.json.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or cache_dir('sarvam')
+
+    @staticmethod
+    def key(audio_bytes, model, language_code):
+        h = hashlib.sha256(audio_bytes)
+        h.update(f"\0{model}\0{language_code}".encode('utf-8'))
+        return h.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def get(self, key):
+        return read_json(self._file(key))
+
+    def put(self, key, response):
+        os.makedirs(os.path.join(self.path, key[:2]), exist_ok=True)
+        write_json_atomic(self._file(key), response)
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class SarvamClient:
+    def __init__(self, api_key, model="saarika:v2.5", language_code="kn-IN", url=SARVAM_URL,
+                 concurrency=16, rate_limit=None, max_retries=5, backoff_base=0.5, backoff_max=30.0,
+                 timeout=60.0, cache=True):
+        self.api_key = api_key
+        self.model = model
+        self.language_code = language_code
+        self.url = url
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = ResponseCache() if cache is True else (cache or None)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="sarvam-client", daemon=True)
+        self.thread.start()
+        self.session = None
+        self.semaphore = None
+        self.bucket = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.counters = {'requests': 0, 'cache_hits': 0, 'retries': 0, 'failures': 0}
+        self.statuses = {}
+        self.latencies = []
+
+    def stats(self):
+        return {
+            **self.counters,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+            'latency_p50_seconds': round(_percentile(self.latencies, 0.5), 3) if self.latencies else None,
+            'latency_p95_seconds': round(_percentile(self.latencies, 0.95), 3) if self.latencies else None,
+            'concurrency': self.concurrency,
+            'rate_limit': self.rate_limit,
+        }
+
+    async def _ensure_session(self):
+        if self.session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("aiohttp not found. Run: pip install aiohttp")
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"api-subscription-key": self.api_key})
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.bucket = TokenBucket(self.rate_limit) if self.rate_limit else None
+        return self.session
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def _post(self, audio_bytes, filename):
+        import aiohttp
+
+        session = await self._ensure_session()
+        for attempt in range(self.max_retries + 1):
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            form = aiohttp.FormData()
+            form.add_field('file', audio_bytes, filename=filename, content_type='audio/wav')
+            form.add_field('model', self.model)
+            form.add_field('language_code', self.language_code)
+
+            retry_after, error = None, None
+            start = time.perf_counter()
+            self.counters['requests'] += 1
+            try:
+                async with session.post(self.url, data=form) as response:
+                    self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+                    if response.status == 200:
+                        body = await response.json(content_type=None)
+                        self.latencies.append(time.perf_counter() - start)
+                        return body
+                    error = APIError(response.status, (await response.text())[:200])
+                    if response.status not in RETRY_STATUSES:
+                        raise error
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.statuses[type(e).__name__] = self.statuses.get(type(e).__name__, 0) + 1
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+            self.counters['retries'] += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def transcribe_file(self, audio_path):
+        """Transcript of one file (from the cache if this audio was sent before)."""
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError("File not found")
+        audio_bytes = await asyncio.to_thread(_read_bytes, audio_path)
+        key = self.cache.key(audio_bytes, self.model, self.language_code) if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.counters['cache_hits'] += 1
+                return cached.get('transcript', '')
+
+        await self._ensure_session()
+        async with self.semaphore:
+            response = await self._post(audio_bytes, os.path.basename(audio_path))
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, response)
+        # Sarvam API returns transcript in 'transcript' field
+        return response.get('transcript', '')
+
+    async def _transcribe_many(self, audio_paths):
+        async def one(path):
+            try:
+                return await self.transcribe_file(path)
+            except Exception as e:
+                self.counters['failures'] += 1
+                print(f"   ❌ API Error for {path}: {e}")
+                return e
+        return await asyncio.gather(*(one(path) for path in audio_paths))
+
+    def transcribe_files(self, audio_paths):
+        """Blocking: transcripts in input order; failed files come back as the Exception."""
+        return asyncio.run_coroutine_threadsafe(self._transcribe_many(audio_paths), self.loop).result()
+
+    def close(self):
+        if self.session is not None:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result()
+            self.session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
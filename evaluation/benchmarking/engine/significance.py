@@ -0,0 +1,138 @@
+"""
+Bootstrap confidence intervals and paired significance tests for WER/CER.
+
+Everything works on per-utterance count arrays (errors and reference
+lengths, see metrics.CorpusAlignment.count_array and the history DB), so no
+text is re-aligned. Resampling is vectorised: a [resamples, utterances]
+index matrix is drawn at once (in chunks that bound memory) and corpus WER
+for every resample is one gather + row sum (errors and lengths packed into
+one int64), so a 2k-utterance benchmark takes ~20 ms at 1000 resamples.
+
+- bootstrap_ci:      percentile CI of corpus WER (or CER) for one run
+- paired_bootstrap:  CI and two-sided p-value of WER(B) - WER(A), resampling
+                     the same utterances for both runs
+- sign_test:         exact two-sided sign test on per-utterance error counts
+                     (which run got more utterances better, ties dropped)
+
+Intervals and deltas are in percentage points, like the rest of the engine.
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_RESAMPLES = 1000
+DEFAULT_LEVEL = 0.95
+# Cap on index-matrix elements per chunk (int32: 64 MB)
+MAX_CHUNK_ELEMENTS = 1 << 24
+
+
+def _resampled_sums(pairs, n_resamples, seed):
+    """
+    Bootstrap sums of (numerator, denominator) count pairs over utterances.
+
+    pairs: list of (num, den) integer arrays of length n, all resampled with
+    the same indices. Returns a list of (num_sums, den_sums) float arrays of
+    length n_resamples.
+
+    Each pair is packed into one int64 (num << 32 | den) so a single gather
+    and row sum gives both sums; den totals must stay below 2**32.
+    """
+    n = len(pairs[0][0])
+    packed = [np.asarray(num, dtype=np.int64) * (1 << 32) + np.asarray(den, dtype=np.int64)
+              for num, den in pairs]
+    rng = np.random.default_rng(seed)
+    chunk = max(1, MAX_CHUNK_ELEMENTS // max(n, 1))
+    totals = [np.empty(n_resamples, dtype=np.int64) for _ in pairs]
+    for start in range(0, n_resamples, chunk):
+        stop = min(n_resamples, start + chunk)
+        idx = rng.integers(0, n, size=(stop - start, n), dtype=np.int32)
+        for column, total in zip(packed, totals):
+            total[start:stop] = column[idx].sum(axis=1)
+    sums = []
+    for total in totals:
+        den = total & 0xFFFFFFFF
+        sums.append((((total - den) >> 32).astype(np.float64), den.astype(np.float64)))
+    return sums
+
+
+def _ratio(num, den):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, num / np.where(den > 0, den, 1) * 100, np.nan)
+
+
+def _percentile_ci(rates, level, ndigits=2):
+    rates = rates[~np.isnan(rates)]
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(rates, [tail, 100 - tail])
+    return [round(float(low), ndigits), round(float(high), ndigits)]
+
+
+def bootstrap_ci(errors, lengths, n_resamples=DEFAULT_RESAMPLES, level=DEFAULT_LEVEL, seed=0):
+    """Percentile bootstrap CI [low, high] of sum(errors) / sum(lengths), in %."""
+    if len(errors) < 2 or not np.sum(lengths):
+        return None
+    (num, den), = _resampled_sums([(errors, lengths)], n_resamples, seed)
+    return _percentile_ci(_ratio(num, den), level)
+
+
+def metric_intervals(word_errors, ref_words, char_errors, ref_chars, n_resamples=DEFAULT_RESAMPLES,
+                     level=DEFAULT_LEVEL, seed=0):
+    """WER and CER bootstrap CIs (same resamples) for a report's 'metrics' block."""
+    if len(word_errors) < 2:
+        return {'wer_ci': None, 'cer_ci': None, 'ci_level': level}
+    (we, rw), (ce, rc) = _resampled_sums([(word_errors, ref_words), (char_errors, ref_chars)], n_resamples, seed)
+    return {
+        'wer_ci': _percentile_ci(_ratio(we, rw), level) if np.sum(ref_words) else None,
+        'cer_ci': _percentile_ci(_ratio(ce, rc), level) if np.sum(ref_chars) else None,
+        'ci_level': level,
+    }
+
+
+def paired_bootstrap(errors_a, errors_b, lengths, n_resamples=DEFAULT_RESAMPLES, level=DEFAULT_LEVEL, seed=0):
+    """
+    Paired bootstrap of WER(B) - WER(A) over the same utterances.
+
+    Returns {'delta', 'ci', 'p_value'}; p_value is two-sided: twice the
+    share of resamples whose delta falls on the other side of zero.
+    """
+    errors_a, errors_b, lengths = np.asarray(errors_a), np.asarray(errors_b), np.asarray(lengths)
+    total = lengths.sum()
+    if len(lengths) < 2 or not total:
+        return None
+    delta = float((errors_b.sum() - errors_a.sum()) / total * 100)
+    (num, den), = _resampled_sums([(errors_b - errors_a, lengths)], n_resamples, seed)
+    deltas = _ratio(num, den)
+    deltas = deltas[~np.isnan(deltas)]
+    p_value = min(1.0, 2 * min(np.mean(deltas <= 0), np.mean(deltas >= 0)))
+    return {'delta': round(delta, 4), 'ci': _percentile_ci(deltas, level, ndigits=4),
+            'p_value': round(float(p_value), 4)}
+
+
+def sign_test(errors_a, errors_b):
+    """
+    Exact two-sided sign test: is B better on more utterances than chance?
+    Returns {'better', 'worse', 'ties', 'p_value'} (better = fewer errors in B).
+    """
+    diff = np.asarray(errors_b) - np.asarray(errors_a)
+    better, worse = int((diff < 0).sum()), int((diff > 0).sum())
+    n, k = better + worse, min(better, worse)
+    if n == 0:
+        return {'better': 0, 'worse': 0, 'ties': int(len(diff)), 'p_value': 1.0}
+    # P(X <= k) for X ~ Binomial(n, 0.5), in log space so large n doesn't overflow
+    log_terms = [math.lgamma(n + 1) - math.lgamma(i + 1) - math.lgamma(n - i + 1) - n * math.log(2)
+                 for i in range(k + 1)]
+    peak = max(log_terms)
+    tail = math.exp(peak) * sum(math.exp(t - peak) for t in log_terms)
+    return {'better': better, 'worse': worse, 'ties': int(len(diff) - n),
+            'p_value': round(min(1.0, 2 * tail), 6)}
+
+
+def compare_runs(errors_a, errors_b, lengths, n_resamples=DEFAULT_RESAMPLES, level=DEFAULT_LEVEL,
+                 alpha=0.05, seed=0):
+    """Paired bootstrap + sign test; 'significant' when the bootstrap p-value is below alpha."""
+    bootstrap = paired_bootstrap(errors_a, errors_b, lengths, n_resamples, level, seed)
+    if bootstrap is None:
+        return None
+    return {**bootstrap, 'sign_test': sign_test(errors_a, errors_b), 'num_utterances': int(len(lengths)),
+            'significant': bootstrap['p_value'] < alpha}
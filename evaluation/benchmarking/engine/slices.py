@@ -0,0 +1,118 @@
+"""
+WER/CER sliced by manifest metadata, from per-utterance counts.
+
+Every utterance's edit counts (metrics.utterance_counts) are paired with its
+manifest entry, so any manifest field can be a slice: 'source', 'lang',
+'department' (call recordings), plus the derived 'duration_bucket'. Fields
+joined with '+' (e.g. 'source+duration_bucket') slice by the combination.
+
+Each field is one vectorised group-by: labels are factorised with
+np.unique and every count column is summed per group with np.bincount, so
+slicing never re-aligns text and costs the same however many slices there
+are. Fields no entry has are skipped.
+
+A slice row carries its raw counts, so slices from several shards of a run
+are merged by summing (merge_slices) and rates recomputed.
+"""
+
+import numpy as np
+
+DEFAULT_SLICE_FIELDS = ('source', 'lang', 'department', 'duration_bucket')
+# (upper bound in seconds, label); the last bucket is open-ended
+DURATION_BUCKETS = ((2, '<2s'), (5, '2-5s'), (10, '5-10s'), (20, '10-20s'), (None, '20s+'))
+COUNT_COLUMNS = ('word_errors', 'ref_words', 'char_errors', 'ref_chars')
+MISSING = '(none)'
+
+
+def duration_bucket(duration):
+    if duration is None:
+        return None
+    for upper, label in DURATION_BUCKETS:
+        if upper is None or duration < upper:
+            return label
+
+
+def slice_label(entry, field):
+    """One entry's label for a field ('a+b' joins labels); None if the entry lacks it."""
+    parts = []
+    for name in field.split('+'):
+        value = duration_bucket(entry.get('duration')) if name == 'duration_bucket' else entry.get(name)
+        if value is None or value == '':
+            return None
+        parts.append(str(value))
+    return ' / '.join(parts)
+
+
+def _rate(num, den):
+    return round(num / den * 100, 2) if den else None
+
+
+def _row(field, value, num_samples, audio_seconds, sums):
+    row = {'field': field, 'value': value, 'num_samples': int(num_samples),
+           'audio_seconds': round(float(audio_seconds), 2)}
+    row.update({k: int(v) for k, v in zip(COUNT_COLUMNS, sums)})
+    row['wer'] = _rate(row['word_errors'], row['ref_words'])
+    row['cer'] = _rate(row['char_errors'], row['ref_chars'])
+    return row
+
+
+def slice_metrics(entries, counts, fields=DEFAULT_SLICE_FIELDS):
+    """
+    Slice table for one benchmark.
+
+    entries: manifest entries; counts: their per-utterance count dicts, in
+    the same order. Returns rows sorted by field order, then WER (worst first).
+    """
+    if not entries:
+        return []
+    columns = np.array([[c[k] for k in COUNT_COLUMNS] for c in counts], dtype=np.int64)
+    durations = np.array([e.get('duration') or 0.0 for e in entries], dtype=np.float64)
+
+    rows = []
+    for field in fields:
+        labels = [slice_label(e, field) for e in entries]
+        if all(label is None for label in labels):
+            continue
+        values, groups = np.unique(np.array([MISSING if l is None else l for l in labels], dtype=object),
+                                   return_inverse=True)
+        n = len(values)
+        sizes = np.bincount(groups, minlength=n)
+        seconds = np.bincount(groups, weights=durations, minlength=n)
+        sums = np.stack([np.bincount(groups, weights=columns[:, j], minlength=n)
+                         for j in range(len(COUNT_COLUMNS))], axis=1)
+        field_rows = [_row(field, str(values[g]), sizes[g], seconds[g], sums[g]) for g in range(n)]
+        field_rows.sort(key=lambda r: (r['wer'] is None, -(r['wer'] or 0)))
+        rows.extend(field_rows)
+    return rows
+
+
+def merge_slices(tables):
+    """Merge slice tables of disjoint subsets (e.g. shards) by summing counts."""
+    merged, order = {}, []
+    for table in tables:
+        for r in table:
+            key = (r['field'], r['value'])
+            if key not in merged:
+                merged[key] = {'num_samples': 0, 'audio_seconds': 0.0, **{k: 0 for k in COUNT_COLUMNS}}
+                order.append(key)
+            m = merged[key]
+            for k in ('num_samples', 'audio_seconds') + COUNT_COLUMNS:
+                m[k] += r[k]
+    fields = list(dict.fromkeys(field for field, _ in order))
+    rows = [_row(field, value, m['num_samples'], m['audio_seconds'], [m[k] for k in COUNT_COLUMNS])
+            for (field, value), m in merged.items()]
+    rows.sort(key=lambda r: (fields.index(r['field']), r['wer'] is None, -(r['wer'] or 0)))
+    return rows
+
+
+def format_slice_table(rows):
+    """Plain-text table of a slice table (for report.txt and the console)."""
+    if not rows:
+        return ""
+    lines = [f"  {'slice':<18} {'value':<36} {'n':>7} {'hours':>7} {'WER':>7} {'CER':>7}"]
+    for r in rows:
+        wer = f"{r['wer']:.2f}" if r['wer'] is not None else '-'
+        cer = f"{r['cer']:.2f}" if r['cer'] is not None else '-'
+        lines.append(f"  {r['field'][:18]:<18} {r['value'][:36]:<36} {r['num_samples']:>7} "
+                     f"{r['audio_seconds'] / 3600:>7.2f} {wer:>7} {cer:>7}")
+    return '\n'.join(lines)
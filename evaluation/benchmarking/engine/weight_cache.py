@@ -0,0 +1,208 @@
+"""
+Memory-mappable weight cache for .nemo checkpoints.
+
+restore_from extracts the whole .nemo tarball to a temp dir and unpickles
+the state dict on every load. The first load of a checkpoint through
+models.load_model (weight_cache=True) instead leaves behind, in
+$ASR_CACHE_DIR/weights/<key>/:
+
+    model_config.yaml      the loaded model's config (after any healing)
+    override_config.yaml   the same, tokenizer paths pointing at this dir
+    tokenizer.model, ...   the archive's small artifacts (no weights)
+    weights.pt             the state dict, torch zip format, CPU tensors
+    meta.json              model class + versions; written last, so an entry
+                           without it is incomplete and gets rebuilt
+
+Later loads build the model from the cached config (no extraction) and map
+weights.pt with torch.load(mmap=True): tensors are backed by the file's
+pages, read lazily, and load_state_dict(assign=True) keeps them as the
+parameters instead of copying. Processes on the same host (sharded workers,
+matrix runs, server workers) share those pages through the page cache until
+a tensor is moved to another device.
+
+The key is the .nemo content hash + NeMo + torch versions, like the healed
+config cache in models.py. A checkpoint whose cached load fails (e.g. a
+model class that can't be rebuilt from its config) is marked unsupported and
+always loads the regular way. Disable with weight_cache=False or
+ASR_WEIGHT_CACHE=0.
+"""
+
+import os
+import time
+import shutil
+import tarfile
+import zipfile
+import importlib
+
+import yaml
+
+from evaluation.benchmarking.engine.cache import (cache_dir, file_sha256, nemo_version, publish_dir, read_json,
+                                                  write_json_atomic)
+from evaluation.benchmarking.engine.models import prepare_override_config
+
+CACHE_VERSION = 1
+WEIGHT_SUFFIXES = ('.ckpt', '.pt', '.pth', '.bin', '.safetensors')
+
+
+def enabled(default=True):
+    return os.environ.get("ASR_WEIGHT_CACHE", "1" if default else "0") != "0"
+
+
+def torch_version():
+    from importlib import metadata
+    try:
+        return metadata.version('torch')
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def weight_cache_key(model_path):
+    return f"{file_sha256(model_path)[:16]}-nemo{nemo_version()}-torch{torch_version()}"
+
+
+def entry_dir(model_path):
+    return os.path.join(cache_dir('weights'), weight_cache_key(model_path))
+
+
+def extract_artifacts(model_path, out_dir):
+    """Extract everything but the weights (tokenizers, vocab, config) from a .nemo archive."""
+    if tarfile.is_tarfile(model_path):
+        with tarfile.open(model_path, 'r:*') as tar:
+            members = [m for m in tar.getmembers() if not m.name.endswith(WEIGHT_SUFFIXES)]
+            tar.extractall(path=out_dir, members=members)
+    elif zipfile.is_zipfile(model_path):
+        with zipfile.ZipFile(model_path, 'r') as z:
+            z.extractall(path=out_dir, members=[n for n in z.namelist() if not n.endswith(WEIGHT_SUFFIXES)])
+
+
+def write_portable_config(model, model_path, out_dir, config=None):
+    """
+    The archive's tokenizer artifacts + the live model config (healed,
+    resolved, or `config` if given) in out_dir, tokenizer paths pointing
+    there. Returns (config, override_path) like prepare_override_config.
+    """
+    from omegaconf import OmegaConf
+
+    extract_artifacts(model_path, out_dir)
+    if config is None:
+        config = OmegaConf.to_container(model.cfg, resolve=True)
+    with open(os.path.join(out_dir, 'model_config.yaml'), 'w') as f:
+        yaml.dump(config, f)
+    if os.path.exists(os.path.join(out_dir, 'model_config.json')):
+        os.remove(os.path.join(out_dir, 'model_config.json'))
+    return prepare_override_config(out_dir)
+
+
+def _mmap_state_dict(path):
+    import torch
+    try:
+        return torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    except TypeError:
+        # torch < 2.1: no mmap; still skips the tar extraction
+        return torch.load(path, map_location='cpu')
+
+
+def _complete(path):
+    meta = read_json(os.path.join(path, 'meta.json'))
+    return meta is not None and meta.get('version') == CACHE_VERSION
+
+
+def write_weight_cache(model, model_path):
+    """
+    Cache a loaded model's config, tokenizer artifacts and weights. Returns the entry's meta.
+
+    Built in a per-process temp dir and renamed into place, so processes
+    loading the same checkpoint at once (sharded workers, matrix runs,
+    server workers) never see or delete each other's half-written entries.
+    """
+    import torch
+
+    start = time.perf_counter()
+    path = entry_dir(model_path)
+    if _complete(path):
+        # Another process wrote it while this one was restoring the .nemo
+        return read_json(os.path.join(path, 'meta.json'))
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        # The live config (healed, resolved) replaces the archive's
+        _, override_path = write_portable_config(model, model_path, tmp_path)
+        # Tokenizer paths must point at the entry's final location, not the temp dir
+        with open(override_path) as f:
+            override = f.read()
+        with open(override_path, 'w') as f:
+            f.write(override.replace(tmp_path, path))
+        state = {k: v.detach().cpu().contiguous() for k, v in model.state_dict().items()}
+        torch.save(state, os.path.join(tmp_path, 'weights.pt'))
+        meta = {
+            'version': CACHE_VERSION,
+            'model_path': os.path.abspath(model_path),
+            'model_class': f"{type(model).__module__}.{type(model).__name__}",
+            'nemo_version': nemo_version(),
+            'torch_version': torch_version(),
+            'num_tensors': len(state),
+            'weights_mb': round(os.path.getsize(os.path.join(tmp_path, 'weights.pt')) / 2 ** 20, 1),
+            'write_seconds': round(time.perf_counter() - start, 3),
+        }
+        write_json_atomic(os.path.join(tmp_path, 'meta.json'), meta)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    publish_dir(tmp_path, path, complete=_complete)
+    print(f"   💾 Weight cache written: {path} ({meta['weights_mb']} MB in {meta['write_seconds']}s)")
+    return meta
+
+
+def load_cached_model(model_path):
+    """
+    (model, info) from the weight cache, or (None, info) on a miss or an
+    unsupported checkpoint. info goes into load_info['weight_cache'].
+    """
+    path = entry_dir(model_path)
+    meta = read_json(os.path.join(path, 'meta.json'))
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return None, {'hit': False}
+    if meta.get('unsupported'):
+        return None, {'hit': False, 'unsupported': meta['unsupported']}
+
+    start = time.perf_counter()
+    try:
+        model = _build_from_cache(path, meta)
+    except OSError as e:
+        # Files gone or unreadable (e.g. the entry was replaced meanwhile): a plain miss this time
+        print(f"   ⚠️  Weight cache read failed ({e}); loading the .nemo instead")
+        return None, {'hit': False, 'error': str(e)[:500]}
+    except Exception as e:
+        # The model class can't be rebuilt from the cached config / weights: don't try again
+        print(f"   ⚠️  Weight cache load failed ({e}); loading the .nemo instead from now on")
+        try:
+            write_json_atomic(os.path.join(path, 'meta.json'), {**meta, 'unsupported': str(e)[:500]})
+        except OSError:
+            pass
+        return None, {'hit': False, 'unsupported': str(e)[:500]}
+    print(f"   ⚡ Weight cache hit: {path}")
+    return model, {'hit': True, 'path': path, 'load_seconds': round(time.perf_counter() - start, 3)}
+
+
+def _build_from_cache(path, meta):
+    from omegaconf import OmegaConf
+    from nemo.core.classes.modelPT import ModelPT
+
+    module_name, class_name = meta['model_class'].rsplit('.', 1)
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    cfg = OmegaConf.load(os.path.join(path, 'override_config.yaml'))
+    # As restore_from does: no train/validation dataloader setup, 'nemo:' artifacts resolve here
+    ModelPT._set_model_restore_state(is_being_restored=True, folder=path)
+    try:
+        model = model_class.from_config_dict(cfg)
+    finally:
+        ModelPT._set_model_restore_state(is_being_restored=False)
+
+    state = _mmap_state_dict(os.path.join(path, 'weights.pt'))
+    try:
+        # assign=True keeps the mapped tensors as parameters instead of copying into fresh ones
+        model.load_state_dict(state, strict=True, assign=True)
+    except TypeError:
+        model.load_state_dict(state, strict=True)
+    return model
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark History
+
+Query and backfill the local benchmark history (see
+evaluation/benchmarking/engine/history.py). New runs are recorded
+automatically when their report is written; use 'ingest' for older ones.
+
+# Backfill old results (reports, or bare predictions files)
+python evaluation/benchmarking/run/benchmark_history.py ingest models/results_conf_100m_v3
+python evaluation/benchmarking/run/benchmark_history.py ingest \
+models/results_conf_100m_v2/predictions.json --model-id conf_100m_v2 --benchmark kn_clean_read
+
+# List runs
+python evaluation/benchmarking/run/benchmark_history.py list --model conf_100m
+
+# Diff two runs (ids, 'latest', or a model id meaning its latest run).
+# Exits with status 1 if any benchmark regressed beyond the thresholds.
+# Each benchmark gets a paired bootstrap CI / p-value for ΔWER and a sign
+# test; --require-significance only flags WER rises that are significant.
+python evaluation/benchmarking/run/benchmark_history.py diff 12 latest \
+--wer-threshold 0.5 --throughput-threshold 10 --show 10
+python evaluation/benchmarking/run/benchmark_history.py diff conf_100m_v2 conf_100m_v3 --require-significance
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine import history
+
+
+def is_report(path):
+    """Reports are JSON objects; predictions files are arrays or JSONL."""
+    if not path.endswith('.json'):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(64).lstrip()
+    return head.startswith('{') and not head.startswith('{"audio_filepath"')
+
+
+def ingest(conn, args):
+    skipped = 0
+    for path in args.paths:
+        if os.path.isdir(path):
+            reports = sorted(str(p) for p in Path(path).rglob("*.json")
+                             if p.name == 'report.json' or p.name.startswith('benchmark_report'))
+            targets = reports or history.find_predictions_files(path)
+        else:
+            targets = [path]
+
+        for target in targets:
+            # One unreadable or malformed file shouldn't stop a directory sweep (each ingest is its own transaction)
+            try:
+                if is_report(target):
+                    run_id = history.ingest_report(target, model_id=args.model_id,
+                                                   benchmark_set=args.benchmark_set, conn=conn)
+                else:
+                    model_id = args.model_id or os.path.basename(os.path.abspath(path if os.path.isdir(path)
+                                                                                 else os.path.dirname(path)))
+                    run_id = history.ingest_predictions(target, model_id, benchmark=args.benchmark, conn=conn)
+            except Exception as e:
+                skipped += 1
+                print(f"  ⚠️  {target}: skipped ({type(e).__name__}: {e})")
+                continue
+            status = f"run {run_id}" if run_id is not None else "already ingested"
+            print(f"  {target}: {status}")
+    if skipped:
+        print(f"⚠️  {skipped} file(s) skipped")
+    return 1 if skipped else 0
+
+
+def list_runs(conn, args):
+    rows = history.list_runs(conn, model=args.model, limit=args.limit)
+    print(f"{'id':>5}  {'timestamp':<19}  {'model':<45} {'backend':<11} {'set':<6} {'#bench':>6}")
+    for r in rows:
+        print(f"{r['id']:>5}  {(r['timestamp'] or '')[:19]:<19}  {(r['model_id'] or '-')[:45]:<45} "
+              f"{(r['backend'] or '-'):<11} {(r['benchmark_set'] or '-'):<6} {r['num_benchmarks']:>6}")
+    return 0
+
+
+def fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def diff(conn, args):
+    run_a, run_b = history.resolve_run(conn, args.run_a), history.resolve_run(conn, args.run_b)
+    diffs = history.diff_benchmarks(conn, run_a, run_b, args.wer_threshold, args.throughput_threshold,
+                                    alpha=args.alpha, require_significance=args.require_significance)
+    if args.benchmark:
+        diffs = [d for d in diffs if d['name'] in args.benchmark]
+
+    print(f"\nRun {run_a} -> run {run_b}")
+    print("=" * 100)
+    print(f"{'benchmark':<32} {'WER A':>7} {'WER B':>7} {'ΔWER':>7} {'utt/s A':>9} {'utt/s B':>9} {'Δ%':>7}  flags")
+    for d in diffs:
+        flags = ', '.join(d['regressions'])
+        print(f"{d['name'][:32]:<32} {fmt(d['wer_a'], '.2f'):>7} {fmt(d['wer_b'], '.2f'):>7} "
+              f"{fmt(d['wer_delta'], '+.2f'):>7} {fmt(d['ups_a'], '.2f'):>9} {fmt(d['ups_b'], '.2f'):>9} "
+              f"{fmt(d['throughput_change_pct'], '+.1f'):>7}  {'⚠️  ' + flags if flags else ''}")
+
+    print(f"\nPaired tests over shared utterances (ΔWER = B - A, {(1 - args.alpha):.0%} bootstrap CI, * = p < {args.alpha}):")
+    print(f"{'benchmark':<32} {'n':>6} {'ΔWER':>8} {'CI':>18} {'p':>7} {'B better/worse':>15} {'sign p':>8}")
+    for d in diffs:
+        sig = d['significance']
+        if sig is None:
+            print(f"{d['name'][:32]:<32} {'-':>6}  (no per-utterance rows in one of the runs)")
+            continue
+        st = sig['sign_test']
+        ci = f"[{sig['ci'][0]:+.2f}, {sig['ci'][1]:+.2f}]"
+        print(f"{d['name'][:32]:<32} {sig['num_utterances']:>6} {sig['delta']:>+8.2f} {ci:>18} "
+              f"{sig['p_value']:>7.3f} {str(st['better']) + '/' + str(st['worse']):>15} {st['p_value']:>8.3f}"
+              f"{'  *' if sig['significant'] else ''}")
+
+    for d in diffs:
+        summary, regressed, improved = history.diff_utterances(conn, run_a, run_b, d['name'], limit=args.show)
+        if not summary['matched']:
+            continue
+        print(f"\n📝 {d['name']}: {summary['matched']} matched | {summary['regressed']} worse | "
+              f"{summary['improved']} better | {summary['unchanged']} unchanged")
+        for label, rows in (("Most regressed", regressed), ("Most improved", improved)):
+            if not rows or not args.show:
+                continue
+            print(f"  {label}:")
+            for r in rows:
+                print(f"    [{r['idx']}] {r['errors_a']} -> {r['errors_b']} errors")
+                print(f"      REF: {r['ground_truth']}")
+                print(f"      A:   {r['prediction_a']}")
+                print(f"      B:   {r['prediction_b']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'run_a': run_a, 'run_b': run_b, 'benchmarks': diffs}, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Diff saved to: {args.json}")
+
+    regressions = [d['name'] for d in diffs if d['regressions']]
+    if regressions:
+        print(f"\n❌ Regressions in: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions beyond thresholds")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark run history")
+    parser.add_argument("--db", type=str, default=None,
+                        help=f"History database (default: $ASR_HISTORY_DB or {history.DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Ingest reports / predictions files / results dirs")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--model-id", type=str, default=None, help="Override the model id")
+    p.add_argument("--benchmark-set", type=str, default=None, help="Benchmark set (e.g. v1)")
+    p.add_argument("--benchmark", type=str, default=None,
+                   help="Benchmark name for bare predictions files (default: parent dir name)")
+
+    p = sub.add_parser("list", help="List recorded runs")
+    p.add_argument("--model", type=str, default=None, help="Filter by model id substring")
+    p.add_argument("--limit", type=int, default=50)
+
+    p = sub.add_parser("diff", help="Compare two runs per benchmark and per utterance")
+    p.add_argument("run_a", help="Baseline: run id, 'latest', or model id")
+    p.add_argument("run_b", help="Candidate: run id, 'latest', or model id")
+    p.add_argument("--benchmark", type=str, nargs="+", default=None, help="Only these benchmarks")
+    p.add_argument("--wer-threshold", type=float, default=0.5, help="Flag WER increases above this (points)")
+    p.add_argument("--throughput-threshold", type=float, default=10.0,
+                   help="Flag utterances/s drops above this (percent)")
+    p.add_argument("--alpha", type=float, default=0.05, help="Significance level of the paired tests")
+    p.add_argument("--require-significance", action="store_true",
+                   help="Only flag WER rises whose paired bootstrap p-value is below --alpha")
+    p.add_argument("--show", type=int, default=5, help="Utterances to show per direction")
+    p.add_argument("--json", type=str, default=None, help="Also save the benchmark diff as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = history.connect(args.db)
+    try:
+        return {'ingest': ingest, 'list': list_runs, 'diff': diff}[args.command](conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+ASR Inference Autotuner
+
+Finds the batch size (seconds of audio per batch), intra-op thread count and
+worker count that give the best throughput for one model on this box, on a
+sample of a manifest, without running out of memory; see
+evaluation/benchmarking/engine/autotune.py.
+
+The recommendation is saved (per model hash + backend + hardware) to
+$ASR_AUTOTUNE_CONFIG, default $ASR_CACHE_DIR/autotune.json, where
+run_benchmark.py, run_matrix.py and inference/asr_server.py pick it up for
+any setting not given explicitly. The full sweep goes to --output as well.
+
+python evaluation/benchmarking/run/run_autotune.py \
+--model=training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo \
+--manifest evaluation/benchmarking/data/v1/kn_clean_read.json \
+--backend=rnnt --sample=256
+"""
+
+import os
+import sys
+import json
+import argparse
+from functools import partial
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.autotune import (DEFAULT_BATCH_SECONDS, DEFAULT_MEMORY_FRACTION,
+                                                     TUNING_BATCH_SIZE, autotune, sample_entries,
+                                                     save_tuned_config, tuned_entry)
+from evaluation.benchmarking.engine.backends import BACKENDS, HybridBackend, ManualPathBackend
+from evaluation.benchmarking.engine.cli import add_backend_args, backend_from_args
+from evaluation.benchmarking.engine.data import load_manifest, validate_manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Autotune batch size, threads and workers for a model")
+    parser.add_argument("--model", type=str, required=True, help="Path to .nemo model file")
+    parser.add_argument("--manifest", type=str, required=True, help="Manifest to sample utterances from")
+    parser.add_argument("--sample", type=int, default=256, help="Utterances per trial")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling seed")
+    parser.add_argument("--batch-seconds", type=float, nargs="+", default=list(DEFAULT_BATCH_SECONDS),
+                        help="max_batch_seconds values to try, smallest first")
+    parser.add_argument("--threads", type=int, nargs="+", default=None,
+                        help="CPU: intra-op thread counts to try (default: powers of two up to the CPU count)")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="CPU: worker process counts to try (default: 1 2 4 8 16 up to the CPU count)")
+    parser.add_argument("--memory-fraction", type=float, default=DEFAULT_MEMORY_FRACTION,
+                        help="Stop growing batches before peak memory would pass this fraction of RAM / GPU memory")
+    parser.add_argument("--config", type=str, default=None,
+                        help="Config file to save the recommendation to (default: $ASR_AUTOTUNE_CONFIG "
+                             "or $ASR_CACHE_DIR/autotune.json)")
+    parser.add_argument("--output", type=str, default=None, help="Also write the full sweep to this JSON file")
+    add_backend_args(parser, default_backend="rnnt", default_robust_load=True)
+    return parser.parse_args()
+
+
+def backend_factory(args, max_batch_seconds):
+    """Zero-arg factory (picklable) for worker-sweep processes at a given batch setting."""
+    worker_args = argparse.Namespace(**{**vars(args), 'batch_size': TUNING_BATCH_SIZE,
+                                        'max_batch_seconds': max_batch_seconds, 'feature_cache': False})
+    return partial(backend_from_args, worker_args)
+
+
+def main():
+    args = parse_args()
+    backend_cls = BACKENDS[args.backend]
+    if not issubclass(backend_cls, ManualPathBackend) or issubclass(backend_cls, HybridBackend):
+        print(f"❌ Autotuning needs a batched manual-path backend (rnnt, ctc, ctc_kenlm), not {args.backend}")
+        return 1
+    valid, msg = validate_manifest(args.manifest)
+    if not valid:
+        print(f"❌ {args.manifest}: {msg}")
+        return 1
+
+    # Tune from scratch: never start from a previous recommendation, never reuse cached features
+    args.autotune = False
+    args.feature_cache = False
+    args.batch_size = TUNING_BATCH_SIZE
+    entries = sample_entries(load_manifest(args.manifest), args.sample, seed=args.seed)
+    try:
+        backend = backend_from_args(args)
+    except Exception as e:
+        print(f"\n❌ FATAL ERROR: {e}")
+        return 1
+    try:
+        result = autotune(backend, entries, make_backend=partial(backend_factory, args),
+                          batch_seconds=args.batch_seconds, thread_counts=args.threads,
+                          worker_counts=args.workers, memory_fraction=args.memory_fraction)
+    except RuntimeError as e:
+        print(f"\n❌ {e}")
+        return 1
+    finally:
+        backend.close()
+
+    entry = tuned_entry(args.model, args.backend, result, len(entries))
+    config_path = save_tuned_config(entry, args.config)
+    best = result['best']
+    print(f"\n🏆 Recommended: {result['recommended']}")
+    print(f"   {best['utterances_per_second']} utt/s | RTFx {best['rtfx']} | peak {best['peak_memory_mb']} MB")
+    print(f"📄 Saved to: {config_path}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+        print(f"📄 Sweep saved to: {args.output}")
+    print("\n✅ Done.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,265 +1,128 @@
 #!/usr/bin/env python3
 """
-ASR Benchmark Runner - Self-Healing Version
-
-1. Auto-extracts and standardizes tokenizer paths.
-2. Auto-detects configuration mismatches (deprecated flags).
-3. If loading fails due to an "unexpected argument", it auto-removes the bad key and retries.
+ASR Benchmark Runner
+
+One entry point for every inference path (see evaluation/benchmarking/engine):
+
+    --backend transcribe   model.transcribe() batching (default)
+    --backend rnnt         manual preprocessor -> encoder -> RNNT greedy, batched
+    --backend ctc          manual path, CTC greedy
+    --backend ctc_kenlm    manual path, CTC + KenLM beam search
+    --backend hybrid       one encoder pass decoded by --decoders rnnt ctc [ctc_kenlm];
+                           separate predictions, metrics and reports per decoder
+    --backend api          Sarvam speech-to-text API
+
+The model is loaded once and reused across all benchmark sets. With
+--workers N each benchmark is split into N shards run by N worker processes
+(one model copy each); --scaling-sweep 1 2 4 8 measures throughput per
+worker count instead. Batch size, --max-batch-seconds, --workers and
+--threads-per-worker default to what run/run_autotune.py recommended for this
+model on this hardware, if it has been run (--no-autotune to ignore).
+
+python evaluation/benchmarking/run/run_benchmark.py \
+--model=training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo \
+--benchmark-set=v1 \
+--backend=rnnt \
+--output-dir=models/results_conf_100m_v3
+
+python evaluation/benchmarking/run/run_benchmark.py \
+--model=training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo \
+--benchmarks kn_clean_read --backend=ctc --limit=512 \
+--scaling-sweep 1 2 4 8 \
+--output-dir=models/scaling_cpu
 """
 
 import os
 import sys
-import argparse
 import json
-import tempfile
-import tarfile
-import shutil
-import zipfile
-import re
-import yaml
+import argparse
+from functools import partial
 from pathlib import Path
 
-# NeMo imports
-import nemo.collections.asr as nemo_asr
-from omegaconf import OmegaConf
-
-# Metrics imports
-try:
-    from jiwer import wer, cer
-    JIWER_AVAILABLE = True
-except ImportError:
-    JIWER_AVAILABLE = False
-    print("⚠️  Warning: jiwer not installed. Install with: pip install jiwer")
-
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 sys.path.append(str(PROJECT_ROOT))
 
+from evaluation.benchmarking.engine.backends import BACKENDS
+from evaluation.benchmarking.engine.cli import (add_backend_args, apply_tuned_config, backend_from_args,
+                                               profile_options)
+from evaluation.benchmarking.engine.data import benchmark_from_manifest, discover_benchmarks
+from evaluation.benchmarking.engine.hybrid import run_suite_hybrid
+from evaluation.benchmarking.engine.parallel import limit_threads, run_scaling_sweep, run_suite_sharded
+from evaluation.benchmarking.engine.runner import run_suite
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Run ASR benchmarks")
-    parser.add_argument("--model", type=str, required=True, help="Path to .nemo model file")
+    parser.add_argument("--model", type=str, default=None, help="Path to .nemo model file")
     parser.add_argument("--benchmark-set", type=str, default="v1", help="Benchmark version to run")
     parser.add_argument("--output-dir", type=str, required=True, help="Directory to save results")
     parser.add_argument("--benchmarks", type=str, nargs="+", default=None, help="Specific benchmarks to run")
-    parser.add_argument("--batch-size", type=int, default=16, help="Batch size")
-    return parser.parse_args()
-
-def discover_benchmarks(benchmark_dir, benchmark_set):
-    version_dir = os.path.join(benchmark_dir, benchmark_set)
-    if not os.path.exists(version_dir):
-        print(f"❌ Benchmark set '{benchmark_set}' not found at {version_dir}")
-        return []
-    benchmarks = []
-    for f in os.listdir(version_dir):
-        if f.endswith('.json'):
-            benchmarks.append({'name': f.replace('.json', ''), 'manifest': os.path.join(version_dir, f)})
-    return benchmarks
-
-def validate_benchmark_manifest(manifest_path):
-    if not os.path.exists(manifest_path): return False, "Manifest file not found"
-    try:
-        with open(manifest_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            if not lines: return False, "Manifest is empty"
-            first = json.loads(lines[0])
-            missing = [k for k in ['audio_filepath', 'text', 'duration'] if k not in first]
-            if missing: return False, f"Missing fields: {missing}"
-            return True, f"Valid ({len(lines)} entries)"
-    except Exception as e: return False, f"Error: {e}"
-
-def run_benchmark(model, manifest_path, output_dir, batch_size):
-    print(f"   🚀 Inference: {os.path.basename(manifest_path)}")
-    audio_files, ground_truths = [], []
-    with open(manifest_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                e = json.loads(line)
-                audio_files.append(e['audio_filepath'])
-                ground_truths.append(e['text'])
-    
-    try:
-        predictions = model.transcribe(audio_files, batch_size=batch_size)
-        if isinstance(predictions, tuple): predictions = predictions[0]
-        
-        results = []
-        for i, (audio, pred, truth) in enumerate(zip(audio_files, predictions, ground_truths)):
-            results.append({'audio_filepath': audio, 'ground_truth': truth, 'prediction': pred, 'index': i})
-        
-        out_path = os.path.join(output_dir, 'predictions.json')
-        with open(out_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        return {'status': 'completed', 'predictions_path': out_path}
-    except Exception as e:
-        print(f"      ❌ Failed: {e}")
-        return {'status': 'failed', 'error': str(e)}
-
-def compute_metrics(predictions_path):
-    if not JIWER_AVAILABLE: return {'wer': None, 'status': 'error', 'error': 'jiwer missing'}
-    try:
-        with open(predictions_path, 'r', encoding='utf-8') as f: results = json.load(f)
-        refs = [r['ground_truth'] for r in results]
-        hyps = [r['prediction'] for r in results]
-        w, c = wer(refs, hyps) * 100, cer(refs, hyps) * 100
-        print(f"      WER: {w:.2f}% | CER: {c:.2f}%")
-        return {'wer': round(w, 2), 'cer': round(c, 2), 'status': 'completed'}
-    except Exception as e: return {'status': 'failed', 'error': str(e)}
+    parser.add_argument("--manifest", type=str, nargs="+", default=None,
+                        help="Explicit manifest path(s); overrides --benchmark-set discovery")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Split each manifest over N worker processes, each with its own model copy "
+                             "(default: the autotuned count, else 1)")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Intra-op threads per worker (default: the autotuned count, else CPU count / workers)")
+    parser.add_argument("--scaling-sweep", type=int, nargs="+", default=None,
+                        help="Worker counts to benchmark throughput at (e.g. 1 2 4 8)")
+    add_backend_args(parser, default_robust_load=True)
+    args = parser.parse_args()
+    if BACKENDS[args.backend].needs_model and not args.model:
+        parser.error(f"--model is required for --backend {args.backend}")
+    return args
 
-def find_file_recursive(root_dir, extension=None, filename=None):
-    for root, dirs, files in os.walk(root_dir):
-        for file in files:
-            if filename and file == filename: return os.path.join(root, file)
-            if extension and file.endswith(extension): return os.path.join(root, file)
-    return None
-
-def prune_config_key(config, bad_key):
-    """Recursively delete a key from a nested dict."""
-    deleted = False
-    if isinstance(config, dict):
-        if bad_key in config:
-            del config[bad_key]
-            deleted = True
-        for k, v in config.items():
-            if prune_config_key(v, bad_key):
-                deleted = True
-    elif isinstance(config, list):
-        for item in config:
-            if prune_config_key(item, bad_key):
-                deleted = True
-    return deleted
 
 def main():
-    args = parse_args()
+    args = apply_tuned_config(parse_args())
     benchmark_data_dir = Path(__file__).parent.parent / "data"
     os.makedirs(args.output_dir, exist_ok=True)
-    
-    # Setup Temp Dir
-    extract_base = "/mnt/data/tmp/nemo_extract"
-    os.makedirs(extract_base, exist_ok=True)
-    extract_dir = tempfile.mkdtemp(dir=extract_base)
-    
-    print(f"\n🔧 Initializing Robust Model Load...")
-    
-    try:
-        # 1. EXTRACT ARCHIVE
-        print(f"   📦 Extracting to: {extract_dir}")
-        if tarfile.is_tarfile(args.model):
-            with tarfile.open(args.model, 'r:*') as tar: tar.extractall(path=extract_dir)
-        elif zipfile.is_zipfile(args.model):
-            with zipfile.ZipFile(args.model, 'r') as z: z.extractall(path=extract_dir)
-
-        # 2. LOCATE & NORMALIZE ARTIFACTS
-        found_model = find_file_recursive(extract_dir, extension='.model')
-        target_model = os.path.join(extract_dir, 'tokenizer.model')
-        if found_model and found_model != target_model:
-            shutil.copy2(found_model, target_model)
-
-        found_vocab = find_file_recursive(extract_dir, filename='vocab.txt') or \
-                      find_file_recursive(extract_dir, extension='.vocab')
-        target_vocab = os.path.join(extract_dir, 'vocab.txt')
-        has_vocab = False
-        if found_vocab:
-            has_vocab = True
-            if found_vocab != target_vocab:
-                shutil.copy2(found_vocab, target_vocab)
-
-        # 3. INITIAL CONFIG PREP
-        config_path = find_file_recursive(extract_dir, filename='model_config.yaml') or \
-                      find_file_recursive(extract_dir, filename='model_config.json')
-        if not config_path: raise FileNotFoundError("model_config not found")
-
-        print(f"   🛠️  Preparing Config: {config_path}")
-        with open(config_path, 'r') as f:
-            try: config = yaml.safe_load(f)
-            except: f.seek(0); config = json.load(f)
-
-        # Basic Sanitization (Paths)
-        def basic_sanitize(obj):
-            if isinstance(obj, dict):
-                for k, v in list(obj.items()):
-                    if k == 'tokenizer' and isinstance(v, dict):
-                        v['dir'] = extract_dir
-                        if v.get('type') in ['sentencepiece', 'google_sentencepiece', 'multilingual']:
-                            v['type'] = 'bpe'
-                        v['model_path'] = target_model
-                        if has_vocab: v['vocab_path'] = target_vocab
-                        elif 'vocab_path' in v: del v['vocab_path']
-                    else: basic_sanitize(v)
-            elif isinstance(obj, list):
-                for item in obj: basic_sanitize(item)
-        
-        basic_sanitize(config)
-        
-        override_path = os.path.join(extract_dir, 'override_config.yaml')
-        with open(override_path, 'w') as f: yaml.dump(config, f)
 
-        # 4. SELF-HEALING LOAD LOOP
-        model = None
-        MAX_RETRIES = 10
-        print("   🔄 Instantiating ASR Model (Self-Healing Mode)...")
-        
-        for attempt in range(MAX_RETRIES):
-            try:
-                model = nemo_asr.models.ASRModel.restore_from(
-                    restore_path=args.model,
-                    override_config_path=override_path
-                )
-                model.eval()
-                print(f"   ✅ Success on attempt {attempt+1}!")
-                break
-            except Exception as e:
-                err_str = str(e)
-                # Regex to catch "unexpected keyword argument 'xyz'"
-                match = re.search(r"unexpected keyword argument '([^']+)'", err_str)
-                
-                if match:
-                    bad_arg = match.group(1)
-                    print(f"      ⚠️  Attempt {attempt+1} failed: Found deprecated argument '{bad_arg}'")
-                    print(f"      ✂️  Pruning '{bad_arg}' from config and retrying...")
-                    
-                    # Prune from config object
-                    prune_config_key(config, bad_arg)
-                    
-                    # Update the override file
-                    with open(override_path, 'w') as f: yaml.dump(config, f)
-                else:
-                    print(f"      ❌ Fatal Error on attempt {attempt+1}: {e}")
-                    raise e
-        
-        if model is None:
-            raise RuntimeError("Exceeded max retries for model healing.")
+    if args.manifest:
+        benchmarks = [benchmark_from_manifest(m) for m in args.manifest]
+    else:
+        benchmarks = discover_benchmarks(str(benchmark_data_dir), args.benchmark_set)
+        if args.benchmarks: benchmarks = [b for b in benchmarks if b['name'] in args.benchmarks]
 
-        print(f"   ✅ Model loaded: {type(model).__name__}")
-        shutil.rmtree(extract_dir)
-
-    except Exception as e:
-        print(f"\n❌ FATAL ERROR: {e}")
-        if os.path.exists(extract_dir): shutil.rmtree(extract_dir)
-        return 1
-
-    # --- BENCHMARKING ---
-    benchmarks = discover_benchmarks(str(benchmark_data_dir), args.benchmark_set)
-    if args.benchmarks: benchmarks = [b for b in benchmarks if b['name'] in args.benchmarks]
-    
     if not benchmarks:
         print("❌ No benchmarks found.")
         return 1
 
-    print(f"\n📋 Found {len(benchmarks)} benchmark(s)")
-    results = []
-    for b in benchmarks:
-        valid, msg = validate_benchmark_manifest(b['manifest'])
-        if not valid:
-            print(f"Skipping {b['name']}: {msg}")
-            continue
-            
-        out_dir = os.path.join(args.output_dir, b['name'])
-        os.makedirs(out_dir, exist_ok=True)
-        res = run_benchmark(model, b['manifest'], out_dir, args.batch_size)
-        metrics = compute_metrics(res['predictions_path']) if res['status'] == 'completed' else {}
-        results.append({'name': b['name'], 'status': res['status'], 'metrics': metrics})
+    run_kwargs = {'limit': args.limit, 'subset_fraction': args.subset_fraction, 'resume': args.resume,
+                  'slice_by': args.slice_by, 'profile': profile_options(args)}
+    model_name = args.model if BACKENDS[args.backend].needs_model else f"{args.backend}:{args.api_model}"
+
+    if args.backend == "hybrid" and (args.scaling_sweep or args.workers > 1):
+        print("❌ --backend hybrid runs in a single process (no --workers / --scaling-sweep)")
+        return 1
 
-    report_path = os.path.join(args.output_dir, 'report.json')
-    with open(report_path, 'w') as f: json.dump({'results': results}, f, indent=2)
-    print(f"\n✅ Done. Report: {report_path}")
+    if args.scaling_sweep:
+        sweeps = [run_scaling_sweep(partial(backend_from_args, args), b, args.output_dir, args.scaling_sweep,
+                                    threads_per_worker=args.threads_per_worker, **run_kwargs)
+                  for b in benchmarks]
+        sweep_path = os.path.join(args.output_dir, 'scaling.json')
+        with open(sweep_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': model_name, 'backend': args.backend, 'sweeps': sweeps}, f, indent=2)
+        print(f"\n📄 Scaling report saved to: {sweep_path}")
+    elif args.workers > 1:
+        run_suite_sharded(partial(backend_from_args, args), benchmarks, args.output_dir, args.workers,
+                          threads_per_worker=args.threads_per_worker, model_name=model_name,
+                          predictions_ext=args.predictions_ext, **run_kwargs)
+    else:
+        if args.threads_per_worker:
+            limit_threads(args.threads_per_worker)
+        try:
+            backend = backend_from_args(args)
+        except Exception as e:
+            print(f"\n❌ FATAL ERROR: {e}")
+            return 1
+        try:
+            suite = run_suite_hybrid if args.backend == "hybrid" else run_suite
+            suite(backend, benchmarks, args.output_dir, model_name=model_name,
+                  predictions_ext=args.predictions_ext, **run_kwargs)
+        finally:
+            backend.close()
+    print("\n✅ Done.")
     return 0
 
 if __name__ == "__main__":
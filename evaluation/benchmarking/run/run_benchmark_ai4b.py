@@ -2,134 +2,39 @@
 """
 ASR Benchmark Runner (AI4Bharat Compatible)
 
-Runs ASR model evaluation against versioned benchmark datasets.
+Runs ASR model evaluation against a single benchmark manifest.
 Adapted for AI4Bharat IndicConformer models (Hybrid RNNT/CTC).
+
+Thin wrapper over the benchmark engine's 'transcribe' backend; equivalent to:
+
+    python run_benchmark.py --backend transcribe --decoder rnnt --lang-id kn --batch-size 1 ...
 """
 
 import os
 import sys
 import argparse
-import json
-import torch
 from pathlib import Path
-from datetime import datetime
-
-# NeMo imports
-import nemo.collections.asr as nemo_asr
-
-# Metrics imports
-try:
-    from jiwer import wer, cer
-    JIWER_AVAILABLE = True
-except ImportError:
-    JIWER_AVAILABLE = False
-    print("⚠️  Warning: jiwer not installed. Install with: pip install jiwer")
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.cli import backend_args, backend_from_args
+from evaluation.benchmarking.engine.data import benchmark_from_manifest
+from evaluation.benchmarking.engine.report import build_report, write_report
+from evaluation.benchmarking.engine.runner import run_benchmark
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Run ASR benchmarks")
     parser.add_argument("--model", type=str, required=True, help="Path to .nemo model file")
     parser.add_argument("--manifest", type=str, required=True, help="Path to manifest json")
     parser.add_argument("--output-dir", type=str, required=True, help="Directory to save results")
-    parser.add_argument("--batch-size", type=int, default=1, help="Batch size (Keep low for RNNT)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Batch size (default: the autotuned one, else 1; keep low for RNNT)")
     parser.add_argument("--decoder", type=str, default="rnnt", choices=["rnnt", "ctc"], help="Decoder type")
     parser.add_argument("--lang-id", type=str, default="kn", help="Language ID (e.g., 'kn', 'en', 'hi')")
     return parser.parse_args()
 
-def run_benchmark(model, manifest_path, output_dir, batch_size, lang_id):
-    """Run inference on a benchmark manifest"""
-    print(f"   🚀 Running inference: {os.path.basename(manifest_path)}")
-    
-    audio_files = []
-    ground_truths = []
-    
-    with open(manifest_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                entry = json.loads(line)
-                audio_files.append(entry['audio_filepath'])
-                ground_truths.append(entry.get('text', ""))
-    
-    print(f"      Files to transcribe: {len(audio_files)}")
-    
-    try:
-        # --- FIX: Pass audio_files as POSITIONAL argument (no keyword) ---
-        predictions = model.transcribe(
-            audio_files,
-            batch_size=batch_size,
-            language_id=lang_id
-        )
-        
-        # Handle tuple return (some versions return (texts, logits))
-        if isinstance(predictions, tuple):
-            predictions = predictions[0]
-        
-        # Save detailed results
-        predictions_path = os.path.join(output_dir, 'predictions.json')
-        results = []
-        for i, (audio, pred, truth) in enumerate(zip(audio_files, predictions, ground_truths)):
-            results.append({
-                'audio_filepath': audio,
-                'ground_truth': truth,
-                'prediction': pred,
-                'index': i
-            })
-        
-        with open(predictions_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        
-        print(f"      ✅ Transcription complete")
-        return {'status': 'completed', 'predictions_path': predictions_path}
-    
-    except Exception as e:
-        print(f"      ❌ Transcription failed: {e}")
-        return {'status': 'failed', 'error': str(e)}
-
-def compute_metrics(predictions_path):
-    """Compute WER/CER metrics"""
-    if not JIWER_AVAILABLE: return {'wer': None, 'cer': None, 'status': 'error', 'error': 'jiwer missing'}
-    try:
-        with open(predictions_path, 'r', encoding='utf-8') as f: results = json.load(f)
-        refs = [r['ground_truth'] for r in results]
-        hyps = [r['prediction'] for r in results]
-        
-        w = wer(refs, hyps) * 100
-        c = cer(refs, hyps) * 100
-        
-        print(f"      WER: {w:.2f}% | CER: {c:.2f}%")
-        return {'wer': round(w, 2), 'cer': round(c, 2), 'num_samples': len(results), 'status': 'completed'}
-    except Exception as e: return {'status': 'failed', 'error': str(e)}
-
-def generate_report(metrics, output_dir):
-    """Generate and save the summary report"""
-    # Save JSON report
-    report_path = os.path.join(output_dir, 'benchmark_report.json')
-    
-    report = {
-        'timestamp': datetime.now().isoformat(),
-        'metrics': metrics,
-        'status': 'completed' if metrics.get('status') == 'completed' else 'failed'
-    }
-    
-    with open(report_path, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
-    
-    # Save text report in the format requested
-    text_report_path = os.path.join(output_dir, 'report.txt')
-    wer_val = metrics.get('wer', 0)
-    cer_val = metrics.get('cer', 0)
-    num_samples = metrics.get('num_samples', 0)
-    
-    report_text = f"WER: {wer_val:.2f}% | CER: {cer_val:.2f}% | Samples: {num_samples}"
-    
-    with open(text_report_path, 'w', encoding='utf-8') as f:
-        f.write(report_text + '\n')
-    
-    print(f"\n📄 JSON report saved to: {report_path}")
-    print(f"📄 Text report saved to: {text_report_path}")
-
 def main():
     args = parse_args()
     
@@ -143,46 +48,22 @@ def main():
     os.makedirs(args.output_dir, exist_ok=True)
     
     # --- 1. Load Model ---
-    print("\n🔧 Loading ASR model...")
     try:
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        model = nemo_asr.models.ASRModel.restore_from(restore_path=args.model)
-        model.eval()
-        model = model.to(device)
-        
-        # Set AI4Bharat specific decoder
-        if hasattr(model, 'cur_decoder'):
-            model.cur_decoder = args.decoder
-            print(f"   ℹ️  Decoder set to: {model.cur_decoder}")
-            
-        print(f"   ✅ Model loaded: {type(model).__name__}")
+        backend = backend_from_args(backend_args("transcribe", args.model, default_batch_size=1,
+                                                 batch_size=args.batch_size, decoder=args.decoder,
+                                                 lang_id=args.lang_id))
     except Exception as e:
         print(f"   ❌ Failed to load model: {e}")
         return 1
     
-    # --- 2. Run Benchmark ---
-    benchmark_output_dir = os.path.join(args.output_dir, "results")
-    os.makedirs(benchmark_output_dir, exist_ok=True)
-    
-    res = run_benchmark(
-        model,
-        args.manifest,
-        benchmark_output_dir,
-        args.batch_size,
-        args.lang_id
-    )
-    
-    # --- 3. Compute Metrics & Generate Report ---
-    metrics = {}
-    if res['status'] == 'completed':
-        metrics = compute_metrics(res['predictions_path'])
-    else:
-        metrics = {'status': 'failed', 'error': res.get('error')}
+    # --- 2. Run Benchmark + Metrics ---
+    predictions_path = os.path.join(args.output_dir, "results", "predictions.jsonl")
+    result = run_benchmark(backend, benchmark_from_manifest(args.manifest), predictions_path)
     
-    # Save report to models directory
-    models_dir = os.path.join(PROJECT_ROOT, "models")
-    os.makedirs(models_dir, exist_ok=True)
-    generate_report(metrics, args.output_dir)
+    # --- 3. Generate Report ---
+    report = build_report(args.model, backend.name, [result], config=backend.describe(),
+                          model_load=backend.load_info)
+    write_report(report, os.path.join(args.output_dir, 'benchmark_report.json'))
     
     print("\n✅ Benchmark run complete!")
     return 0
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+ASR Cold-Start Benchmark
+
+Times, for each checkpoint, every step from a fresh Python process to the
+first transcription: torch / nemo.collections.asr imports, .nemo extraction,
+config instantiation, state-dict read + load, device transfer and first (and
+warm) inference; see evaluation/benchmarking/engine/coldstart.py. Each run
+is a new interpreter; --repeats runs per checkpoint give median/min/max.
+
+The JSON report is stable across runs, so startup regressions show up as a
+diff; --baseline compares against an earlier report and exits non-zero when
+a phase got slower than --regression-threshold.
+
+python evaluation/benchmarking/run/run_coldstart.py \
+--models 16m=training/models/conformer_16m.nemo \
+         100m_v3=training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo \
+--repeats 3 --output models/coldstart.json
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.coldstart import (DEFAULT_CLIP_SECONDS, compare_reports, format_coldstart,
+                                                      run_coldstart)
+from evaluation.benchmarking.engine.matrix import parse_model_spec
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark model restore + first inference from a cold process")
+    parser.add_argument("--models", type=str, nargs="+", default=None,
+                        help="Models as name=path/to/model.nemo (default: every training/models/*.nemo)")
+    parser.add_argument("--repeats", type=int, default=3, help="Cold starts per checkpoint")
+    parser.add_argument("--backend", type=str, default="rnnt", choices=["rnnt", "ctc"],
+                        help="Decoder used for the first inference")
+    parser.add_argument("--device", type=str, default=None, help="Device to load onto (default: cuda if available)")
+    parser.add_argument("--robust-load", action=argparse.BooleanOptionalAction, default=True,
+                        help="Restore with the cached healed config of the self-healing load")
+    parser.add_argument("--clip-seconds", type=float, default=DEFAULT_CLIP_SECONDS,
+                        help="Length of the synthetic clip transcribed by the first inference")
+    parser.add_argument("--audio", type=str, default=None, help="Transcribe this file instead of a synthetic clip")
+    parser.add_argument("--output", type=str, default="models/coldstart.json", help="Report path")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier report to check for regressions")
+    parser.add_argument("--regression-threshold", type=float, default=0.10,
+                        help="Relative slowdown of a phase median that counts as a regression")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    models = args.models or sorted(glob.glob(str(PROJECT_ROOT / "training" / "models" / "*.nemo")))
+    if not models:
+        print("❌ No checkpoints given or found in training/models/")
+        return 1
+    specs = [parse_model_spec(m) for m in models]
+
+    report = run_coldstart(specs, repeats=args.repeats, backend_name=args.backend, device=args.device,
+                           robust=args.robust_load, clip_seconds=args.clip_seconds, audio_path=args.audio)
+    print(f"\nMedian seconds per phase\n{format_coldstart(report)}")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📄 Cold-start report saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, threshold=args.regression_threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} startup regression(s) vs {args.baseline}:")
+            for r in regressions:
+                print(f"   {r['checkpoint']:<20} {r['phase']:<20} {r['baseline']:.3f}s -> {r['candidate']:.3f}s "
+                      f"(+{r['relative']:.0%})")
+            return 1
+        print(f"\n✅ No startup regressions vs {args.baseline}")
+    failed = [c['name'] for c in report['checkpoints'] if c.get('status') != 'completed']
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+ASR Inference Export
+
+Writes a slim inference-only .nemo: preprocessor, encoder and one decoding
+head (RNNT decoder + joint, or CTC) plus the tokenizer, without the training
+config, SpecAugment settings or the other head; optionally with bf16 / fp16
+encoder and head weights. See evaluation/benchmarking/engine/export.py.
+
+Unless --no-compare, the original and the export are then each loaded in a
+fresh process and compared (artifact size, load time, RSS, parameter bytes,
+output on a fixed clip); the report goes to <output>.export.json.
+
+python evaluation/benchmarking/run/run_export.py \
+--model=training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo \
+--head=rnnt --dtype=bf16 \
+--output=training/models/kathbath_hybrid_phase4_rnnt_bf16.nemo
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.coldstart import DEFAULT_CLIP_SECONDS
+from evaluation.benchmarking.engine.export import (DTYPES, compare_artifacts, export_inference_model, export_report,
+                                                   format_export)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export a slim inference-only .nemo with one decoding head")
+    parser.add_argument("--model", type=str, required=True, help="Path to the original .nemo model file")
+    parser.add_argument("--output", type=str, required=True, help="Path of the exported .nemo")
+    parser.add_argument("--head", type=str, default="rnnt", choices=["rnnt", "ctc"], help="Decoding head to keep")
+    parser.add_argument("--dtype", type=str, default="fp32", choices=list(DTYPES),
+                        help="Precision of the encoder + head weights (the preprocessor stays fp32)")
+    parser.add_argument("--robust-load", action=argparse.BooleanOptionalAction, default=True,
+                        help="Load the original with the self-healing load")
+    parser.add_argument("--compare", action=argparse.BooleanOptionalAction, default=True,
+                        help="Load both artifacts in fresh processes and report the reduction")
+    parser.add_argument("--device", type=str, default="cpu", help="Device the comparison loads onto")
+    parser.add_argument("--clip-seconds", type=float, default=DEFAULT_CLIP_SECONDS,
+                        help="Length of the synthetic clip both artifacts transcribe")
+    parser.add_argument("--audio", type=str, default=None, help="Transcribe this file instead of a synthetic clip")
+    parser.add_argument("--report", type=str, default=None, help="Report path (default: <output>.export.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if os.path.abspath(args.output) == os.path.abspath(args.model):
+        print("❌ --output must not overwrite --model")
+        return 1
+    try:
+        export_info = export_inference_model(args.model, args.output, head=args.head, dtype=args.dtype,
+                                             robust=args.robust_load)
+    except Exception as e:
+        print(f"\n❌ Export failed: {e}")
+        return 1
+    if not args.compare:
+        print("\n✅ Done.")
+        return 0
+
+    comparison = compare_artifacts(args.model, args.output, head=args.head, robust=args.robust_load,
+                                   device=args.device, clip_seconds=args.clip_seconds, audio_path=args.audio)
+    report = export_report(args.model, args.output, export_info, comparison, args.device, args.clip_seconds,
+                           args.audio)
+    print(f"\n{format_export(report)}")
+    report_path = args.report or f"{os.path.splitext(args.output)[0]}.export.json"
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📄 Export report saved to: {report_path}")
+    if not report['same_output']:
+        print("⚠️  The export transcribes the test clip differently from the original")
+    print("\n✅ Done.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ASR Benchmark Matrix Runner
+
+Runs several models over the same benchmark sets and writes one combined
+report (matrix.json / matrix.txt) with WER/CER and throughput per
+(model, benchmark) cell; see evaluation/benchmarking/engine/matrix.py.
+
+Every audio file is decoded and resampled once, into a memory-mapped store
+that all models read from (rnnt / ctc / ctc_kenlm backends), instead of
+once per model. --parallel-models N runs N models at once in separate
+processes, all sharing the store.
+
+Each model gets the same backend flags as run_benchmark.py, and its own
+predictions + report under <output-dir>/<model name>/.
+
+python evaluation/benchmarking/run/run_matrix.py \
+--models 16m=training/models/conformer_16m.nemo \
+         100m_v2=training/models/kathbath_hybrid_h200_scaleup_p3_phase3_final.nemo \
+         100m_v3=training/models/kathbath_hybrid_h200_scaleup_phase4_final.nemo \
+--benchmark-set=v1 --backend=rnnt \
+--output-dir=models/matrix_v1
+"""
+
+import os
+import sys
+import argparse
+from functools import partial
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.backends import BACKENDS, ManualPathBackend
+from evaluation.benchmarking.engine.cli import add_backend_args, backend_from_args, profile_options
+from evaluation.benchmarking.engine.data import benchmark_from_manifest, discover_benchmarks
+from evaluation.benchmarking.engine.matrix import parse_model_spec, run_matrix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run several ASR models over the same benchmarks")
+    parser.add_argument("--models", type=str, nargs="+", required=True,
+                        help="Models as name=path/to/model.nemo (or just the path)")
+    parser.add_argument("--benchmark-set", type=str, default="v1", help="Benchmark version to run")
+    parser.add_argument("--output-dir", type=str, required=True, help="Directory to save results")
+    parser.add_argument("--benchmarks", type=str, nargs="+", default=None, help="Specific benchmarks to run")
+    parser.add_argument("--manifest", type=str, nargs="+", default=None,
+                        help="Explicit manifest path(s); overrides --benchmark-set discovery")
+    parser.add_argument("--parallel-models", type=int, default=1,
+                        help="Models to run at once, each in its own process")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Intra-op threads per model process (default: CPU count / parallel models)")
+    parser.add_argument("--share-audio", action=argparse.BooleanOptionalAction, default=True,
+                        help="Decode each audio file once into a shared memory-mapped store")
+    parser.add_argument("--audio-store", type=str, default=None,
+                        help="Store directory (default: $ASR_CACHE_DIR/audio/<key of the audio files>)")
+    parser.add_argument("--rebuild-audio-store", action="store_true", help="Decode the audio again")
+    parser.add_argument("--decode-workers", type=int, default=None, help="Threads decoding audio into the store")
+    add_backend_args(parser, default_backend="rnnt", default_robust_load=True)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark_data_dir = Path(__file__).parent.parent / "data"
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.manifest:
+        benchmarks = [benchmark_from_manifest(m) for m in args.manifest]
+    else:
+        benchmarks = discover_benchmarks(str(benchmark_data_dir), args.benchmark_set)
+        if args.benchmarks: benchmarks = [b for b in benchmarks if b['name'] in args.benchmarks]
+
+    if not benchmarks:
+        print("❌ No benchmarks found.")
+        return 1
+    if args.backend == "hybrid":
+        print("❌ --backend hybrid isn't supported in a matrix; run one decoder backend per matrix")
+        return 1
+    if not BACKENDS[args.backend].needs_model:
+        print(f"❌ The {args.backend} backend has no model to compare; use run_benchmark.py")
+        return 1
+
+    specs = [parse_model_spec(m) for m in args.models]
+    names = [s['name'] for s in specs]
+    if len(set(names)) != len(names):
+        print(f"❌ Model names must be unique: {names}")
+        return 1
+
+    share_audio = args.share_audio and issubclass(BACKENDS[args.backend], ManualPathBackend)
+    if args.share_audio and not share_audio:
+        print(f"ℹ️  The {args.backend} backend reads audio files itself; not building a shared audio store")
+
+    # One copy of the parsed args per model, differing only in --model
+    model_backends = [(s, partial(backend_from_args, argparse.Namespace(**{**vars(args), 'model': s['model']})))
+                      for s in specs]
+    run_matrix(model_backends, benchmarks, args.output_dir, backend_name=args.backend,
+               parallel_models=args.parallel_models, threads_per_worker=args.threads_per_worker,
+               share_audio=share_audio, audio_store_path=args.audio_store,
+               rebuild_audio_store=args.rebuild_audio_store, decode_workers=args.decode_workers,
+               predictions_ext=args.predictions_ext, limit=args.limit, subset_fraction=args.subset_fraction,
+               resume=args.resume, slice_by=args.slice_by, profile=profile_options(args))
+    print("\n✅ Done.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
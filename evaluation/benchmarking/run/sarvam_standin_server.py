@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Sarvam Stand-in Server
+
+Local HTTP server with the same /speech-to-text contract as the Sarvam API
+(multipart 'file', 'model', 'language_code'; api-subscription-key header;
+JSON {'transcript': ...}), for load-testing the async client offline.
+
+It mimics the API's behaviour rather than its output:
+- per-request latency: a base plus a per-second-of-audio cost, with
+  log-normal jitter
+- a server-side rate limit: requests over --rate-limit per second get a 429
+  with a Retry-After header
+- injected 500/502/503 errors (--error-rate) and dropped connections
+  (--drop-rate)
+- transcripts come from --manifest (matched by file name) when given, so a
+  benchmark run against it reports a meaningful WER; otherwise empty
+
+Counters are served as JSON on GET /stats.
+
+python evaluation/benchmarking/run/sarvam_standin_server.py --port 8765 \
+--latency 0.3 --per-audio-second 0.05 --rate-limit 50 --error-rate 0.05 \
+--manifest evaluation/benchmarking/data/v1/kn_clean_read.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+# 16 kHz mono 16-bit PCM, after a 44-byte WAV header
+WAV_BYTES_PER_SECOND = 32000
+
+
+def load_transcripts(manifest_path):
+    if not manifest_path:
+        return {}
+    from evaluation.benchmarking.engine.data import load_manifest
+
+    return {os.path.basename(e['audio_filepath']): e['text'] for e in load_manifest(manifest_path)}
+
+
+class StandInAPI:
+    def __init__(self, args, transcripts):
+        self.args = args
+        self.transcripts = transcripts
+        self.recent = deque()
+        self.counters = {'requests': 0, 'ok': 0, 'rate_limited': 0, 'errors': 0, 'dropped': 0, 'bad_requests': 0}
+
+    def over_rate_limit(self):
+        if not self.args.rate_limit:
+            return False
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 1.0:
+            self.recent.popleft()
+        if len(self.recent) >= self.args.rate_limit:
+            return True
+        self.recent.append(now)
+        return False
+
+    async def speech_to_text(self, request):
+        from aiohttp import web
+
+        self.counters['requests'] += 1
+        if not request.headers.get('api-subscription-key'):
+            self.counters['bad_requests'] += 1
+            return web.json_response({'error': 'missing api-subscription-key'}, status=403)
+        if self.over_rate_limit():
+            self.counters['rate_limited'] += 1
+            return web.json_response({'error': 'rate limited'}, status=429, headers={'Retry-After': '1'})
+
+        form = await request.post()
+        upload = form.get('file')
+        if upload is None or not form.get('model') or not form.get('language_code'):
+            self.counters['bad_requests'] += 1
+            return web.json_response({'error': 'file, model and language_code are required'}, status=400)
+        audio_seconds = max(0, len(upload.file.read()) - 44) / WAV_BYTES_PER_SECOND
+
+        latency = (self.args.latency + self.args.per_audio_second * audio_seconds) \
+            * random.lognormvariate(0, self.args.jitter)
+        await asyncio.sleep(latency)
+
+        roll = random.random()
+        if roll < self.args.drop_rate:
+            self.counters['dropped'] += 1
+            request.transport.close()
+            return web.Response(status=500)
+        if roll < self.args.drop_rate + self.args.error_rate:
+            self.counters['errors'] += 1
+            return web.json_response({'error': 'injected failure'}, status=random.choice([500, 502, 503]))
+
+        self.counters['ok'] += 1
+        return web.json_response({
+            'request_id': f"standin-{self.counters['requests']}",
+            'transcript': self.transcripts.get(upload.filename, ''),
+            'language_code': form.get('language_code'),
+        })
+
+    async def stats(self, request):
+        from aiohttp import web
+
+        return web.json_response(self.counters)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Sarvam speech-to-text API")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--manifest", type=str, default=None, help="Serve these transcripts (matched by file name)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Base seconds per request")
+    parser.add_argument("--per-audio-second", type=float, default=0.05, help="Extra seconds per second of audio")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma applied to the latency")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 5xx")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of connections dropped")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    try:
+        from aiohttp import web
+    except ImportError:
+        print("❌ aiohttp not found. Run: pip install aiohttp")
+        return 1
+
+    args = parse_args()
+    random.seed(args.seed)
+    api = StandInAPI(args, load_transcripts(args.manifest))
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post('/speech-to-text', api.speech_to_text)
+    app.router.add_get('/stats', api.stats)
+    print(f"🧪 Sarvam stand-in on http://{args.host}:{args.port}/speech-to-text "
+          f"({len(api.transcripts)} transcripts, rate limit {args.rate_limit or 'off'}, "
+          f"error rate {args.error_rate}, drop rate {args.drop_rate})")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
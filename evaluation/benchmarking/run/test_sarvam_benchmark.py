@@ -3,18 +3,20 @@
 ASR Benchmark Runner for Sarvam API
 
 Runs ASR evaluation using Sarvam AI's speech-to-text API.
+Thin wrapper over the benchmark engine's 'api' backend (async client with
+rate limiting, retries and a response cache; see engine/sarvam_client.py).
+
+# Offline load test against the local stand-in server
+python evaluation/benchmarking/run/sarvam_standin_server.py --port 8765 --error-rate 0.05 &
+python evaluation/benchmarking/run/test_sarvam_benchmark.py --api-key dummy \
+--api-url http://127.0.0.1:8765/speech-to-text --max-workers 32 --no-response-cache
 """
 
 import os
 import sys
 import argparse
-import json
-import requests
 from pathlib import Path
-from datetime import datetime
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,13 +25,13 @@ load_dotenv()
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 sys.path.append(str(PROJECT_ROOT))
 
-# Metrics imports
-try:
-    from jiwer import wer, cer
-    JIWER_AVAILABLE = True
-except ImportError:
-    JIWER_AVAILABLE = False
-    print("⚠️  Warning: jiwer not installed. Install with: pip install jiwer")
+from evaluation.benchmarking.engine.backends import build_backend
+from evaluation.benchmarking.engine.data import benchmark_from_manifest
+from evaluation.benchmarking.engine.report import build_report, write_report
+from evaluation.benchmarking.engine.runner import run_benchmark
+
+# Manifests were generated on the training box; point them at this checkout
+PATH_REMAP = {"/mnt/data/asr-finetuning": PROJECT_ROOT}
 
 
 # -------------------------
@@ -51,198 +53,19 @@ def parse_args():
                         help="Sarvam model to use")
     parser.add_argument("--language-code", type=str, default="kn-IN",
                         help="Language code (e.g., kn-IN)")
+    parser.add_argument("--max-workers", type=int, default=5,
+                        help="Concurrent API requests")
+    parser.add_argument("--api-url", type=str, default=None,
+                        help="Endpoint (default: $SARVAM_API_URL or the Sarvam API)")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Max requests per second")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Retries on 429/5xx/connection errors")
+    parser.add_argument("--response-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="Reuse cached responses (keyed by audio hash + model + language)")
     return parser.parse_args()
 
 
-# -------------------------
-# Sarvam API
-# -------------------------
-def transcribe_with_sarvam(audio_path, api_key, model="saarika:v2.5", language_code="kn-IN"):
-    """
-    Transcribe audio using Sarvam API
-    """
-    url = "https://api.sarvam.ai/speech-to-text"
-    
-    headers = {
-        "api-subscription-key": api_key
-    }
-    
-    try:
-        with open(audio_path, 'rb') as audio_file:
-            files = {
-                'file': (os.path.basename(audio_path), audio_file, 'audio/wav')
-            }
-            data = {
-                'model': model,
-                'language_code': language_code
-            }
-            
-            response = requests.post(url, headers=headers, files=files, data=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            # Sarvam API returns transcript in 'transcript' field
-            return result.get('transcript', '')
-    
-    except requests.exceptions.RequestException as e:
-        print(f"   ❌ API Error for {audio_path}: {e}")
-        return ""
-    except Exception as e:
-        print(f"   ❌ Error processing {audio_path}: {e}")
-        return ""
-
-
-# -------------------------
-# Benchmark
-# -------------------------
-def transcribe_single(args):
-    """Helper function for concurrent transcription"""
-    idx, audio_path, truth, api_key, model, language_code = args
-    
-    # Check if audio file exists
-    if not os.path.exists(audio_path):
-        return {
-            "audio_filepath": audio_path,
-            "ground_truth": truth,
-            "prediction": "",
-            "index": idx,
-            "error": "File not found"
-        }
-    
-    # Transcribe
-    prediction = transcribe_with_sarvam(audio_path, api_key, model, language_code)
-    
-    return {
-        "audio_filepath": audio_path,
-        "ground_truth": truth,
-        "prediction": prediction,
-        "index": idx,
-    }
-
-
-def run_benchmark(manifest_path, api_key, model, language_code, output_dir, max_workers=5):
-    print("🚀 Running inference with Sarvam API")
-    print(f"   Manifest: {manifest_path}")
-    print(f"   Model: {model}")
-    print(f"   Language: {language_code}")
-    print(f"   Workers: {max_workers}")
-    print(f"   Output: {output_dir}")
-    
-    if not os.path.exists(manifest_path):
-        print(f"❌ Manifest not found: {manifest_path}")
-        return None
-    
-    # Load manifest
-    audio_files = []
-    ground_truths = []
-    
-    with open(manifest_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                entry = json.loads(line)
-                # Fix path: replace /mnt/data/asr-finetuning with actual project root
-                audio_path = entry["audio_filepath"]
-                if audio_path.startswith("/mnt/data/asr-finetuning"):
-                    audio_path = audio_path.replace("/mnt/data/asr-finetuning", str(PROJECT_ROOT))
-                audio_files.append(audio_path)
-                ground_truths.append(entry["text"])
-    
-    print(f"   Files to transcribe: {len(audio_files)}")
-    
-    # Prepare tasks
-    tasks = [
-        (idx, audio_path, truth, api_key, model, language_code)
-        for idx, (audio_path, truth) in enumerate(zip(audio_files, ground_truths))
-    ]
-    
-    results = []
-    completed = 0
-    lock = Lock()
-    
-    # Process with concurrent workers
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(transcribe_single, task): task for task in tasks}
-        
-        for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
-            
-            with lock:
-                completed += 1
-                if completed % 10 == 0 or completed == len(tasks):
-                    print(f"   Processed {completed}/{len(tasks)}")
-    
-    # Sort results by index to maintain order
-    results.sort(key=lambda x: x["index"])
-    
-    # Save predictions
-    os.makedirs(output_dir, exist_ok=True)
-    predictions_path = os.path.join(output_dir, "predictions.json")
-    
-    with open(predictions_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
-    
-    print("✅ Inference complete")
-    
-    return predictions_path
-
-
-# -------------------------
-# Metrics
-# -------------------------
-def compute_metrics(predictions_path):
-    print("📊 Computing metrics")
-    
-    if not JIWER_AVAILABLE:
-        return {"wer": None, "cer": None}
-    
-    with open(predictions_path, "r", encoding="utf-8") as f:
-        results = json.load(f)
-    
-    refs = [r["ground_truth"] for r in results]
-    hyps = [r["prediction"] for r in results]
-    
-    return {
-        "wer": round(wer(refs, hyps) * 100, 2),
-        "cer": round(cer(refs, hyps) * 100, 2),
-        "num_samples": len(results),
-    }
-
-
-def generate_report(metrics, output_dir):
-    """Generate benchmark report"""
-    # Save JSON report
-    report_path = os.path.join(output_dir, 'benchmark_report.json')
-    
-    report = {
-        'timestamp': datetime.now().isoformat(),
-        'metrics': metrics,
-        'model': 'sarvam-api'
-    }
-    
-    with open(report_path, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
-    
-    # Save text report
-    text_report_path = os.path.join(output_dir, 'report.txt')
-    wer_val = metrics.get('wer')
-    cer_val = metrics.get('cer')
-    num_samples = metrics.get('num_samples', 0)
-    
-    # Handle None values when jiwer is not available
-    if wer_val is None or cer_val is None:
-        report_text = f"WER: N/A | CER: N/A | Samples: {num_samples}"
-    else:
-        report_text = f"WER: {wer_val:.2f}% | CER: {cer_val:.2f}% | Samples: {num_samples}"
-    
-    with open(text_report_path, 'w', encoding='utf-8') as f:
-        f.write(report_text + '\n')
-    
-    print(f"\n📄 JSON report saved to: {report_path}")
-    print(f"📄 Text report saved to: {text_report_path}")
-    return report
-
-
 # -------------------------
 # Main
 # -------------------------
@@ -267,31 +90,40 @@ def main():
     # Convert relative path to absolute
     output_dir = os.path.join(PROJECT_ROOT, args.output_dir)
     
-    # Run inference
-    predictions_path = run_benchmark(
-        manifest_path=args.manifest,
-        api_key=api_key,
-        model=args.model,
-        language_code=args.language_code,
-        output_dir=output_dir,
-    )
-    
-    if not predictions_path:
+    backend = build_backend("api", api_key=api_key, api_model=args.model,
+                            language_code=args.language_code, max_workers=args.max_workers,
+                            api_url=args.api_url, rate_limit=args.rate_limit, max_retries=args.max_retries,
+                            response_cache=args.response_cache)
+    try:
+        result = run_benchmark(
+            backend,
+            benchmark_from_manifest(args.manifest),
+            os.path.join(output_dir, "predictions.jsonl"),
+            path_remap=PATH_REMAP,
+        )
+    finally:
+        backend.close()
+    if result['status'] != 'completed':
+        print(f"❌ {result.get('error')}")
         return 1
     
-    # Compute metrics
-    metrics = compute_metrics(predictions_path)
-    
+    metrics = result['metrics']
     print("\n" + "=" * 80)
     print("RESULTS")
     print("=" * 80)
     print(f"WER: {metrics['wer']}%")
     print(f"CER: {metrics['cer']}%")
     print(f"Samples: {metrics['num_samples']}")
+    api = (result.get('performance') or {}).get('backend', {}).get('api')
+    if api:
+        print(f"API:     {api['requests']} requests, {api['cache_hits']} cache hits, "
+              f"{api['retries']} retries, {api['failures']} failures, "
+              f"p50 {api['latency_p50_seconds']}s / p95 {api['latency_p95_seconds']}s")
     print("=" * 80)
     
     # Generate report
-    generate_report(metrics, output_dir)
+    report = build_report('sarvam-api', backend.name, [result], config=backend.describe())
+    write_report(report, os.path.join(output_dir, 'benchmark_report.json'))
     
     print("\n✅ Benchmark complete")
     return 0
@@ -1,17 +1,58 @@
 import os
+import sys
 import torch
 import librosa
-import nemo.collections.asr as nemo_asr
+import time
 import tempfile
+import threading
 import traceback  # <--- Added for detailed error logs
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from evaluation.benchmarking.engine.autotune import load_tuned_config
+from evaluation.benchmarking.engine.models import load_model as load_asr_model
+from evaluation.benchmarking.engine.profiling import Profiler
 
 # --- Configuration ---
-MODEL_PATH = "training/models/kathbath_hybrid_h200_scaleup_phase2_final.nemo" 
+# Model / bind address can be overridden from the environment (`python asr.py serve` sets these)
+MODEL_PATH = os.getenv("ASR_MODEL_PATH", "training/models/kathbath_hybrid_h200_scaleup_phase2_final.nemo")
+HOST = os.getenv("ASR_SERVER_HOST", "0.0.0.0")
+PORT = int(os.getenv("ASR_SERVER_PORT", "8001"))
 DEVICE_ID = 0 
 DEVICE = torch.device(f"cuda:{DEVICE_ID}" if torch.cuda.is_available() else "cpu")
 
+# Threads / workers recommended by evaluation/benchmarking/run/run_autotune.py for
+# this model on this hardware (ASR_AUTOTUNE=0 to ignore)
+def tuned_settings():
+    if os.getenv("ASR_AUTOTUNE", "1") == "0":
+        return {}
+    try:
+        tuned = load_tuned_config(MODEL_PATH, "rnnt")
+    except Exception as e:
+        print(f"⚠️  Could not read the autotune config: {e}")
+        return {}
+    return (tuned or {}).get("recommended") or {}
+
+TUNED = tuned_settings()
+
+# --- Profiling (admin only; disabled unless ASR_ADMIN_TOKEN is set) ---
+# POST /admin/profile starts a session that profiles a sample of requests, DELETE
+# stops it and writes traces + a top-N summary to ASR_PROFILE_DIR (see
+# evaluation/benchmarking/engine/profiling.py). With several uvicorn workers,
+# the session only runs in the worker that received the admin request.
+ADMIN_TOKEN = os.getenv("ASR_ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("ASR_PROFILE_DIR", "profiles")
+# Hard caps, whatever the admin asks for
+MAX_PROFILE_OVERHEAD = 0.10   # share of wall time spent in profiled requests
+MAX_PROFILE_WINDOW = 600      # seconds a profiling session may stay open
+# Collecting a profiled request (op totals, Chrome trace export) runs here, not in the request
+PROFILE_COLLECTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-collect")
+
 app = FastAPI(title="NeMo ASR Microservice")
 
 app.add_middleware(
@@ -23,21 +64,114 @@ app.add_middleware(
 )
 
 asr_model = None
+profiler = None
+profile_deadline = None
+last_profile = None
 
 @app.on_event("startup")
 def load_model():
     global asr_model
     print(f"🔧 Loading ASR model from {MODEL_PATH} on {DEVICE}...")
+    if TUNED.get("threads_per_worker") and DEVICE.type == "cpu":
+        torch.set_num_threads(TUNED["threads_per_worker"])
+        print(f"   Autotuned: {TUNED['threads_per_worker']} intra-op threads")
     try:
-        asr_model = nemo_asr.models.ASRModel.restore_from(MODEL_PATH)
-        asr_model.eval()
-        asr_model.freeze()
-        asr_model = asr_model.to(DEVICE)
+        # Restores the .nemo once, then maps cached weights on later starts (ASR_WEIGHT_CACHE=0 to disable)
+        asr_model, _ = load_asr_model(MODEL_PATH, device=DEVICE)
         print("✅ Model loaded successfully.")
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
         traceback.print_exc()
 
+def check_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ASR_ADMIN_TOKEN)")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def write_profile(session):
+    global last_profile
+    last_profile = session.write()
+    print(f"🔬 Profile written: {last_profile['summary_path']} "
+          f"({last_profile['steps']['profiled']} request(s) profiled)")
+    return last_profile
+
+def finish_profiling():
+    global profiler, profile_deadline
+    if profiler is None:
+        return last_profile
+    session, profiler, profile_deadline = profiler, None, None
+    return write_profile(session)
+
+def active_profiler():
+    """The running profiler, or None; a session past its deadline is ended and written in the background."""
+    global profiler, profile_deadline
+    if profiler is not None and time.time() > profile_deadline:
+        session, profiler, profile_deadline = profiler, None, None
+        # Not on PROFILE_COLLECTOR: write() waits for the collections queued there
+        threading.Thread(target=write_profile, args=(session,), daemon=True).start()
+    return profiler
+
+@app.post("/admin/profile")
+def start_profiling(duration: float = 60.0, sample_rate: float = 0.1, max_overhead: float = 0.02,
+                    max_seconds: float = 30.0, x_admin_token: str = Header(None)):
+    """Profile a random sample of requests for `duration` seconds (torch profiler + Python stacks)."""
+    global profiler, profile_deadline
+    check_admin(x_admin_token)
+    if active_profiler() is not None:
+        raise HTTPException(status_code=409, detail="A profiling session is already running")
+    output_dir = os.path.join(PROFILE_DIR, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    profiler = Profiler(output_dir, max_fraction=min(max(max_overhead, 0.0), MAX_PROFILE_OVERHEAD),
+                        max_seconds=max_seconds, sample_probability=min(max(sample_rate, 0.0), 1.0),
+                        collect_executor=PROFILE_COLLECTOR)
+    profile_deadline = time.time() + min(duration, MAX_PROFILE_WINDOW)
+    print(f"🔬 Profiling {profiler.sample_probability:.0%} of requests for {min(duration, MAX_PROFILE_WINDOW):.0f}s "
+          f"(overhead cap {profiler.max_fraction:.0%}) -> {output_dir}")
+    return {"status": "profiling", "output_dir": output_dir, "sample_rate": profiler.sample_probability,
+            "max_overhead": profiler.max_fraction, "until": datetime.fromtimestamp(profile_deadline).isoformat()}
+
+@app.get("/admin/profile")
+def profiling_status(x_admin_token: str = Header(None)):
+    check_admin(x_admin_token)
+    if active_profiler() is not None:
+        summary = profiler.summary()
+        return {"status": "profiling", "steps": summary["steps"], "profiled_seconds": summary["profiled_seconds"],
+                "profiled_fraction": summary["profiled_fraction"]}
+    return {"status": "idle", "last_profile": last_profile}
+
+@app.delete("/admin/profile")
+def stop_profiling(x_admin_token: str = Header(None)):
+    check_admin(x_admin_token)
+    summary = finish_profiling()
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No profile has been recorded")
+    return summary
+
+def run_inference(audio):
+    audio_tensor = torch.tensor(audio, dtype=torch.float32).unsqueeze(0).to(DEVICE)
+    audio_len = torch.tensor([audio_tensor.shape[1]], dtype=torch.long).to(DEVICE)
+
+    processed, processed_len = asr_model.preprocessor(
+        input_signal=audio_tensor,
+        length=audio_len,
+    )
+
+    # Half-precision exports (export.py) keep the preprocessor in fp32
+    encoder_dtype = next(asr_model.encoder.parameters()).dtype
+    encoded, encoded_len = asr_model.encoder(
+        audio_signal=processed.to(encoder_dtype),
+        length=processed_len,
+    )
+
+    with torch.no_grad():
+        hyps = asr_model.decoding.rnnt_decoder_predictions_tensor(
+            encoder_output=encoded,
+            encoded_lengths=encoded_len,
+            return_hypotheses=True,
+        )
+
+    return hyps[0].text if hyps else ""
+
 @app.post("/transcribe")
 async def transcribe_audio(file: UploadFile = File(...)):
     if not asr_model:
@@ -67,28 +201,10 @@ async def transcribe_audio(file: UploadFile = File(...)):
         if duration < 0.1:
             raise ValueError("Audio is too short (< 0.1s)")
 
-        # 2. Inference
-        audio_tensor = torch.tensor(audio, dtype=torch.float32).unsqueeze(0).to(DEVICE)
-        audio_len = torch.tensor([audio_tensor.shape[1]], dtype=torch.long).to(DEVICE)
-
-        processed, processed_len = asr_model.preprocessor(
-            input_signal=audio_tensor,
-            length=audio_len,
-        )
-
-        encoded, encoded_len = asr_model.encoder(
-            audio_signal=processed,
-            length=processed_len,
-        )
-
-        with torch.no_grad():
-            hyps = asr_model.decoding.rnnt_decoder_predictions_tensor(
-                encoder_output=encoded,
-                encoded_lengths=encoded_len,
-                return_hypotheses=True,
-            )
-
-        pred_text = hyps[0].text if hyps else ""
+        # 2. Inference (profiled if an admin session is running and its budget allows)
+        session = active_profiler()
+        with session.step() if session is not None else nullcontext():
+            pred_text = run_inference(audio)
         print(f"✅ Transcription: {pred_text}")
         
         return {"transcription": pred_text}
@@ -104,4 +220,11 @@ async def transcribe_audio(file: UploadFile = File(...)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001) # Ensure this port matches your React app
+    workers = int(os.getenv("ASR_SERVER_WORKERS", "0")) or TUNED.get("workers") or 1
+    if workers > 1:
+        # One model copy per worker process, as in the benchmark engine's sharded runs
+        print(f"🔧 {workers} server workers")
+        uvicorn.run("asr_server:app", app_dir=os.path.dirname(os.path.abspath(__file__)),
+                    host=HOST, port=PORT, workers=workers)
+    else:
+        uvicorn.run(app, host=HOST, port=PORT) # Ensure this port matches your React app
@@ -8,70 +8,46 @@ from pathlib import Path
 from typing import Dict, List
 
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 from corpus_normalizer import create_normalizer
-import jiwer
+from evaluation.benchmarking.engine.metrics import RunningMetrics, utterance_counts
+from evaluation.benchmarking.engine.predictions_io import PredictionsWriter, iter_predictions
 
 
-def load_predictions(file_path: str) -> List[Dict]:
-    """Load predictions JSON"""
-    print(f"Loading predictions from: {file_path}")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    print(f"✓ Loaded {len(data)} predictions")
-    return data
-
-
-def normalize_predictions(data: List[Dict], normalizer) -> List[Dict]:
-    """Apply normalization to predictions"""
-    print("\nNormalizing predictions...")
-    normalized = []
+def normalize_item(item: Dict, normalizer) -> Dict:
+    """Normalize one prediction row, keeping the original texts alongside"""
+    norm_item = item.copy()
     
-    for item in data:
-        norm_item = item.copy()
-        
-        if 'ground_truth' in item:
-            norm_item['ground_truth_original'] = item['ground_truth']
-            norm_item['ground_truth'] = normalizer.normalize(item['ground_truth'])
-        
-        if 'prediction' in item:
-            norm_item['prediction_original'] = item['prediction']
-            norm_item['prediction'] = normalizer.normalize(item['prediction'])
-        
-        normalized.append(norm_item)
+    if 'ground_truth' in item:
+        norm_item['ground_truth_original'] = item['ground_truth']
+        norm_item['ground_truth'] = normalizer.normalize(item['ground_truth'])
     
-    print(f"✓ Normalized {len(normalized)} predictions")
-    return normalized
+    if 'prediction' in item:
+        norm_item['prediction_original'] = item['prediction']
+        norm_item['prediction'] = normalizer.normalize(item['prediction'])
+    
+    return norm_item
 
 
-def calculate_wer(ground_truths: List[str], predictions: List[str]) -> Dict:
-    """Calculate WER metrics"""
-    wer = jiwer.wer(ground_truths, predictions)
-    cer = jiwer.cer(ground_truths, predictions)
-    
-    # Get detailed word counts
-    output = jiwer.process_words(ground_truths, predictions)
-    
+def summarize(running: RunningMetrics) -> Dict:
+    """WER metrics in the shape the report has always used"""
+    totals = running.as_dict(ndigits=None)
     return {
-        'wer': wer * 100,
-        'cer': cer * 100,
-        'substitutions': output.substitutions,
-        'deletions': output.deletions,
-        'insertions': output.insertions,
-        'hits': output.hits,
-        'total_words': output.substitutions + output.deletions + output.hits,
+        'wer': totals['wer'] or 0.0,
+        'cer': totals['cer'] or 0.0,
+        'substitutions': totals.get('substitutions', 0),
+        'deletions': totals.get('deletions', 0),
+        'insertions': totals.get('insertions', 0),
+        'hits': totals.get('hits', 0),
+        'total_words': totals['ref_words'],
     }
 
 
-def compare_wer(original: List[Dict], normalized: List[Dict]) -> Dict:
+def compare_wer(before: RunningMetrics, after: RunningMetrics) -> Dict:
     """Compare WER before and after"""
-    orig_gt = [item['ground_truth'] for item in original]
-    orig_pred = [item['prediction'] for item in original]
-    norm_gt = [item['ground_truth'] for item in normalized]
-    norm_pred = [item['prediction'] for item in normalized]
-    
-    original_metrics = calculate_wer(orig_gt, orig_pred)
-    normalized_metrics = calculate_wer(norm_gt, norm_pred)
+    original_metrics = summarize(before)
+    normalized_metrics = summarize(after)
     
     wer_drop = original_metrics['wer'] - normalized_metrics['wer']
     cer_drop = original_metrics['cer'] - normalized_metrics['cer']
@@ -88,30 +64,41 @@ def compare_wer(original: List[Dict], normalized: List[Dict]) -> Dict:
     }
 
 
-def find_changes(original: List[Dict], normalized: List[Dict], n: int = 30) -> List[Dict]:
-    """Find examples where normalization changed text"""
+def normalize_file(input_file: str, output_file: str, normalizer, n: int = 30):
+    """
+    Stream predictions through the normalizer in one pass: writes the
+    normalized rows, scores before/after, and keeps the first n changes.
+    """
+    print(f"Streaming predictions from: {input_file}")
+    before, after = RunningMetrics(), RunningMetrics()
     changes = []
-    
-    for orig, norm in zip(original, normalized):
-        gt_diff = orig['ground_truth'] != norm['ground_truth']
-        pred_diff = orig['prediction'] != norm['prediction']
-        
-        if gt_diff or pred_diff:
-            changes.append({
-                'index': orig.get('index', '?'),
-                'file': orig.get('audio_filepath', ''),
-                'gt_before': orig['ground_truth'],
-                'gt_after': norm['ground_truth'],
-                'pred_before': orig['prediction'],
-                'pred_after': norm['prediction'],
-                'gt_changed': gt_diff,
-                'pred_changed': pred_diff,
-            })
+    changes_count = 0
+    
+    with PredictionsWriter(str(output_file)) as writer:
+        for orig in iter_predictions(input_file):
+            norm = normalize_item(orig, normalizer)
+            writer.write(norm)
+            before.add(utterance_counts(orig['ground_truth'], orig['prediction'], breakdown=True))
+            after.add(utterance_counts(norm['ground_truth'], norm['prediction'], breakdown=True))
             
-            if len(changes) >= n:
-                break
-    
-    return changes
+            gt_diff = orig['ground_truth'] != norm['ground_truth']
+            pred_diff = orig['prediction'] != norm['prediction']
+            if gt_diff or pred_diff:
+                changes_count += 1
+                if len(changes) < n:
+                    changes.append({
+                        'index': orig.get('index', '?'),
+                        'file': orig.get('audio_filepath', ''),
+                        'gt_before': orig['ground_truth'],
+                        'gt_after': norm['ground_truth'],
+                        'pred_before': orig['prediction'],
+                        'pred_after': norm['prediction'],
+                        'gt_changed': gt_diff,
+                        'pred_changed': pred_diff,
+                    })
+    
+    print(f"✓ Normalized {writer.count} predictions")
+    return compare_wer(before, after), changes, changes_count
 
 
 def print_report(comparison: Dict, changes: List[Dict]):
@@ -183,42 +170,28 @@ def main():
     
     # Input/output paths
     input_file = "/Users/chaitanyakartik/Downloads/predictions-2.json"
-    output_file = base_dir / "predictions_normalized.json"
+    output_file = base_dir / "predictions_normalized.jsonl"
     report_file = base_dir / "wer_improvement_report.json"
     
-    # Step 1: Load data
-    original_data = load_predictions(input_file)
-    
-    # Step 2: Create normalizer
+    # Step 1: Create normalizer
     print("\n📚 Loading corpus-based normalizer...")
     normalizer = create_normalizer(str(base_dir))
     
-    # Step 3: Normalize
-    normalized_data = normalize_predictions(original_data, normalizer)
-    
-    # Step 4: Compare WER
-    print("\n📊 Calculating WER metrics...")
-    comparison = compare_wer(original_data, normalized_data)
-    
-    # Step 5: Find changes
-    print("\n🔍 Finding normalization changes...")
-    changes = find_changes(original_data, normalized_data, n=50)
-    print(f"✓ Found {len(changes)} examples with changes")
+    # Step 2: Normalize, score and collect changes in one streaming pass
+    print("\n📊 Normalizing and calculating WER metrics...")
+    comparison, changes, changes_count = normalize_file(input_file, output_file, normalizer, n=50)
+    print(f"✓ Found {changes_count} examples with changes")
+    print(f"✓ Saved normalized predictions: {output_file}")
     
-    # Step 6: Print report
+    # Step 3: Print report
     print_report(comparison, changes)
     
-    # Step 7: Save outputs
-    print(f"\n💾 Saving outputs...")
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(normalized_data, f, ensure_ascii=False, indent=2)
-    print(f"✓ Saved normalized predictions: {output_file}")
-    
+    # Step 4: Save report
+    print(f"\n💾 Saving report...")
     with open(report_file, 'w', encoding='utf-8') as f:
         json.dump({
             'comparison': comparison,
-            'total_changes': len(changes),
+            'total_changes': changes_count,
             'example_changes': changes[:30]
         }, f, ensure_ascii=False, indent=2)
     print(f"✓ Saved report: {report_file}")
@@ -1,13 +1,16 @@
 """
-Compare two normalization strategies:
+Compare three normalization strategies:
 1. Conservative: Only Unicode + whitespace
 2. Aggressive: Corpus-based compound splitting + vocabulary matching
+3. Style Guide: Prescriptive orthographic rules
 """
 
 import json
 import sys
 from pathlib import Path
-from jiwer import process_words
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from evaluation.benchmarking.engine.metrics import CorpusAlignment
 
 from corpus_normalizer import CorpusBasedNormalizer
 from corpus_normalizer_conservative import ConservativeKannadaNormalizer
@@ -49,28 +52,25 @@ def apply_normalization(predictions, normalizer, strategy_name):
             'prediction_original': prediction
         })
     
-    # Calculate WER
-    output = process_words(references, hypotheses)
-    wer = output.wer * 100
-    
-    # Calculate CER separately (jiwer doesn't provide it in WordOutput)
-    from jiwer import cer as compute_cer
-    cer = compute_cer(references, hypotheses) * 100
+    # Calculate WER, CER and the S/D/I breakdown from one alignment per utterance
+    output = CorpusAlignment.from_pairs(references, hypotheses, keep_ops=False).metrics(ndigits=None)
+    wer = output['wer']
+    cer = output['cer']
     
     print(f"📊 Results:")
     print(f"  WER: {wer:.2f}%")
     print(f"  CER: {cer:.2f}%")
-    print(f"  Substitutions: {output.substitutions}")
-    print(f"  Deletions: {output.deletions}")
-    print(f"  Insertions: {output.insertions}")
+    print(f"  Substitutions: {output['substitutions']}")
+    print(f"  Deletions: {output['deletions']}")
+    print(f"  Insertions: {output['insertions']}")
     
     return {
         'strategy': strategy_name,
         'wer': wer,
         'cer': cer,
-        'substitutions': output.substitutions,
-        'deletions': output.deletions,
-        'insertions': output.insertions,
+        'substitutions': output['substitutions'],
+        'deletions': output['deletions'],
+        'insertions': output['insertions'],
         'normalized_predictions': normalized_predictions
     }
 
@@ -166,15 +166,8 @@ def main():
           f"{aggressive_result['insertions']:4d}")
     print(f"Style Guide (prescriptive)  | {style_wer:6.2f}%  | {style_result['cer']:6.2f}%  | "
           f"{style_result['substitutions']:5d} | {style_result['deletions']:4d} | "
-          f"{stylr - agg_wer
-    
-    print(f"Strategy                    | WER      | CER      | S     | D    | I")
-    print(f"{'-'*80}")
-    print(f"Conservative (baseline)     | {cons_wer:6.2f}%  | {conservative_result['cer']:6.2f}%  | "
-          f"{conservative_result['substitutions']:5d} | {conservative_result['deletions']:4d} | "
-          f"{conservative_result['insertions']:4d}")
-    print(f"Aggressive (corpus-based)   | {agg_wer:6.2f}%  | {aggressive_result['cer']:6.2f}%  | "
-          f"{aggressive_result['substitutions']:5d} | {aggressive_result['deletions']:4d} | "
+          f"{style_result['insertions']:4d}")
+
     # Find best strategy
     results = [
         ('Conservative', cons_wer),
@@ -186,9 +179,12 @@ def main():
     print(f"\n🏆 WINNER: {best_strategy} ({best_wer:.2f}% WER)")
     print(f"\nComparisons vs Conservative baseline:")
     print(f"  • Aggressive: {cons_wer - agg_wer:+.2f}% WER change")
-    print(f"  • Style Guide: {cons_wer - style_wer:+.2f}% WER change
-        print(f"✅ Conservative is BETTER by {abs(wer_diff):.2f}% absolute WER")
-    else:
+    print(f"  • Style Guide: {cons_wer - style_wer:+.2f}% WER change")
+
+    print(f"\n{'='*80}")
+    print("ANALYSIS")
+    print(f"{'='*80}\n")
+
     agg_diff = cons_wer - agg_wer
     style_diff = cons_wer - style_wer
     
@@ -219,23 +215,7 @@ def main():
         print("  Document: 'Normalized to Kannada Wikipedia style'")
     else:
         print("  Use STYLE GUIDE: Prescriptive rules match your ground truth")
-        print("  Document: 'Normalized per orthographic style guide'
-        print(f"✨ Aggressive is {wer_diff:.2f}% better")
-        printstyle_guide': {
-                'wer': style_result['wer'],
-                'cer': style_result['cer'],
-                'substitutions': style_result['substitutions'],
-                'deletions': style_result['deletions'],
-                'insertions': style_result['insertions'],
-            },
-            'best_strategy': best_strategy.lower().replace(' ', '_'),
-            'wer_improvements': {
-                'aggressive_vs_conservative': cons_wer - agg_wer,
-                'style_guide_vs_conservative': cons_wer - style_wer
-            }
-        print(f"⚠️  Conservative is {abs(wer_diff):.2f}% better")
-        print("    → Aggressive normalization is HURTING performance!")
-        print("    → Recommendation: Use conservative approach")
+        print("  Document: 'Normalized per orthographic style guide'")
     
     # Show examples
     show_examples(conservative_result, aggressive_result, num_examples=15)
@@ -258,8 +238,18 @@ def main():
                 'deletions': aggressive_result['deletions'],
                 'insertions': aggressive_result['insertions'],
             },
-            'wer_difference': wer_diff,
-            'recommendation': 'conservative' if wer_diff < 0.5 else 'aggressive'
+            'style_guide': {
+                'wer': style_result['wer'],
+                'cer': style_result['cer'],
+                'substitutions': style_result['substitutions'],
+                'deletions': style_result['deletions'],
+                'insertions': style_result['insertions'],
+            },
+            'best_strategy': best_strategy.lower().replace(' ', '_'),
+            'wer_improvements': {
+                'aggressive_vs_conservative': cons_wer - agg_wer,
+                'style_guide_vs_conservative': cons_wer - style_wer
+            }
         }, f, indent=2, ensure_ascii=False)
     
     print(f"\n💾 Detailed comparison saved to: {output_file}")
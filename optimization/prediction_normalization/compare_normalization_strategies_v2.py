@@ -8,97 +8,72 @@ Compare three normalization strategies:
 import json
 import sys
 from pathlib import Path
-from jiwer import process_words, cer as compute_cer
 
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from evaluation.benchmarking.engine.metrics import RunningMetrics, utterance_counts
+from evaluation.benchmarking.engine.predictions_io import iter_predictions
 from corpus_normalizer import CorpusBasedNormalizer
 from corpus_normalizer_conservative import ConservativeKannadaNormalizer
 from orthographic_style_guide import OrthographicStyleNormalizer
 
 
-def load_predictions(file_path: str):
-    """Load predictions from JSON file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def apply_normalization(predictions, normalizer, strategy_name):
-    """Apply normalization and calculate WER."""
+def apply_normalization(predictions_file, normalizer, strategy_name):
+    """Apply normalization and calculate WER (streams the predictions file)."""
     print(f"\n{'='*80}")
     print(f"Testing: {strategy_name}")
     print(f"{'='*80}\n")
     
-    normalized_predictions = []
-    references = []
-    hypotheses = []
-    
-    for item in predictions:
-        ground_truth = item['ground_truth']
-        prediction = item['prediction']
-        
+    running = RunningMetrics()
+    for item in iter_predictions(predictions_file):
         # Normalize both
-        norm_gt = normalizer.normalize(ground_truth)
-        norm_pred = normalizer.normalize(prediction)
-        
-        references.append(norm_gt)
-        hypotheses.append(norm_pred)
-        
-        normalized_predictions.append({
-            **item,
-            'ground_truth_normalized': norm_gt,
-            'prediction_normalized': norm_pred,
-            'ground_truth_original': ground_truth,
-            'prediction_original': prediction
-        })
+        norm_gt = normalizer.normalize(item['ground_truth'])
+        norm_pred = normalizer.normalize(item['prediction'])
+        running.add(utterance_counts(norm_gt, norm_pred, breakdown=True))
     
-    # Calculate WER
-    output = process_words(references, hypotheses)
-    wer = output.wer * 100
-    
-    # Calculate CER separately
-    cer = compute_cer(references, hypotheses) * 100
+    totals = running.as_dict(ndigits=None)
+    wer, cer = totals['wer'], totals['cer']
     
     print(f"📊 Results:")
     print(f"  WER: {wer:.2f}%")
     print(f"  CER: {cer:.2f}%")
-    print(f"  Substitutions: {output.substitutions}")
-    print(f"  Deletions: {output.deletions}")
-    print(f"  Insertions: {output.insertions}")
+    print(f"  Substitutions: {totals['substitutions']}")
+    print(f"  Deletions: {totals['deletions']}")
+    print(f"  Insertions: {totals['insertions']}")
     
     return {
         'strategy': strategy_name,
         'wer': wer,
         'cer': cer,
-        'substitutions': output.substitutions,
-        'deletions': output.deletions,
-        'insertions': output.insertions,
-        'normalized_predictions': normalized_predictions
+        'substitutions': totals['substitutions'],
+        'deletions': totals['deletions'],
+        'insertions': totals['insertions'],
     }
 
 
-def show_examples(results_dict, num_examples=10):
-    """Show example differences between strategies."""
+def show_examples(predictions_file, normalizers, num_examples=10):
+    """Show example differences between strategies (re-streams the file, stops early)."""
     print(f"\n{'='*80}")
     print(f"Example Differences (first {num_examples})")
     print(f"{'='*80}\n")
     
-    cons_preds = results_dict['conservative']['normalized_predictions']
-    agg_preds = results_dict['aggressive']['normalized_predictions']
-    style_preds = results_dict['style_guide']['normalized_predictions']
-    
     shown = 0
-    for i, (cons, agg, style) in enumerate(zip(cons_preds, agg_preds, style_preds)):
-        cons_pred = cons['prediction_normalized']
-        agg_pred = agg['prediction_normalized']
-        style_pred = style['prediction_normalized']
+    for i, item in enumerate(iter_predictions(predictions_file)):
+        if shown >= num_examples:
+            break
+        cons_pred = normalizers['conservative'].normalize(item['prediction'])
+        agg_pred = normalizers['aggressive'].normalize(item['prediction'])
+        style_pred = normalizers['style_guide'].normalize(item['prediction'])
         
         # Show if any differ
-        if len({cons_pred, agg_pred, style_pred}) > 1 and shown < num_examples:
+        if len({cons_pred, agg_pred, style_pred}) > 1:
             print(f"Example {shown + 1} (index {i}):")
-            print(f"  Original:     {cons['prediction_original']}")
+            print(f"  Original:     {item['prediction']}")
             print(f"  Conservative: {cons_pred}")
             print(f"  Aggressive:   {agg_pred}")
             print(f"  Style Guide:  {style_pred}")
-            print(f"  Ground truth: {cons['ground_truth_normalized']}")
+            print(f"  Ground truth: {normalizers['conservative'].normalize(item['ground_truth'])}")
             print()
             shown += 1
 
@@ -110,15 +85,13 @@ def main():
     
     predictions_file = sys.argv[1]
     
-    print(f"Loading predictions from: {predictions_file}")
-    predictions = load_predictions(predictions_file)
-    print(f"✓ Loaded {len(predictions)} predictions\n")
+    print(f"Streaming predictions from: {predictions_file}\n")
     
     # Strategy 1: Conservative
     print("Initializing Conservative Normalizer...")
     conservative_normalizer = ConservativeKannadaNormalizer()
     conservative_result = apply_normalization(
-        predictions, 
+        predictions_file, 
         conservative_normalizer, 
         "Conservative (Unicode + Whitespace only)"
     )
@@ -137,7 +110,7 @@ def main():
         str(rules_path)
     )
     aggressive_result = apply_normalization(
-        predictions, 
+        predictions_file, 
         aggressive_normalizer, 
         "Aggressive (Corpus-based compound splitting)"
     )
@@ -146,7 +119,7 @@ def main():
     print("\nInitializing Style Guide Normalizer...")
     style_normalizer = OrthographicStyleNormalizer()
     style_result = apply_normalization(
-        predictions,
+        predictions_file,
         style_normalizer,
         "Style Guide (Prescriptive orthographic rules)"
     )
@@ -223,12 +196,12 @@ def main():
         print("  Document: 'Normalized per orthographic style guide'")
     
     # Show examples
-    results_dict = {
-        'conservative': conservative_result,
-        'aggressive': aggressive_result,
-        'style_guide': style_result
+    normalizers = {
+        'conservative': conservative_normalizer,
+        'aggressive': aggressive_normalizer,
+        'style_guide': style_normalizer
     }
-    show_examples(results_dict, num_examples=15)
+    show_examples(predictions_file, normalizers, num_examples=15)
     
     # Save results
     output_file = Path(predictions_file).parent / "normalization_strategy_comparison.json"
@@ -6,10 +6,13 @@ Stacks two strategies:
 2. Corpus-based compound splitting (from wiki analysis)
 """
 
+import sys
 import json
 import unicodedata
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
 
 class CombinedNormalizer:
     def __init__(self, mismatch_analysis_path, vocab_path, rules_path):
@@ -114,7 +117,7 @@ class CombinedNormalizer:
 
 def test_combined_normalizer(predictions_file, normalizer):
     """Test combined normalizer."""
-    from jiwer import process_words, cer as compute_cer
+    from evaluation.benchmarking.engine.metrics import CorpusAlignment
     
     print(f"\n{'='*80}")
     print("TESTING COMBINED NORMALIZER")
@@ -129,25 +132,25 @@ def test_combined_normalizer(predictions_file, normalizer):
     refs_before = [p['ground_truth'] for p in predictions]
     hyps_before = [p['prediction'] for p in predictions]
     
-    output_before = process_words(refs_before, hyps_before)
-    wer_before = output_before.wer * 100
-    cer_before = compute_cer(refs_before, hyps_before) * 100
+    output_before = CorpusAlignment.from_pairs(refs_before, hyps_before, keep_ops=False).metrics(ndigits=None)
+    wer_before = output_before['wer']
+    cer_before = output_before['cer']
     
     # After
     refs_after = [normalizer.normalize(p['ground_truth']) for p in predictions]
     hyps_after = [normalizer.normalize(p['prediction']) for p in predictions]
     
-    output_after = process_words(refs_after, hyps_after)
-    wer_after = output_after.wer * 100
-    cer_after = compute_cer(refs_after, hyps_after) * 100
+    output_after = CorpusAlignment.from_pairs(refs_after, hyps_after, keep_ops=False).metrics(ndigits=None)
+    wer_after = output_after['wer']
+    cer_after = output_after['cer']
     
     print(f"\n📊 BEFORE:")
     print(f"  WER: {wer_before:.2f}% | CER: {cer_before:.2f}%")
-    print(f"  S: {output_before.substitutions} | D: {output_before.deletions} | I: {output_before.insertions}")
+    print(f"  S: {output_before['substitutions']} | D: {output_before['deletions']} | I: {output_before['insertions']}")
     
     print(f"\n✨ AFTER (Combined):")
     print(f"  WER: {wer_after:.2f}% | CER: {cer_after:.2f}%")
-    print(f"  S: {output_after.substitutions} | D: {output_after.deletions} | I: {output_after.insertions}")
+    print(f"  S: {output_after['substitutions']} | D: {output_after['deletions']} | I: {output_after['insertions']}")
     
     wer_diff = wer_before - wer_after
     print(f"\n🎯 IMPROVEMENT:")
@@ -6,10 +6,13 @@ Applies normalization only for:
 2. Prevents gaming WER - only accepts legitimate alternatives
 """
 
+import sys
 import json
 import unicodedata
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
 
 class ProperNounNormalizer:
     def __init__(self, mismatch_analysis_path):
@@ -56,7 +59,7 @@ class ProperNounNormalizer:
 
 def test_on_predictions(predictions_file, normalizer):
     """Test normalizer and calculate WER impact."""
-    from jiwer import process_words, cer as compute_cer
+    from evaluation.benchmarking.engine.metrics import CorpusAlignment
     
     print(f"\nLoading predictions...")
     with open(predictions_file, 'r', encoding='utf-8') as f:
@@ -66,17 +69,17 @@ def test_on_predictions(predictions_file, normalizer):
     refs_before = [p['ground_truth'] for p in predictions]
     hyps_before = [p['prediction'] for p in predictions]
     
-    output_before = process_words(refs_before, hyps_before)
-    wer_before = output_before.wer * 100
-    cer_before = compute_cer(refs_before, hyps_before) * 100
+    output_before = CorpusAlignment.from_pairs(refs_before, hyps_before, keep_ops=False).metrics(ndigits=None)
+    wer_before = output_before['wer']
+    cer_before = output_before['cer']
     
     # Calculate WER after normalization
     refs_after = [normalizer.normalize(p['ground_truth']) for p in predictions]
     hyps_after = [normalizer.normalize(p['prediction']) for p in predictions]
     
-    output_after = process_words(refs_after, hyps_after)
-    wer_after = output_after.wer * 100
-    cer_after = compute_cer(refs_after, hyps_after) * 100
+    output_after = CorpusAlignment.from_pairs(refs_after, hyps_after, keep_ops=False).metrics(ndigits=None)
+    wer_after = output_after['wer']
+    cer_after = output_after['cer']
     
     # Results
     print(f"\n{'='*80}")
@@ -85,11 +88,11 @@ def test_on_predictions(predictions_file, normalizer):
     
     print(f"📊 BEFORE:")
     print(f"  WER: {wer_before:.2f}% | CER: {cer_before:.2f}%")
-    print(f"  S: {output_before.substitutions} | D: {output_before.deletions} | I: {output_before.insertions}")
+    print(f"  S: {output_before['substitutions']} | D: {output_before['deletions']} | I: {output_before['insertions']}")
     
     print(f"\n✨ AFTER:")
     print(f"  WER: {wer_after:.2f}% | CER: {cer_after:.2f}%")
-    print(f"  S: {output_after.substitutions} | D: {output_after.deletions} | I: {output_after.insertions}")
+    print(f"  S: {output_after['substitutions']} | D: {output_after['deletions']} | I: {output_after['insertions']}")
     
     wer_diff = wer_before - wer_after
     print(f"\n🎯 IMPROVEMENT:")
@@ -8,11 +8,12 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-# Add scripts directory to path
+# Add scripts directory and project root to path
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from kannada_normalization import KannadaNormalizer
-import jiwer
+from evaluation.benchmarking.engine.metrics import CorpusAlignment
 
 
 def load_predictions(file_path: str) -> List[Dict]:
@@ -44,18 +45,12 @@ def normalize_predictions(predictions: List[Dict], normalizer: KannadaNormalizer
 def calculate_wer(ground_truths: List[str], predictions: List[str]) -> Dict:
     """Calculate WER and related metrics"""
     
-    # Calculate overall WER
-    wer = jiwer.wer(ground_truths, predictions)
-    
-    # Calculate CER
-    cer = jiwer.cer(ground_truths, predictions)
-    
-    # Get detailed measures
-    measures = jiwer.compute_measures(ground_truths, predictions)
+    # One alignment per utterance gives WER, CER and the S/D/I/H breakdown
+    measures = CorpusAlignment.from_pairs(ground_truths, predictions, keep_ops=False).metrics(ndigits=None)
     
     return {
-        'wer': wer * 100,  # Convert to percentage
-        'cer': cer * 100,
+        'wer': measures['wer'],
+        'cer': measures['cer'],
         'substitutions': measures['substitutions'],
         'deletions': measures['deletions'],
         'insertions': measures['insertions'],
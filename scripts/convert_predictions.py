@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Convert benchmark predictions files between formats.
+
+The output format follows the extension (.jsonl, .jsonl.gz, .jsonl.zst, or
+legacy .json array). Rows are streamed, so multi-GB files convert in
+constant memory.
+
+Usage:
+    python scripts/convert_predictions.py models/results_conf_100m_v3/predictions.json
+    python scripts/convert_predictions.py predictions.json predictions.jsonl.zst
+    python scripts/convert_predictions.py --recursive models/ --ext .jsonl.zst
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.predictions_io import convert_predictions, strip_suffixes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert predictions files (JSON array <-> JSONL[.gz|.zst])")
+    parser.add_argument("input", help="Predictions file, or a directory with --recursive")
+    parser.add_argument("output", nargs="?", default=None,
+                        help="Output path (default: input with --ext)")
+    parser.add_argument("--ext", default=".jsonl", choices=[".jsonl", ".jsonl.gz", ".jsonl.zst", ".json"],
+                        help="Target format when no output path is given")
+    parser.add_argument("--recursive", action="store_true",
+                        help="Convert every predictions*.json under the input directory")
+    parser.add_argument("--remove-source", action="store_true",
+                        help="Delete the source file after a successful conversion")
+    return parser.parse_args()
+
+
+def convert_one(src, dst, remove_source=False):
+    if os.path.abspath(src) == os.path.abspath(dst):
+        print(f"   ⏭️  {src} is already {dst}")
+        return 0
+    count = convert_predictions(src, dst)
+    src_mb, dst_mb = os.path.getsize(src) / 1e6, os.path.getsize(dst) / 1e6
+    print(f"   ✅ {src} -> {dst} ({count} rows, {src_mb:.1f} MB -> {dst_mb:.1f} MB)")
+    if remove_source:
+        os.remove(src)
+    return count
+
+
+def main():
+    args = parse_args()
+
+    if args.recursive:
+        sources = sorted(Path(args.input).rglob("predictions*.json"))
+        print(f"🔧 Converting {len(sources)} file(s) under {args.input} to {args.ext}")
+        for src in sources:
+            convert_one(str(src), strip_suffixes(str(src)) + args.ext, args.remove_source)
+        return 0
+
+    dst = args.output or strip_suffixes(args.input) + args.ext
+    print(f"🔧 Converting {args.input}")
+    convert_one(args.input, dst, args.remove_source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,22 @@
-import json
 import sys
+import json
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
 
-# Usage: python fix_manifest.py input.json
+from evaluation.benchmarking.engine.predictions_io import iter_predictions, strip_suffixes
+
+# Usage: python fix_manifest.py predictions.json   (or .jsonl / .jsonl.gz / .jsonl.zst)
 input_file = sys.argv[1]
-output_file = input_file.replace('.json', '_ready.json')
+output_file = strip_suffixes(input_file) + '_ready.json'
 
 print(f"🔧 Converting {input_file} to NeMo compatible JSONL...")
 
 try:
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as f:
-        for entry in data:
+        for entry in iter_predictions(input_file):
             # 1. Create a new object with the required keys
             new_entry = {
                 "audio_filepath": entry.get("audio_filepath"),
@@ -23,9 +27,10 @@ try:
             
             # 2. Write as a single line (JSONL format)
             f.write(json.dumps(new_entry, ensure_ascii=False) + '\n')
+            count += 1
 
-    print(f"✅ Success! Created: {output_file}")
-    print(f"   - Converted List to Lines")
+    print(f"✅ Success! Created: {output_file} ({count} entries)")
+    print(f"   - Converted predictions to manifest lines")
     print(f"   - Renamed 'ground_truth' -> 'text'")
     print(f"   - Added dummy 'duration' (3.0s)")
 
@@ -0,0 +1,145 @@
+"""
+Benchmark the engine's WER/CER (engine/metrics.py) against jiwer.
+
+Scores the same corpus both ways and checks the results agree:
+- jiwer: wer() + cer() + process_words() (separate passes, as the old
+  scripts did)
+- engine: CorpusAlignment (one word + char alignment per utterance), then
+  WER/CER, the S/D/I breakdown, top confusions and a re-scored half of the
+  corpus, all from the cache
+
+The corpus is synthetic (seeded, Kannada-script words with substitution,
+deletion and insertion noise) unless --predictions points at a predictions
+file.
+
+python scripts/evaluation/benchmark_wer_engine.py --utterances 100000
+python scripts/evaluation/benchmark_wer_engine.py --predictions models/results_conf_100m_v3/kn_clean_read/predictions.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.metrics import Levenshtein, CorpusAlignment
+from evaluation.benchmarking.engine.predictions_io import iter_predictions
+
+KANNADA_LETTERS = [chr(c) for c in range(0x0C95, 0x0CB9)]
+KANNADA_SIGNS = [chr(c) for c in range(0x0CBE, 0x0CCD)]
+
+
+def synthetic_corpus(n, seed=0, vocab_size=20000, error_rate=0.15):
+    rng = random.Random(seed)
+
+    def word():
+        return ''.join(rng.choice(KANNADA_LETTERS) + (rng.choice(KANNADA_SIGNS) if rng.random() < 0.6 else '')
+                       for _ in range(rng.randint(1, 5)))
+
+    vocab = [word() for _ in range(vocab_size)]
+    references, predictions = [], []
+    for _ in range(n):
+        ref = [rng.choice(vocab) for _ in range(rng.randint(3, 30))]
+        hyp = []
+        for w in ref:
+            roll = rng.random()
+            if roll < error_rate * 0.6:
+                hyp.append(rng.choice(vocab))
+            elif roll < error_rate * 0.8:
+                continue
+            elif roll < error_rate:
+                hyp.extend([w, rng.choice(vocab)])
+            else:
+                hyp.append(w)
+        references.append(' '.join(ref))
+        predictions.append(' '.join(hyp))
+    return references, predictions
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def run_jiwer(references, predictions):
+    import jiwer
+
+    timings = {}
+    wer, timings['wer'] = timed(lambda: jiwer.wer(references, predictions) * 100)
+    cer, timings['cer'] = timed(lambda: jiwer.cer(references, predictions) * 100)
+    output, timings['breakdown'] = timed(lambda: jiwer.process_words(references, predictions))
+    half = len(references) // 2
+    _, timings['subset_wer'] = timed(lambda: jiwer.wer(references[:half], predictions[:half]))
+    result = {'wer': wer, 'cer': cer, 'substitutions': output.substitutions,
+              'deletions': output.deletions, 'insertions': output.insertions}
+    return result, timings
+
+
+def run_engine(references, predictions):
+    timings = {}
+    alignment, timings['align'] = timed(lambda: CorpusAlignment.from_pairs(references, predictions))
+    metrics, timings['metrics'] = timed(lambda: alignment.metrics(ndigits=None))
+    _, timings['top_confusions'] = timed(lambda: alignment.top_confusions(20))
+    half = len(references) // 2
+    _, timings['subset_wer'] = timed(lambda: alignment.metrics(range(half)))
+    result = {k: metrics[k] for k in ('wer', 'cer', 'substitutions', 'deletions', 'insertions')}
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine WER/CER vs jiwer")
+    parser.add_argument("--utterances", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--predictions", type=str, default=None, help="Score this predictions file instead")
+    parser.add_argument("--output", type=str, default=None, help="Save timings as JSON")
+    args = parser.parse_args()
+
+    if args.predictions:
+        rows = list(iter_predictions(args.predictions))
+        references = [r['ground_truth'] for r in rows]
+        predictions = [r['prediction'] for r in rows]
+    else:
+        references, predictions = synthetic_corpus(args.utterances, seed=args.seed)
+    print(f"📚 {len(references)} utterances, {sum(len(r.split()) for r in references)} reference words")
+    print(f"   Kernel: {'rapidfuzz' if Levenshtein is not None else 'pure-python DP (pip install rapidfuzz)'}")
+
+    engine, engine_t = run_engine(references, predictions)
+    jiwer_result, jiwer_t = run_jiwer(references, predictions)
+
+    print("\n" + "=" * 60)
+    print(f"{'':<16} {'jiwer':>12} {'engine':>12}")
+    print("-" * 60)
+    for key in ('wer', 'cer'):
+        print(f"{key.upper():<16} {jiwer_result[key]:>11.4f}% {engine[key]:>11.4f}%")
+    for key in ('substitutions', 'deletions', 'insertions'):
+        print(f"{key:<16} {jiwer_result[key]:>12} {engine[key]:>12}")
+    print("-" * 60)
+    jiwer_total = sum(jiwer_t.values())
+    engine_total = sum(engine_t.values())
+    print(f"{'WER+CER+S/D/I':<16} {jiwer_t['wer'] + jiwer_t['cer'] + jiwer_t['breakdown']:>11.2f}s "
+          f"{engine_t['align'] + engine_t['metrics']:>11.2f}s")
+    print(f"{'subset re-score':<16} {jiwer_t['subset_wer']:>11.2f}s {engine_t['subset_wer']:>11.3f}s")
+    print(f"{'top confusions':<16} {'-':>12} {engine_t['top_confusions']:>11.2f}s")
+    print(f"{'total':<16} {jiwer_total:>11.2f}s {engine_total:>11.2f}s   ({jiwer_total / engine_total:.1f}x)")
+    print("=" * 60)
+
+    # WER/CER agree up to float summation order; S/D/I can differ where
+    # several alignments are optimal (ties broken differently), never in total
+    agree = abs(jiwer_result['wer'] - engine['wer']) < 1e-6 and abs(jiwer_result['cer'] - engine['cer']) < 1e-6
+    print("✅ WER/CER match jiwer" if agree else "❌ WER/CER differ from jiwer")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'utterances': len(references), 'jiwer': {'result': jiwer_result, 'seconds': jiwer_t},
+                       'engine': {'result': engine, 'seconds': engine_t}}, f, indent=2)
+        print(f"📄 Saved to: {args.output}")
+    return 0 if agree else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
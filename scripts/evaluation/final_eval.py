@@ -2,17 +2,16 @@ import argparse
 import json
 import torch
 import os
-import jiwer
-import numpy as np
+import sys
+from pathlib import Path
 import librosa
 from nemo.collections.asr.models import EncDecHybridRNNTCTCBPEModel
 from tqdm import tqdm
 
-try:
-    from pyctcdecode import build_ctcdecoder
-except ImportError:
-    print("❌ Error: pyctcdecode not found. Run: pip install pyctcdecode")
-    exit(1)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from evaluation.benchmarking.engine.decoder_vocab import load_decoder_vocab
+from evaluation.benchmarking.engine.lm_decode import build_decoder
+from evaluation.benchmarking.engine.metrics import CorpusAlignment
 
 # --- CONFIG ---
 DEFAULT_MODEL = "training/models/kathbath_hybrid_h200_scaleup_p3_phase3_final.nemo"
@@ -28,7 +27,7 @@ def load_audio(path):
         return None, 0
 
 def run_eval():
-    print("👻 RUNNING FINAL EVAL WITH GHOST SPACE 👻")
+    print("🚀 RUNNING FINAL EVAL (CTC + KenLM)")
     
     # 1. Load Model
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -65,53 +64,20 @@ def run_eval():
             log_probs = model.ctc_decoder(encoder_output=enc)
             
             valid_len = int(enc_len[0].item())
-            logits = log_probs[0][:valid_len].cpu().numpy()
-            
-            # --- THE GHOST FIX ---
-            # Pad logits with one extra column of -infinity
-            # Shape becomes [Time, 4025] -> [Time, 4026]
-            padding = np.full((logits.shape[0], 1), -100.0, dtype=logits.dtype)
-            logits_padded = np.hstack([logits, padding])
-            
-            all_logits.append(logits_padded)
-
-    # 4. BUILD VOCAB (4025 + AutoSpace)
-    print("📚 Building Vocabulary...")
-    vocab_raw = []
-    vocab_size = model.tokenizer.vocab_size # 4024
-    
-    if hasattr(model.tokenizer, 'ids_to_tokens'):
-        vocab_raw = model.tokenizer.ids_to_tokens(list(range(vocab_size)))
-    else:
-        for i in range(vocab_size):
-            vocab_raw.append(model.tokenizer.ids_to_text([i]))
+            all_logits.append(log_probs[0][:valid_len].cpu().numpy())
 
-    # Deduplicate
-    vocab_clean = []
-    seen = {}
-    for t in vocab_raw:
-        if t in seen:
-            seen[t] += 1
-            vocab_clean.append(f"{t}_dup{seen[t]}")
-        else:
-            seen[t] = 0
-            vocab_clean.append(t)
-
-    # Add BLANK explicitly (Index 4024)
-    vocab_clean.append("<blank>")
-    
-    print(f"✅ Vocab Size: {len(vocab_clean)} (Library will add Space at 4026)")
+    # 4. VOCAB
+    print("📚 Loading Vocabulary...")
+    # Deduplicated tokenizer pieces, checked against the CTC head and cached per model hash.
+    # No blank label: pyctcdecode adds it last, where the CTC head has it (as in the ctc_kenlm backend)
+    artifact = load_decoder_vocab(DEFAULT_MODEL, model)
+    print(f"✅ Vocab Size: {len(artifact['vocab'])} (blank at {artifact['blank_id']})")
 
     # 5. RUN DECODE
     print("\n🚀 STARTING DECODING")
     
     try:
-        decoder = build_ctcdecoder(
-            labels=vocab_clean, # 4025 items -> Library makes it 4026
-            kenlm_model_path=DEFAULT_KENLM,
-            alpha=0.5,
-            beta=1.0
-        )
+        decoder = build_decoder(artifact['vocab'], DEFAULT_KENLM, alpha=0.5, beta=1.0)
     except Exception as e:
         print(f"❌ Decoder Crash: {e}")
         return
@@ -122,17 +88,11 @@ def run_eval():
     for i, logits in enumerate(all_logits):
         if logits is None: continue
         
-        # Decode
-        raw_text = decoder.decode(logits, beam_width=64)
-        
-        # Stitch
-        # Since we use Subword KenLM, we expect "_he llo" output
-        stitched_text = raw_text.replace(" ", "").replace("\u2581", " ").strip()
-        
-        preds.append(stitched_text)
+        # Decode ('▁' pieces: pyctcdecode joins BPE pieces into words itself)
+        preds.append(decoder.decode(logits, beam_width=64).strip())
         valid_refs.append(references[i])
 
-    wer = jiwer.wer(valid_refs, preds) * 100
+    wer = CorpusAlignment.from_pairs(valid_refs, preds, keep_ops=False).metrics(ndigits=None)['wer']
     print(f"\n🏆 FINAL RESULT (Alpha=0.5, Beta=1.0): WER {wer:.2f}%")
     
     print("\n👀 EXAMPLE:")
@@ -1,187 +1,194 @@
+"""
+KenLM alpha/beta grid search for the hybrid model's CTC head.
+
+Two stages:
+1. Logit cache: the acoustic model runs once over the manifest and its CTC
+   log-probs are stored in a memory-mapped file (engine/logit_cache.py).
+   Later runs with the same model + manifest skip straight to stage 2.
+2. Search: (alpha, beta) points are beam-searched from the cache across a
+   process pool (engine/lm_tuning.py), so the full benchmark set is usable.
+   --search grid scores every point on every utterance; --search halving
+   runs successive halving on growing random subsets and stops once the
+   best point's WER confidence interval settles, reporting the decode
+   compute spent against what the exhaustive grid would have cost.
+
+python scripts/evaluation/run_grid_search.py \
+--model training/models/kathbath_hybrid_h200_scaleup_p3_phase3_final.nemo \
+--kenlm data/training/wiki_subword_6gram.arpa \
+--alphas 0.3 0.5 0.7 1.0 --betas 0.5 1.0 2.0 --workers 16
+
+# Denser grid, successive halving
+python scripts/evaluation/run_grid_search.py --search halving --min-subset 256 --ci-tolerance 0.25
+"""
+
 import argparse
 import json
-import torch
 import os
-import jiwer
-import numpy as np
-import librosa
-from nemo.collections.asr.models import EncDecHybridRNNTCTCBPEModel
-from tqdm import tqdm
-
-try:
-    from pyctcdecode import build_ctcdecoder
-except ImportError:
-    print("❌ Error: pyctcdecode not found. Run: pip install pyctcdecode")
-    exit(1)
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.logit_cache import LogitCache, build_logit_cache, default_cache_path
+from evaluation.benchmarking.engine.lm_tuning import LMTuner, successive_halving
 
 # --- CONFIG ---
 DEFAULT_MODEL = "training/models/kathbath_hybrid_h200_scaleup_p3_phase3_final.nemo"
 DEFAULT_KENLM = "data/training/wiki_subword_6gram.arpa"
 DEFAULT_MANIFEST = "evaluation/benchmarking/curation/test_data/Kathbath/test_manifest.json"
-SUBSET_SIZE = 128
+DEFAULT_ALPHAS = [0.3, 0.5, 0.7, 1.0]
+DEFAULT_BETAS = [0.5, 1.0, 2.0]
+# Halving only pays for the full set on a few points, so it can afford a denser grid
+DEFAULT_HALVING_ALPHAS = [0.1, 0.3, 0.5, 0.7, 0.9, 1.1, 1.3, 1.5]
+DEFAULT_HALVING_BETAS = [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5]
 
-def load_audio(path):
-    try:
-        audio, _ = librosa.load(path, sr=16000)
-        return torch.tensor(audio, dtype=torch.float32), len(audio)
-    except:
-        return None, 0
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("--model", type=str, default=DEFAULT_MODEL)
     parser.add_argument("--kenlm", type=str, default=DEFAULT_KENLM)
     parser.add_argument("--manifest", type=str, default=DEFAULT_MANIFEST)
-    parser.add_argument("--subset", type=int, default=SUBSET_SIZE)
-    return parser.parse_args()
+    parser.add_argument("--subset", type=int, default=None,
+                        help="Only use the first N utterances (default: full manifest)")
+    parser.add_argument("--search", type=str, default="grid", choices=["grid", "halving"])
+    parser.add_argument("--alphas", type=float, nargs="+", default=None,
+                        help="Default: 4 values for grid, 8 for halving")
+    parser.add_argument("--betas", type=float, nargs="+", default=None,
+                        help="Default: 3 values for grid, 8 for halving")
+    parser.add_argument("--min-subset", type=int, default=128, help="Halving: utterances in the first rung")
+    parser.add_argument("--eta", type=int, default=2,
+                        help="Halving: keep 1/eta of the points and grow the subset eta-fold per rung")
+    parser.add_argument("--ci-tolerance", type=float, default=0.25,
+                        help="Halving: stop once the best point's 95%% CI half-width is below this (WER points)")
+    parser.add_argument("--seed", type=int, default=0, help="Halving: utterance shuffle seed")
+    parser.add_argument("--beam-width", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="Beam-search processes (default: CPU count - 1)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Acoustic model batch size for the cache stage")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Logit cache dir (default: $ASR_CACHE_DIR/logits/<model sha>-<manifest sha>)")
+    parser.add_argument("--cache-dtype", type=str, default="float32", choices=["float32", "float16"],
+                        help="float16 halves the cache size")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Re-run the acoustic model even if cached")
+    parser.add_argument("--output", type=str, default=None, help="Save all grid results as JSON")
+    args = parser.parse_args()
+    halving = args.search == "halving"
+    if args.alphas is None:
+        args.alphas = DEFAULT_HALVING_ALPHAS if halving else DEFAULT_ALPHAS
+    if args.betas is None:
+        args.betas = DEFAULT_HALVING_BETAS if halving else DEFAULT_BETAS
+    return args
+
+
+def ensure_logit_cache(args):
+    """Return the cache path, running the acoustic model only if it isn't cached yet."""
+    cache_path = args.cache_dir or default_cache_path(args.model, args.manifest)
+    if args.subset is not None and args.cache_dir is None:
+        cache_path += f"-first{args.subset}"
+    if LogitCache.exists(cache_path) and not args.rebuild_cache:
+        print(f"♻️  Using cached log-probs: {cache_path}")
+        return cache_path
+
+    from evaluation.benchmarking.engine.decoder_vocab import load_decoder_vocab
+    from evaluation.benchmarking.engine.models import load_model
+
+    print("🔄 Loading Model...")
+    model, _ = load_model(args.model)
+    vocab = load_decoder_vocab(args.model, model)['vocab']
+    build_logit_cache(model, args.manifest, cache_path, vocab, batch_size=args.batch_size,
+                      limit=args.subset, dtype=args.cache_dtype)
+    del model
+    return cache_path
+
+
+def save_results(args, payload):
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'model': args.model, 'kenlm': args.kenlm, 'manifest': args.manifest,
+                   'beam_width': args.beam_width, 'search': args.search, **payload},
+                  f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Results saved to: {args.output}")
+
+
+def run_halving(args, tuner, points):
+    print("\n" + "=" * 50)
+    print(f"🚀 SUCCESSIVE HALVING: {len(points)} points, {len(tuner)} utterances, "
+          f"first rung {args.min_subset}, eta {args.eta}, on {tuner.num_workers} workers")
+    print("=" * 50)
+    try:
+        search = successive_halving(tuner, points, min_subset=args.min_subset, eta=args.eta,
+                                    ci_tolerance=args.ci_tolerance, seed=args.seed)
+    finally:
+        tuner.close()
+
+    best, compute = search['best'], search['compute']
+    print("=" * 50)
+    wer_text = f"{best['wer']:.2f}%" if best['wer'] is not None else "-"
+    print(f"🏆 BEST RESULT: WER {wer_text} ± {best['ci_half_width'] or 0:.2f} "
+          f"(on {best['num_utterances']} utterances)")
+    print(f"   Alpha: {best['alpha']}")
+    print(f"   Beta:  {best['beta']}")
+    print(f"   Stopped: {search['stop_reason']}")
+    print(f"   Decode compute: {compute['utterance_decodes']} utterance decodes, {compute['decode_seconds']:.1f}s "
+          f"vs exhaustive {compute['exhaustive_utterance_decodes']} "
+          f"(~{compute['exhaustive_decode_seconds_est'] or 0:.1f}s) "
+          f"-> {compute['fraction_of_exhaustive']:.1%} of the grid")
+    print("=" * 50)
+
+    if args.output:
+        save_results(args, {'num_utterances': len(tuner), **search})
+
 
 def run_grid_search():
-    print("🛡️ RUNNING PARANOID SCRIPT")
     args = parse_args()
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    
-    # 1. Load Model
-    print(f"🔄 Loading Model...")
-    model = EncDecHybridRNNTCTCBPEModel.restore_from(args.model)
-    model.eval()
-    model.freeze()
-    model = model.to(device)
-
-    # 2. Extract Raw Vocab (4024 items)
-    vocab_raw = []
-    vocab_size = model.tokenizer.vocab_size
-    if hasattr(model.tokenizer, 'ids_to_tokens'):
-        vocab_raw = model.tokenizer.ids_to_tokens(list(range(vocab_size)))
-    else:
-        for i in range(vocab_size):
-            vocab_raw.append(model.tokenizer.ids_to_text([i]))
-
-    # Deduplicate
-    vocab_clean = []
-    seen = {}
-    for t in vocab_raw:
-        if t in seen:
-            seen[t] += 1
-            vocab_clean.append(f"{t}_dup{seen[t]}")
-        else:
-            seen[t] = 0
-            vocab_clean.append(t)
-            
-    # 3. THE FIX: Explicitly append Blank to match Logit Size (4025)
-    vocab_clean.append("<blank>")
-    
-    # 4. THE PARANOID CHECK: Force Truncate to 4025
-    # The Model Output is 4025. We MUST NOT exceed this.
-    target_size = 4025
-    
-    if len(vocab_clean) > target_size:
-        print(f"⚠️ Vocab was {len(vocab_clean)}. TRUNCATING to {target_size}.")
-        vocab_clean = vocab_clean[:target_size]
-    elif len(vocab_clean) < target_size:
-        print(f"⚠️ Vocab was {len(vocab_clean)}. PADDING to {target_size}.")
-        diff = target_size - len(vocab_clean)
-        vocab_clean += ["<blank>"] * diff
-
-    print(f"✅ FINAL VOCAB SIZE PASSED TO DECODER: {len(vocab_clean)}")
-    assert len(vocab_clean) == 4025, "Vocab size must be exactly 4025"
-
-    # 5. Get Data
-    print(f"🎧 Pre-computing logits for {args.subset} files...")
-    filepaths, references = [], []
-    with open(args.manifest, 'r', encoding='utf-8') as f:
-        for line in f:
-            if len(filepaths) >= args.subset: break
-            item = json.loads(line)
-            filepaths.append(item['audio_filepath'])
-            references.append(item.get('text', ''))
-
-    all_logits = []
-    with torch.no_grad():
-        for path in tqdm(filepaths):
-            tensor, length = load_audio(path)
-            if tensor is None: 
-                all_logits.append(None)
-                continue
-            t_in = tensor.unsqueeze(0).to(device)
-            l_in = torch.tensor([length], device=device)
-            p_sig, p_len = model.preprocessor(input_signal=t_in, length=l_in)
-            enc, enc_len = model.encoder(audio_signal=p_sig, length=p_len)
-            log_probs = model.ctc_decoder(encoder_output=enc)
-            
-            valid_len = int(enc_len[0].item())
-            logits = log_probs[0][:valid_len].cpu().numpy()
-            
-            # Double Check
-            if logits.shape[1] != 4025:
-                print(f"❌ FATAL: Model changed output size to {logits.shape[1]}?!")
-                return
-
-            all_logits.append(logits)
-
-    # 6. Grid Search
-    alphas = [0.3, 0.5, 0.7, 1.0]
-    betas = [0.5, 1.0, 2.0]
-    
-    print("\n" + "="*50)
-    print("🚀 STARTING GRID SEARCH")
-    print("="*50)
-    print(f"{'Alpha':<8} | {'Beta':<8} | {'WER':<8}")
+
+    # 1. Logit cache
+    cache_path = ensure_logit_cache(args)
+
+    # 2. Search
+    tuner = LMTuner(cache_path, args.kenlm, beam_width=args.beam_width, num_workers=args.workers)
+    points = [(alpha, beta) for alpha in args.alphas for beta in args.betas]
+    if args.search == "halving":
+        return run_halving(args, tuner, points)
+
+    print("\n" + "=" * 50)
+    print(f"🚀 STARTING GRID SEARCH: {len(points)} points x {len(tuner)} utterances "
+          f"on {tuner.num_workers} workers")
+    print("=" * 50)
+    try:
+        results = tuner.evaluate(points, n_examples=3)
+    finally:
+        tuner.close()
+
+    print(f"{'Alpha':<8} | {'Beta':<8} | {'WER':<8} | {'CER':<8}")
     print("-" * 50)
+    for (alpha, beta), r in results.items():
+        print(f"{alpha:<8} | {beta:<8} | {r['wer']:.2f}%   | {r['cer']:.2f}%")
 
-    best_wer = 100.0
-    best_params = (0, 0)
-    best_preds = []
-
-    for alpha in alphas:
-        try:
-            decoder = build_ctcdecoder(
-                labels=vocab_clean,  # EXACTLY 4025 ITEMS
-                kenlm_model_path=args.kenlm,
-                alpha=alpha,
-                beta=0.0
-            )
-        except Exception as e:
-            print(f"Decoder Build Failed: {e}")
-            continue
-
-        for beta in betas:
-            decoder.reset_params(alpha=alpha, beta=beta)
-            preds = []
-            valid_refs = []
-            
-            for i, logits in enumerate(all_logits):
-                if logits is None: continue
-                
-                # Decode
-                raw_text = decoder.decode(logits, beam_width=64)
-                
-                # --- STITCHING (Fixes 100% WER) ---
-                stitched_text = raw_text.replace(" ", "").replace("\u2581", " ").strip()
-                
-                preds.append(stitched_text)
-                valid_refs.append(references[i])
-
-            if not preds: continue
-            wer = jiwer.wer(valid_refs, preds) * 100
-            
-            print(f"{alpha:<8} | {beta:<8} | {wer:.2f}%")
-            
-            if wer < best_wer:
-                best_wer = wer
-                best_params = (alpha, beta)
-                best_preds = preds
-
-    print("="*50)
-    print(f"🏆 BEST RESULT: WER {best_wer:.2f}%")
+    best_params = min(results, key=lambda p: results[p]['wer'])
+    best = results[best_params]
+    print("=" * 50)
+    print(f"🏆 BEST RESULT: WER {best['wer']:.2f}%")
     print(f"   Alpha: {best_params[0]}")
     print(f"   Beta:  {best_params[1]}")
-    print("="*50)
-    
+    print(f"   Decode compute: {tuner.compute['utterance_decodes']} utterance decodes, "
+          f"{tuner.compute['decode_seconds']:.1f}s")
+    print("=" * 50)
+
     print("\n👀 QUALITATIVE CHECK")
-    for i in range(min(3, len(best_preds))):
-        print(f"\nExample {i+1}:")
-        print(f"Ref:  {valid_refs[i]}")
-        print(f"Pred: {best_preds[i]}")
+    for i, example in enumerate(best['examples'], 1):
+        print(f"\nExample {i}:")
+        print(f"Ref:  {example['reference']}")
+        print(f"Pred: {example['prediction']}")
+
+    if args.output:
+        save_results(args, {
+            'num_utterances': len(tuner),
+            'best': {'alpha': best_params[0], 'beta': best_params[1], 'wer': best['wer'], 'cer': best['cer']},
+            'grid': [{'alpha': a, 'beta': b, 'wer': r['wer'], 'cer': r['cer']} for (a, b), r in results.items()],
+            'compute': tuner.compute,
+        })
+
 
 if __name__ == "__main__":
     run_grid_search()
@@ -2,20 +2,23 @@
 """
 Fix bytecode issues in predictions JSON and generate report
 
+Predictions are streamed (any format predictions_io reads: .json, .jsonl,
+.jsonl.gz, .jsonl.zst); the corrected file's format follows its extension.
+
 Usage:
-    python fix_bytecode_predictions.py --input predictions.json --output-corrected predictions_corrected.json --output-report report.json
+    python fix_bytecode_predictions.py --input predictions.jsonl --output-corrected predictions_corrected.jsonl --output-report report.json
 """
 
+import sys
 import json
 import argparse
 from pathlib import Path
 
-try:
-    from jiwer import wer, cer
-    JIWER_AVAILABLE = True
-except ImportError:
-    JIWER_AVAILABLE = False
-    print("⚠️  Warning: jiwer not installed. WER/CER metrics will not be computed.")
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.metrics import RunningMetrics, utterance_counts
+from evaluation.benchmarking.engine.predictions_io import PredictionsWriter, iter_predictions
 
 # Bytecode to Kannada character mappings
 BYTECODE_MAP = {
@@ -50,83 +53,73 @@ def main():
     
     args = parser.parse_args()
     
-    # Read input data
+    # Stream input -> corrected output, scoring both versions on the way
     print(f"📖 Reading: {args.input}")
-    with open(args.input, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Process corrections
+    print(f"💾 Saving corrected predictions: {args.output_corrected}")
     corrections = []
-    corrected_data = []
-    
-    for entry in data:
-        original_prediction = entry.get('prediction', '')
-        corrected_prediction = fix_bytecodes(original_prediction)
-        
-        # Create corrected entry
-        corrected_entry = entry.copy()
-        corrected_entry['prediction'] = corrected_prediction
-        corrected_data.append(corrected_entry)
-        
-        # Track corrections
-        if has_bytecodes(original_prediction):
-            corrections.append({
-                'index': entry.get('index', -1),
-                'audio_filepath': entry.get('audio_filepath', ''),
-                'ground_truth': entry.get('ground_truth', ''),
-                'prediction_original': original_prediction,
-                'prediction_corrected': corrected_prediction
-            })
+    total = 0
+    running_original, running_corrected = RunningMetrics(), RunningMetrics()
     
-    # Save corrected predictions
-    print(f"💾 Saving corrected predictions: {args.output_corrected}")
-    with open(args.output_corrected, 'w', encoding='utf-8') as f:
-        json.dump(corrected_data, f, indent=2, ensure_ascii=False)
+    with PredictionsWriter(args.output_corrected) as writer:
+        for entry in iter_predictions(args.input):
+            total += 1
+            original_prediction = entry.get('prediction', '')
+            corrected_prediction = fix_bytecodes(original_prediction)
+            
+            # Create corrected entry
+            corrected_entry = entry.copy()
+            corrected_entry['prediction'] = corrected_prediction
+            writer.write(corrected_entry)
+            
+            # Track corrections
+            if has_bytecodes(original_prediction):
+                corrections.append({
+                    'index': entry.get('index', -1),
+                    'audio_filepath': entry.get('audio_filepath', ''),
+                    'ground_truth': entry.get('ground_truth', ''),
+                    'prediction_original': original_prediction,
+                    'prediction_corrected': corrected_prediction
+                })
+            
+            # Skip entries with empty ground truth
+            ground_truth = entry.get('ground_truth', '')
+            if ground_truth.strip():
+                running_original.add(utterance_counts(ground_truth, original_prediction.strip()))
+                running_corrected.add(utterance_counts(ground_truth, corrected_prediction.strip()))
     
-    # Compute WER/CER metrics if jiwer is available
+    # Compute WER/CER metrics
     metrics = {}
-    if JIWER_AVAILABLE and len(data) > 0:
+    if running_original.num_samples > 0:
         print("📊 Computing WER/CER metrics...")
-        ground_truths = [entry.get('ground_truth', '') for entry in data]
-        predictions_original = [entry.get('prediction', '').strip() for entry in data]
-        predictions_corrected_list = [entry.get('prediction', '').strip() for entry in corrected_data]
-        
-        # Filter out empty strings
-        valid_indices = [i for i, gt in enumerate(ground_truths) if gt.strip()]
-        ground_truths = [ground_truths[i] for i in valid_indices]
-        predictions_original = [predictions_original[i] for i in valid_indices]
-        predictions_corrected_list = [predictions_corrected_list[i] for i in valid_indices]
+        original = running_original.as_dict(ndigits=None)
+        corrected = running_corrected.as_dict(ndigits=None)
+        wer_original, cer_original = original['wer'], original['cer']
+        wer_corrected, cer_corrected = corrected['wer'], corrected['cer']
         
-        if len(ground_truths) > 0:
-            wer_original = wer(ground_truths, predictions_original) * 100
-            cer_original = cer(ground_truths, predictions_original) * 100
-            wer_corrected = wer(ground_truths, predictions_corrected_list) * 100
-            cer_corrected = cer(ground_truths, predictions_corrected_list) * 100
-            
-            metrics = {
-                'original': {
-                    'wer': round(wer_original, 2),
-                    'cer': round(cer_original, 2)
-                },
-                'corrected': {
-                    'wer': round(wer_corrected, 2),
-                    'cer': round(cer_corrected, 2)
-                },
-                'improvement': {
-                    'wer_absolute': round(wer_original - wer_corrected, 2),
-                    'cer_absolute': round(cer_original - cer_corrected, 2),
-                    'wer_relative_percent': round((wer_original - wer_corrected) / wer_original * 100, 2) if wer_original > 0 else 0,
-                    'cer_relative_percent': round((cer_original - cer_corrected) / cer_original * 100, 2) if cer_original > 0 else 0
-                }
+        metrics = {
+            'original': {
+                'wer': round(wer_original, 2),
+                'cer': round(cer_original, 2)
+            },
+            'corrected': {
+                'wer': round(wer_corrected, 2),
+                'cer': round(cer_corrected, 2)
+            },
+            'improvement': {
+                'wer_absolute': round(wer_original - wer_corrected, 2),
+                'cer_absolute': round(cer_original - cer_corrected, 2),
+                'wer_relative_percent': round((wer_original - wer_corrected) / wer_original * 100, 2) if wer_original > 0 else 0,
+                'cer_relative_percent': round((cer_original - cer_corrected) / cer_original * 100, 2) if cer_original > 0 else 0
             }
+        }
     
     # Generate report
     report = {
-        'total_samples': len(data),
+        'total_samples': total,
         'corrections_made': len(corrections),
-        'correction_rate': f"{len(corrections) / len(data) * 100:.2f}%",
+        'correction_rate': f"{len(corrections) / total * 100:.2f}%",
         'bytecode_patterns_fixed': list(BYTECODE_MAP.keys()),
-        'metrics': metrics if metrics else 'jiwer not available',
+        'metrics': metrics if metrics else 'no non-empty ground truths',
         'corrections_detail': corrections
     }
     
@@ -139,9 +132,9 @@ def main():
     print("\n" + "="*80)
     print("SUMMARY")
     print("="*80)
-    print(f"✅ Total samples processed: {len(data)}")
+    print(f"✅ Total samples processed: {total}")
     print(f"✅ Bytecode corrections made: {len(corrections)}")
-    print(f"✅ Correction rate: {len(corrections) / len(data) * 100:.2f}%")
+    print(f"✅ Correction rate: {len(corrections) / total * 100:.2f}%")
     
     if metrics:
         print(f"\n📊 METRICS:")
@@ -101,10 +101,7 @@ import logging
 import os
 from typing import List, Optional
 
-import tokenizers
-
-from nemo.collections.common.tokenizers.sentencepiece_tokenizer import create_spt_model
-from nemo.utils.data_utils import DataStoreObject
+# NeMo and HF tokenizers are imported where they are used, so --help and argument errors stay instant
 
 parser = argparse.ArgumentParser(description='Create tokenizer')
 group = parser.add_mutually_exclusive_group(required=True)
@@ -194,6 +191,8 @@ def __build_document_from_manifests(
         logging.info('Corpus already exists at path : %s', document_path)
         return document_path
 
+    from nemo.utils.data_utils import DataStoreObject
+
     num_lines = 0
     with open(document_path, 'w') as out_writer:
         for manifest in manifests:
@@ -265,6 +264,7 @@ def __process_data(
     Returns:
     """
     if tokenizer_type == 'spe':
+        from nemo.collections.common.tokenizers.sentencepiece_tokenizer import create_spt_model
 
         # Prepare directory of tokenizer
         if spe_max_sentencepiece_length > 0:
@@ -318,6 +318,8 @@ def __process_data(
         if not os.path.exists(tokenizer_dir):
             os.makedirs(tokenizer_dir)
 
+        import tokenizers
+
         tokenizer = tokenizers.BertWordPieceTokenizer(lowercase=lower_case)
 
         tokenizer.train(text_path, vocab_size=vocab_size)
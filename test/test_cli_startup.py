@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Startup budget for the lightweight asr.py commands.
+
+Each command in LIGHT_COMMANDS is run in a fresh interpreter, as a user
+would run it. It must finish within ASR_CLI_STARTUP_BUDGET seconds (best of
+RUNS, default 1.0s) and must not import any of HEAVY_MODULES: help, listing
+and text-only commands have no business loading torch or NeMo. A new
+top-level import in one of these paths shows up here as a failure naming
+the module and the command.
+
+python test/test_cli_startup.py      # or: python -m pytest test/test_cli_startup.py
+"""
+
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CLI = PROJECT_ROOT / "asr.py"
+BUDGET_SECONDS = float(os.environ.get("ASR_CLI_STARTUP_BUDGET", "1.0"))
+RUNS = 3
+HEAVY_MODULES = ("torch", "nemo", "lightning", "pytorch_lightning", "librosa", "soundfile", "datasets",
+                 "transformers", "sentencepiece", "tokenizers", "fastapi", "uvicorn", "pyctcdecode", "kenlm")
+LIGHT_COMMANDS = [
+    ["--help"],
+    ["serve", "--help"],
+    ["benchmark", "--help"],
+    ["normalize", "--help"],
+    ["prep", "--help"],
+    ["tokenizer", "--help"],
+    ["analyze", "--help"],
+    ["benchmark", "run", "--help"],
+    ["benchmark", "matrix", "--help"],
+    ["benchmark", "export", "--help"],
+    ["benchmark", "history", "--help"],
+    ["normalize", "predictions", "--help"],
+    ["normalize", "fix-bytecode", "--help"],
+    ["prep", "master-manifest", "--help"],
+    ["prep", "ka-kathbath", "--help"],
+    ["tokenizer", "build", "--help"],
+    ["analyze", "convert-predictions", "--help"],
+    ["analyze", "wer-engine", "--help"],
+]
+
+
+def run_cli(args, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + [str(CLI)] + args
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    return time.perf_counter() - start, result
+
+
+def imported_modules(stderr):
+    """Top-level package names from `python -X importtime` output."""
+    names = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            if name and name != "imported package":
+                names.add(name.split(".")[0])
+    return names
+
+
+def check_command(args):
+    _, result = run_cli(args, importtime=True)
+    label = "asr.py " + " ".join(args)
+    assert result.returncode == 0, f"{label} exited {result.returncode}:\n{result.stderr[-2000:]}"
+    heavy = sorted(imported_modules(result.stderr) & set(HEAVY_MODULES))
+    assert not heavy, f"{label} imports {', '.join(heavy)}"
+    seconds = min(run_cli(args)[0] for _ in range(RUNS))
+    assert seconds <= BUDGET_SECONDS, f"{label} took {seconds:.2f}s (budget {BUDGET_SECONDS:.2f}s)"
+    return seconds
+
+
+def test_light_commands_start_fast():
+    failures = []
+    for args in LIGHT_COMMANDS:
+        try:
+            check_command(args)
+        except AssertionError as e:
+            failures.append(str(e))
+    assert not failures, "\n".join(failures)
+
+
+def main():
+    failed = 0
+    for args in LIGHT_COMMANDS:
+        label = "asr.py " + " ".join(args)
+        try:
+            seconds = check_command(args)
+            print(f"✅ {label:<48} {seconds:.2f}s")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {e}")
+    print(f"\n{len(LIGHT_COMMANDS) - failed}/{len(LIGHT_COMMANDS)} commands within {BUDGET_SECONDS:.2f}s, "
+          f"no heavy imports")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
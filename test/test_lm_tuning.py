@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+LM tuning over a tiny hand-written logit cache: one (alpha, beta) point is
+scored end to end (process pool, pyctcdecode decoder, metrics), and a cache
+whose log-prob columns don't match vocab + blank is refused up front.
+
+Needs numpy and pyctcdecode (no KenLM model: the beam search runs without
+an LM). Skipped when pyctcdecode isn't installed.
+
+python test/test_lm_tuning.py      # or: python -m pytest test/test_lm_tuning.py
+"""
+
+import os
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from evaluation.benchmarking.engine.lm_tuning import LMTuner
+from evaluation.benchmarking.engine.logit_cache import CACHE_VERSION, DATA_NAME, INDEX_NAME
+
+VOCAB = ["▁ab", "c", "▁d"]
+# Per utterance: (reference, best label per frame; len(VOCAB) = blank)
+UTTERANCES = [("abc d", [0, 3, 1, 3, 2]), ("d", [3, 2, 2, 3])]
+
+
+def write_cache(path, vocab, columns):
+    """A LogitCache on disk: near one-hot log-probs peaking on the given labels."""
+    os.makedirs(path, exist_ok=True)
+    index = {'version': CACHE_VERSION, 'manifest': 'test.json', 'dtype': 'float32', 'vocab': vocab,
+             'vocab_size': columns, 'utterances': [], 'failed': 0}
+    offset = 0
+    with open(os.path.join(path, DATA_NAME), 'wb') as f:
+        for i, (text, labels) in enumerate(UTTERANCES):
+            log_probs = np.full((len(labels), columns), -20.0, dtype=np.float32)
+            log_probs[np.arange(len(labels)), labels] = 0.0
+            f.write(log_probs.tobytes())
+            index['utterances'].append({'index': i, 'audio_filepath': f"{i}.wav", 'text': text,
+                                        'offset': offset, 'frames': len(labels)})
+            offset += len(labels)
+    index['total_frames'] = offset
+    with open(os.path.join(path, INDEX_NAME), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    return path
+
+
+def test_scores_one_point():
+    try:
+        import pyctcdecode  # noqa: F401
+    except ImportError:
+        import pytest
+        pytest.skip("pyctcdecode not installed")
+    with tempfile.TemporaryDirectory() as tmp:
+        tuner = LMTuner(write_cache(os.path.join(tmp, 'cache'), VOCAB, len(VOCAB) + 1), None,
+                        beam_width=8, num_workers=1)
+        try:
+            results = tuner.evaluate([(0.5, 1.0)], n_examples=2)
+        finally:
+            tuner.close()
+    result = results[(0.5, 1.0)]
+    assert result['wer'] == 0.0, result
+    assert [e['prediction'] for e in result['examples']] == ["abc d", "d"]
+
+
+def test_refuses_mismatched_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        # An extra log-prob column: labels and logits would disagree in every worker
+        path = write_cache(os.path.join(tmp, 'cache'), VOCAB, len(VOCAB) + 2)
+        try:
+            LMTuner(path, None, num_workers=1)
+        except ValueError as e:
+            assert "log-prob columns" in str(e)
+        else:
+            raise AssertionError("LMTuner accepted a cache with vocab + 2 columns")
+
+
+if __name__ == "__main__":
+    test_scores_one_point()
+    test_refuses_mismatched_cache()
+    print("✅ LM tuning checks passed")